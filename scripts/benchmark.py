@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from synthetic_knowledge_graphs import FRUNIDataset, FTREEDataset, UserItemAttrDataset
+
+
+def create_dataset(name: str, scale: int, backend: str, seed: int):
+    """
+    Dataset `name` with `scale` components: universities for FRUNI, trees for
+    FTREE and users (and items) for UserItemAttr.
+    """
+    if name == "fruni":
+        return FRUNIDataset(
+            n_u=scale,
+            lambda_f=2.0,
+            alpha_u=min(1.0, 10 / scale),
+            n_f=scale // 2,
+            percentages=[0.8, 0.1, 0.1],
+            seed=seed,
+            backend=backend,
+        )
+    elif name == "ftree":
+        return FTREEDataset(
+            n_t=scale,
+            lambda_b=5.0,
+            n_d=3,
+            percentages=[0.8, 0.1, 0.1],
+            seed=seed,
+            backend=backend,
+        )
+    elif name == "user_item_attr":
+        return UserItemAttrDataset(
+            num_attrs=max(2, scale // 100),
+            num_items=scale,
+            num_users=scale,
+            lambda_a=1.0,
+            lambda_i=3.0,
+            percentages=[0.8, 0.1, 0.1],
+            seed=seed,
+            backend=backend,
+        )
+    raise ValueError(f"Unknown dataset: {name}")
+
+
+def measure(fn, *args, memory=True, **kwargs):
+    """
+    Return the result of fn, its wall time in seconds and the peak memory in
+    bytes allocated during the call (as traced by tracemalloc, which includes
+    numpy buffers), or None if memory is False.
+
+    Tracing slows down allocation-heavy Python code several times, so the call is
+    timed without tracing and run a second time under tracemalloc for the peak
+    memory.
+    """
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    if not memory:
+        return result, seconds, None
+
+    del result
+    tracemalloc.start()
+    try:
+        result = fn(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def run(
+    name: str, scale: int, backend: str, seed: int, root: str, memory: bool = True
+) -> list[dict]:
+    results = []
+
+    def record(phase, fn, *args, **kwargs):
+        result, seconds, peak = measure(fn, *args, memory=memory, **kwargs)
+        results.append(
+            {
+                "dataset": name,
+                "backend": backend,
+                "scale": scale,
+                "phase": phase,
+                "seconds": seconds,
+                "peak_bytes": peak,
+            }
+        )
+        print(f"{name:>15} {backend:>8} {scale:>9} {phase:>21} {seconds:9.3f}s")
+        return result
+
+    dataset = record("create_graph", create_dataset, name, scale, backend, seed)
+    num_triples = len(dataset.store) if dataset.store is not None else None
+
+    folder = os.path.join(root, f"{name}-{backend}-{scale}")
+    record("save_triples", dataset.save_triples, folder, use_hash=False)
+    if dataset.store is not None:
+        record("save", dataset.save, folder)
+        record("load", type(dataset).load, os.path.join(folder, dataset.get_hash()))
+
+    path = os.path.join(folder, "test_explanations.txt")
+    record("load_explanation", type(dataset).load_explanation, path)
+
+    def load_explanation_lazy():
+        with type(dataset).load_explanation(path, lazy=True) as reader:
+            return list(reader)
+
+    record("load_explanation_lazy", load_explanation_lazy)
+
+    for result in results:
+        result["num_triples"] = num_triples
+    return results
+
+
+parser = argparse.ArgumentParser(
+    description="Time and measure the peak memory of dataset generation, export and load."
+)
+parser.add_argument(
+    "--datasets",
+    nargs="+",
+    default=["fruni", "ftree", "user_item_attr"],
+    choices=["fruni", "ftree", "user_item_attr"],
+    help="Datasets to benchmark",
+)
+parser.add_argument(
+    "--scales",
+    nargs="+",
+    type=int,
+    default=[1_000, 10_000, 100_000, 1_000_000],
+    help="Number of components (universities, trees, users) of every run",
+)
+parser.add_argument(
+    "--backends",
+    nargs="+",
+    default=["numpy"],
+    choices=["networkx", "numpy", "stream"],
+    help="Graph construction backends",
+)
+parser.add_argument("--seed", type=int, default=0, help="Random seed")
+parser.add_argument(
+    "--no_memory",
+    action="store_true",
+    help="Only time the phases, without the second traced run for the peak memory",
+)
+parser.add_argument(
+    "--output",
+    type=str,
+    default=os.path.join("benchmarks", "results.json"),
+    help="JSON file where the results are written",
+)
+parser.add_argument(
+    "--tag",
+    type=str,
+    default="",
+    help="Label of the benchmarked version, e.g. a git revision",
+)
+args = parser.parse_args()
+
+results = []
+with tempfile.TemporaryDirectory() as root:
+    for name in args.datasets:
+        for backend in args.backends:
+            for scale in args.scales:
+                results.extend(
+                    run(name, scale, backend, args.seed, root, not args.no_memory)
+                )
+
+report = {
+    "tag": args.tag,
+    "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),
+    "python": platform.python_version(),
+    "numpy": np.__version__,
+    "platform": platform.platform(),
+    "results": results,
+}
+if os.path.dirname(args.output):
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+with open(args.output, "w") as f:
+    json.dump(report, f, indent=2)
+print(f"Results written to {args.output}")
@@ -7,6 +7,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 from synthetic_knowledge_graphs import FRUNIDataset
+from synthetic_knowledge_graphs.impl.logger import BufferedFSLogger
 
 # Step 2: Define command-line arguments
 parser = argparse.ArgumentParser(description="Generate and save the FRUNI dataset.")
@@ -31,6 +32,12 @@ parser.add_argument(
     required=True,
     help="Number of universities that foster friendship.",
 )
+parser.add_argument(
+    "--num_students",
+    type=int,
+    default=2,
+    help="Number of students per university.",
+)
 parser.add_argument(
     "--percentages",
     nargs="+",
@@ -39,10 +46,50 @@ parser.add_argument(
     help="Train/Valid/Test split percentages",
 )
 parser.add_argument("--seed", type=int, default=0, help="Random seed")
+parser.add_argument(
+    "--backend",
+    type=str,
+    default="networkx",
+    choices=["networkx", "numpy", "stream"],
+    help="Graph construction backend",
+)
 parser.add_argument("--name", type=str, default="FRUNI", help="Name for the dataset")
 parser.add_argument(
     "--only_train", action="store_true", help="Save only training triples"
 )
+parser.add_argument(
+    "--num_workers",
+    type=int,
+    default=1,
+    help="Number of processes used to generate the dataset and compute the explanations",
+)
+parser.add_argument(
+    "--explanation_index",
+    action="store_true",
+    help="Record the explanation of every triple at generation time",
+)
+parser.add_argument(
+    "--transductive",
+    action="store_true",
+    help="Put every entity and relation in the train split",
+)
+parser.add_argument(
+    "--stratify",
+    action="store_true",
+    help="Apply the split percentages to the triples of every relation",
+)
+parser.add_argument(
+    "--log_folder",
+    type=str,
+    default="",
+    help="Folder where the timing of every phase is logged (disabled if empty)",
+)
+parser.add_argument(
+    "--num_negatives",
+    type=int,
+    default=0,
+    help="Number of filtered negatives saved per triple of every split",
+)
 args = parser.parse_args()
 
 # Step 3: Create an instance of FTREEDataset with provided arguments
@@ -51,8 +98,15 @@ dataset = FRUNIDataset(
     lambda_f=args.lambda_f,
     alpha_u=args.alpha_u,
     n_f=args.n_f,
+    num_students=args.num_students,
     percentages=args.percentages,
     seed=args.seed,
+    backend=args.backend,
+    num_workers=args.num_workers,
+    explanation_index=args.explanation_index,
+    transductive=args.transductive,
+    stratify=args.stratify,
+    logger=BufferedFSLogger(folder=args.log_folder) if args.log_folder else None,
 )
 
 # Step 4: Generate a unique hash for the dataset (if needed)
@@ -65,12 +119,15 @@ else:
     folder = os.path.join("data", args.name)
 
 # Step 6: Save the dataset and optionally save triples
-dataset.save(root=folder)
+if args.backend != "stream":
+    dataset.save(root=folder)
 dataset.save_triples(
     root=folder,
     only_train=args.only_train,
     use_hash=True if args.name == "" else False,
     save_random_test_triples=50,
+    num_workers=args.num_workers,
+    num_negatives=args.num_negatives,
 )
 
 # Step 7: Get the current timestamp in a human-readable format
@@ -1,14 +1,45 @@
+from __future__ import annotations
+
 import hashlib
 import os
 import pickle
-import random
+import shutil
 
 
 import logging
 
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+import numpy as np
 
+from synthetic_knowledge_graphs.core.contracts.logger import Logger
+from synthetic_knowledge_graphs.core.entities.array_utils import ArrayUtils
+from synthetic_knowledge_graphs.core.entities.entity_names import EntityNames
+from synthetic_knowledge_graphs.core.entities.explanation_reader import (
+    ExplanationReader,
+)
+from synthetic_knowledge_graphs.core.entities.explanation_scorer import (
+    ExplanationScorer,
+)
+from synthetic_knowledge_graphs.core.entities.generation_cache import GenerationCache
 from synthetic_knowledge_graphs.core.entities.io_utils import IOUtils
+from synthetic_knowledge_graphs.core.entities.negative_sampler import NegativeSampler
+from synthetic_knowledge_graphs.core.entities.node_index import IndexedDiGraph
+from synthetic_knowledge_graphs.core.entities.profiler import Profiler
+from synthetic_knowledge_graphs.core.entities.ragged_array import RaggedArray
+from synthetic_knowledge_graphs.core.entities.ranking_evaluator import (
+    RankingEvaluator,
+    ScoreFn,
+)
+from synthetic_knowledge_graphs.core.entities.rng_utils import RNGUtils
+from synthetic_knowledge_graphs.core.entities.split_utils import SplitUtils
+from synthetic_knowledge_graphs.core.entities.triple_store import TripleStore
+from synthetic_knowledge_graphs.core.values.constants import Backend, RNGStream
+from synthetic_knowledge_graphs.core.values.graph_block import GraphBlock
 
 
 class SyntheticDataset(ABC):
@@ -20,26 +51,573 @@ class SyntheticDataset(ABC):
         percentages (list of float, optional): List of percentages to create dataset splits.
             Defaults to [1.0], meaning only train split.
 
-        seed (int, optional): Seed for randomization. Defaults to 42.
+        seed (int, optional): Seed for randomization. Defaults to 42. All the random
+            draws of the dataset come from generators derived from it (see `rng`), so
+            the same parameters and seed always give the same dataset.
+
+        backend (str, optional): Construction backend, one of `Backend`. With
+            `Backend.NUMPY` the graph is generated as integer edge arrays and the
+            networkx graph is only materialized when `graph` is accessed. With
+            `Backend.STREAM` nothing is generated at construction: the graph is
+            generated block by block by `iter_triples` and `save_triples`, so it
+            never has to fit in memory. Defaults to `Backend.NETWORKX`.
+
+        num_workers (int, optional): Number of processes used to sample the blocks
+            of components, build their edges and lay out their names (see
+            `sample_blocks` and `map_blocks`). The generated dataset does not depend
+            on it. Defaults to 1.
+
+        cache (GenerationCache, optional): If given, a dataset with the same class,
+            backend and hash is taken from the cache instead of being generated, and
+            newly generated datasets are added to it. Datasets taken from the cache
+            are copies (see `copy`) with the arguments of this constructor that are
+            not part of the hash, like num_workers. Defaults to None.
+
+        explanation_index (bool, optional): If True, the explanation of every triple
+            is recorded at generation time as ids of triples of the store (see
+            `create_explanation_index`), so that exporting explanations is a gather
+            over the store. Not supported with `Backend.STREAM`. Defaults to False.
+
+        transductive (bool, optional): If True, every entity and relation of the
+            graph appears in the train split, so valid and test only contain
+            entities and relations seen in training (see `SplitUtils.split`). Not
+            supported with `Backend.STREAM`. Defaults to False.
+
+        stratify (bool, optional): If True, the split percentages are applied to
+            the triples of every relation instead of to all the triples. Not
+            supported with `Backend.STREAM`. Defaults to False.
+
+        logger (Logger, optional): If given, the wall time, peak memory and counts
+            of the phases of the dataset (generation, splitting, explanations, file
+            writes...) are logged through it (see `profiler`). Defaults to None.
+
+    Attributes:
+        store (TripleStore): Canonical in-memory representation of the graph. None
+            with `Backend.STREAM`.
+
+        block_size (int): Components (universities, trees, users...) are sampled in
+            blocks of `block_size`, each one with its own generator (see
+            `sample_blocks`). It is part of the generation procedure: changing it
+            changes the generated graph.
     """
 
-    def __init__(self, percentages: list[float] = [1.0], seed: int = 42):
+    backends = (Backend.NETWORKX,)
+    block_size = 1024
+    transductive = False
+    stratify = False
+    _profiler = Profiler()
+
+    def __init__(
+        self,
+        percentages: list[float] = [1.0],
+        seed: int = 42,
+        backend: str = Backend.NETWORKX,
+        num_workers: int = 1,
+        cache: GenerationCache | None = None,
+        explanation_index: bool = False,
+        transductive: bool = False,
+        stratify: bool = False,
+        logger: Logger | None = None,
+    ):
         self.percentages = percentages
         assert sum(percentages) == 1.0
         self.seed = seed
+        assert (
+            backend in self.backends
+        ), f"Backend {backend} not supported by {type(self).__name__}"
+        self.backend = backend
+        self.num_workers = num_workers
+        self.transductive = transductive
+        self.stratify = stratify
+        profiler = Profiler(logger)
+        self._profiler = profiler
+
+        self._graph = None
+        self._splits = None
+        if backend == Backend.STREAM:
+            assert not explanation_index, "Backend.STREAM has no explanation index"
+            assert not (
+                transductive or stratify
+            ), "Backend.STREAM only supports random splits"
+            self.store = None
+            return
+
+        cached = cache.get(self) if cache is not None else None
+        if cached is not None:
+            self.__dict__.update(cached.__dict__)
+            # Arguments that are not part of the hash
+            self.num_workers = num_workers
+            self._profiler = profiler
+            if explanation_index and self.explanation_index is None:
+                self.build_explanation_index()
+            return
+
+        with profiler.phase("create_graph") as counts:
+            graph = self.create_graph()
+            if isinstance(graph, TripleStore):
+                self.store = graph
+            else:
+                self.store = TripleStore.from_networkx(graph)
+                self._graph = graph
+            if profiler.enabled:
+                counts.update(self.counts())
+        if explanation_index:
+            self.build_explanation_index()
+        if cache is not None:
+            cache.put(self)
+
+    @property
+    def profiler(self) -> Profiler:
+        """
+        Profiler of the dataset, disabled unless a logger was given. Subclasses can
+        time their own hot paths with `profiler.phase` or `Profiler.timed`.
+        """
+        return self._profiler
+
+    def __getstate__(self) -> dict:
+        # Loggers hold files and threads: they stay in the main process
+        state = self.__dict__.copy()
+        state.pop("_profiler", None)
+        return state
+
+    def counts(self) -> dict:
+        """
+        Number of nodes and edges of the store, and number of edges per relation.
+        """
+        store = self.store
+        edges = np.bincount(store.rels, minlength=store.num_relations)
+        return {
+            "num_nodes": store.num_entities,
+            "num_edges": len(store),
+            "edges_per_relation": dict(zip(store.relations, edges.tolist())),
+        }
+
+    def copy(self) -> SyntheticDataset:
+        """
+        Copy of the dataset that can be modified independently: it has its own
+        TripleStore, splits and array attributes, except for read-only arrays,
+        which are shared (see `ArrayUtils.copy_writeable`). The networkx graph is
+        rebuilt from the store when accessed.
+        """
+        other = type(self).__new__(type(self))
+        for key, value in self.__dict__.items():
+            if isinstance(value, np.ndarray):
+                value = ArrayUtils.copy_writeable(value)
+            elif isinstance(value, (list, dict)):
+                value = value.copy()
+            other.__dict__[key] = value
+        other.store = self.store.copy() if self.store is not None else None
+        other._graph = None
+        if self._splits is not None:
+            other._splits = {
+                name: ArrayUtils.copy_writeable(idx)
+                for name, idx in self._splits.items()
+            }
+        return other
 
-        self.graph = self.create_graph()
+    @property
+    def graph(self) -> nx.DiGraph:
+        if self._graph is None:
+            self._graph = self.build_graph()
+        return self._graph
 
     @abstractmethod
-    def create_graph(self):
+    def create_graph(self) -> nx.DiGraph | TripleStore:
+        """
+        Generate the dataset, either as a networkx graph or directly as a TripleStore.
+        In the latter case the networkx graph is only built when `graph` is accessed.
+        """
         pass
 
+    def build_graph(self) -> nx.DiGraph:
+        if self.store is None:
+            return self.graph_from_blocks()
+        return self.store.to_networkx()
+
+    def iter_blocks(self) -> Iterator[GraphBlock]:
+        """
+        Generate the graph as a sequence of GraphBlock, every node being introduced
+        by exactly one block. Subclasses generate every block of components on its
+        own (see `sample_blocks`), which is what `Backend.STREAM` relies on; by
+        default the whole store is a single block.
+        """
+        store = self.store
+        yield GraphBlock(
+            nodes=store.entities,
+            categories=[store.category_list[c] for c in store.categories.tolist()],
+            triples=list(store.iter_triples()),
+        )
+
+    def graph_from_blocks(self) -> nx.DiGraph:
+        graph = IndexedDiGraph()
+        for block in self.iter_blocks():
+            graph.add_nodes_from(
+                (node, {"category": category})
+                for node, category in zip(block.nodes, block.categories)
+            )
+            graph.add_edges_from(
+                (head, tail, {"relation": relation})
+                for head, relation, tail in block.triples
+            )
+        return graph
+
+    def iter_triples(
+        self, chunk_size: int = 100_000
+    ) -> Iterator[list[tuple[str, str, str]]]:
+        """
+        Yield the (head, relation, tail) triples of the dataset in chunks of at most
+        `chunk_size`. With `Backend.STREAM` the triples are generated block by block
+        (see `iter_blocks`), so only one block is held in memory at a time.
+        """
+        if self.store is not None:
+            for start in range(0, len(self.store), chunk_size):
+                idx = np.arange(start, min(start + chunk_size, len(self.store)))
+                yield list(self.store.iter_triples(idx))
+            return
+
+        chunk = []
+        for block in self.iter_blocks():
+            chunk.extend(block.triples)
+            while len(chunk) >= chunk_size:
+                yield chunk[:chunk_size]
+                chunk = chunk[chunk_size:]
+        if chunk:
+            yield chunk
+
+    def rng(self, *key: int) -> np.random.Generator:
+        """
+        Generator of the random stream identified by key (see `RNGStream`).
+        """
+        return RNGUtils.generator(self.seed, *key)
+
+    @Profiler.timed()
+    def sample_blocks(
+        self,
+        num: int,
+        sample_block: Callable[[np.random.Generator, int, int], tuple],
+        stream: int = RNGStream.COMPONENTS,
+        ragged: bool = False,
+    ) -> list[np.ndarray] | list[RaggedArray]:
+        """
+        Sample `num` components in blocks of `block_size`.
+
+        `sample_block(rng, start, end)` samples components start..end-1 with the
+        generator `self.rng(stream, block)` and returns a tuple of arrays. Blocks are
+        independent of each other, and the arrays of all the blocks are
+        concatenated in order; with ragged=True they are returned as RaggedArray,
+        with a segment per block, so that ids local to the blocks can be offset
+        (see `ArrayUtils.block_ids`). With num_workers > 1 the blocks are sampled by
+        a process pool, giving the same result as a serial run.
+        """
+        blocks = RNGUtils.blocks(num, self.block_size)
+        rngs = [self.rng(stream, block) for block in range(len(blocks))]
+        starts = [start for start, _ in blocks]
+        ends = [end for _, end in blocks]
+        return self.run_blocks(sample_block, rngs, starts, ends, ragged=ragged)
+
+    @Profiler.timed()
+    def map_blocks(
+        self,
+        num: int,
+        map_block: Callable[[int, int], tuple],
+        ragged: bool = False,
+    ) -> list[np.ndarray] | list[RaggedArray]:
+        """
+        Same as `sample_blocks` for `map_block(start, end)`, which computes arrays of
+        components start..end-1 without drawing random numbers (e.g. their names).
+        """
+        blocks = RNGUtils.blocks(num, self.block_size)
+        starts = [start for start, _ in blocks]
+        ends = [end for _, end in blocks]
+        return self.run_blocks(map_block, starts, ends, ragged=ragged)
+
+    def run_blocks(
+        self, method: Callable[..., tuple], *args: list, ragged: bool = False
+    ) -> list[np.ndarray] | list[RaggedArray]:
+        """
+        Run `method(*block_args)` for the arguments of every block, in a process
+        pool with num_workers > 1, and concatenate the arrays of the blocks.
+        """
+        num_blocks = len(args[0])
+        if self.num_workers <= 1 or num_blocks <= 1:
+            results = list(map(method, *args))
+        else:
+            # Workers only need the parameters of the dataset, not its graph
+            exclude = ["store", "_graph", "_splits", "_layout"]
+            exclude += [key for key in self.__dict__ if key.startswith("explanation_")]
+            worker = self._worker_copy(exclude)
+            with ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                initializer=_init_worker,
+                initargs=(worker,),
+            ) as executor:
+                results = list(
+                    executor.map(
+                        _run_block,
+                        [method.__name__] * num_blocks,
+                        *args,
+                        chunksize=max(1, num_blocks // (4 * self.num_workers)),
+                    )
+                )
+        if not ragged:
+            return [np.concatenate(arrays) for arrays in zip(*results)]
+        return [
+            RaggedArray.from_lengths(
+                np.concatenate(arrays), np.array([len(a) for a in arrays])
+            )
+            for arrays in zip(*results)
+        ]
+
+    def _worker_copy(self, exclude: list[str]) -> SyntheticDataset:
+        """
+        Shallow copy of the dataset with the attributes `exclude` set to None, to be
+        sent to the workers of a process pool.
+        """
+        worker = type(self).__new__(type(self))
+        worker.__dict__.update(
+            {
+                key: None if key in exclude else value
+                for key, value in self.__dict__.items()
+            }
+        )
+        return worker
+
     @abstractmethod
     def get_explanation(self, head: str, relation: str, tail: str):
         pass
 
+    def entity_parts(self, name: str) -> tuple[str | None, tuple[int, ...]]:
+        """
+        Category and ids of an entity name (see `EntityNames.parse`). Entities of
+        the store are looked up in it (see `TripleStore.name_ids`) instead of
+        parsing their names.
+        """
+        store = self.store
+        if store is None:
+            return EntityNames.parse(name)
+        i = store.entity_id(name)
+        return store.category(i), tuple(store.name_ids[i].tolist())
+
+    def get_explanations(
+        self, heads: np.ndarray, rels: np.ndarray, tails: np.ndarray
+    ) -> RaggedArray:
+        """
+        Batch version of `get_explanation` over entity and relation ids of the store.
+
+        Returns a RaggedArray whose i-th segment is the (num_triples, 3) array of
+        (head, relation, tail) ids explaining the i-th input triple. This default
+        implementation calls `get_explanation` per triple; subclasses override it
+        with vectorized versions.
+        """
+        store = self.store
+        explanations = []
+        for h, r, t in zip(heads.tolist(), rels.tolist(), tails.tolist()):
+            flat = self.get_explanation(
+                store.entity_name(h), store.relation_name(r), store.entity_name(t)
+            )
+            explanations.append(
+                [
+                    (
+                        store.entity_id(flat[i]),
+                        store.relation_id(flat[i + 1]),
+                        store.entity_id(flat[i + 2]),
+                    )
+                    for i in range(0, len(flat), 3)
+                ]
+            )
+        return RaggedArray.from_list(explanations, shape=(3,))
+
+    def layout_ids(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Ids of the entities and relations of the store in the layout of
+        `Backend.NUMPY`. Subclasses whose vectorized `get_explanations` relies on
+        that layout derive them from the entity names (see `TripleStore.name_ids`),
+        together with the arrays describing the layout.
+        """
+        raise NotImplementedError
+
+    def explanations_in_layout(
+        self,
+        explain: Callable[[np.ndarray, np.ndarray, np.ndarray], RaggedArray],
+        heads: np.ndarray,
+        rels: np.ndarray,
+        tails: np.ndarray,
+    ) -> RaggedArray:
+        """
+        Run `explain`, a batch `get_explanations` over ids in the layout of
+        `Backend.NUMPY`, on ids of the store. Stores built by the other backends
+        are mapped to that layout and back with `layout_ids`, derived once.
+        """
+        if self.backend == Backend.NUMPY:
+            return explain(heads, rels, tails)
+        if getattr(self, "_layout", None) is None:
+            entity_ids, relation_ids = self.layout_ids()
+            store_entities = np.empty(len(entity_ids), dtype=np.int64)
+            store_entities[entity_ids] = np.arange(len(entity_ids))
+            store_relations = np.full(len(self.relation_list), -1, dtype=np.int64)
+            store_relations[relation_ids] = np.arange(len(relation_ids))
+            self._layout = (entity_ids, relation_ids, store_entities, store_relations)
+        entity_ids, relation_ids, store_entities, store_relations = self._layout
+
+        explanations = explain(entity_ids[heads], relation_ids[rels], entity_ids[tails])
+        values = explanations.values
+        values[:, 0] = store_entities[values[:, 0]]
+        values[:, 1] = store_relations[values[:, 1]]
+        values[:, 2] = store_entities[values[:, 2]]
+        return explanations
+
+    def create_explanation_index(self) -> RaggedArray:
+        """
+        Explanations of all the triples of the store as a RaggedArray of triple ids:
+        an entry e >= 0 is the triple e of the store and an entry ~e (e < 0) is the
+        triple e reversed, i.e. (tail, relation, head).
+
+        This default implementation matches the triples of `get_explanations` to
+        the triples of the store. Subclasses that know the triples explaining each
+        generated triple build the index directly.
+        """
+        store = self.store
+        heads, rels, tails = store.heads, store.rels, store.tails
+        explanations = self.get_explanations(heads, rels, tails)
+        h, r, t = explanations.values.T
+
+        # Triples of the store are unique (head, tail) pairs of a DiGraph
+        num = store.num_entities
+        keys = heads.astype(np.int64) * num + tails
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+
+        def find(h: np.ndarray, t: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+            query = h.astype(np.int64) * num + t
+            position = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+            triple = order[position]
+            return triple, (keys[position] == query) & (rels[triple] == r)
+
+        if len(h) == 0:
+            return RaggedArray(np.empty(0, dtype=np.int64), explanations.offsets)
+        triple, found = find(h, t)
+        reverse_triple, found_reverse = find(t, h)
+        if not np.all(found | found_reverse):
+            i = np.nonzero(~(found | found_reverse))[0][0]
+            raise ValueError(f"Triple ({h[i]}, {r[i]}, {t[i]}) is not in the store")
+        edges = np.where(found, triple, ~reverse_triple).astype(np.int64)
+        return RaggedArray(edges, explanations.offsets)
+
+    @staticmethod
+    def indexed_explanations(
+        triples: list[tuple[str, str, str]], index: RaggedArray, start: int, end: int
+    ) -> list[tuple[str, ...]]:
+        """
+        Flat name tuples explaining triples start..end-1 of `triples`, given their
+        explanation index (see `create_explanation_index`) over `triples`.
+        """
+        edges = index.values[index.offsets[start] : index.offsets[end]].tolist()
+        rows = [triples[e] if e >= 0 else triples[~e][::-1] for e in edges]
+        explanations = []
+        position = 0
+        for length in index.lengths[start:end].tolist():
+            segment = rows[position : position + length]
+            explanations.append(tuple(x for row in segment for x in row))
+            position += length
+        return explanations
+
+    def build_explanation_index(self) -> None:
+        """
+        Compute the explanation index (see `create_explanation_index`). It is kept
+        as the `explanation_edges` and `explanation_offsets` arrays, so it is saved
+        and memory-mapped with the rest of the dataset.
+        """
+        with self.profiler.phase("explanation_index", num_edges=len(self.store)):
+            index = self.create_explanation_index()
+        self.explanation_edges = index.values
+        self.explanation_offsets = index.offsets
+
+    @property
+    def explanation_index(self) -> RaggedArray | None:
+        if getattr(self, "explanation_edges", None) is None:
+            return None
+        return RaggedArray(self.explanation_edges, self.explanation_offsets)
+
+    def explanation_ids(self, idx: np.ndarray) -> RaggedArray:
+        """
+        Explanations of the triples with ids `idx`, as returned by `get_explanations`.
+        With an explanation index they are gathered from the store.
+        """
+        store = self.store
+        index = self.explanation_index
+        if index is None:
+            return self.get_explanations(
+                store.heads[idx], store.rels[idx], store.tails[idx]
+            )
+
+        explanations = index.take(idx)
+        edges = explanations.values
+        reverse = edges < 0
+        edges = np.where(reverse, ~edges, edges)
+        heads, tails = store.heads[edges], store.tails[edges]
+        values = np.stack(
+            [
+                np.where(reverse, tails, heads),
+                store.rels[edges],
+                np.where(reverse, heads, tails),
+            ],
+            axis=1,
+        ).astype(np.int64)
+        return RaggedArray(values, explanations.offsets)
+
+    def score_explanations(
+        self,
+        predicted: RaggedArray,
+        idx: np.ndarray,
+        include_target: bool = False,
+        **kwargs,
+    ) -> dict[str, float]:
+        """
+        Mean precision, recall, F1 and Jaccard of the predicted explanations of the
+        triples with ids `idx` against their ground truth (see `ExplanationScorer`,
+        which also takes the keyword arguments). The explained triple itself, the
+        first of every ground-truth explanation, is left out of the ground truth
+        unless include_target=True.
+        """
+        truth = self.explanation_ids(idx)
+        if not include_target:
+            keep = np.ones(len(truth.values), dtype=bool)
+            keep[truth.offsets[:-1]] = False
+            truth = RaggedArray.from_lengths(truth.values[keep], truth.lengths - 1)
+        return ExplanationScorer(self.store).evaluate(predicted, truth, **kwargs)
+
+    def explanation_names(self, explanations: RaggedArray) -> list[tuple[str, ...]]:
+        """
+        Convert explanations of ids into the flat name tuples of `get_explanation`.
+        """
+        names = self.store.entities
+        relations = self.store.relations
+        return [
+            tuple(x for h, r, t in segment for x in (names[h], relations[r], names[t]))
+            for segment in explanations.tolist()
+        ]
+
     @classmethod
-    def load_explanation(cls, file_path: str, as_dict: bool = False):
+    def load_explanation(
+        cls,
+        file_path: str,
+        as_dict: bool = False,
+        lazy: bool = False,
+        cache_index: bool = True,
+    ):
+        """
+        Load the explanations saved by `save_triples`, as a list of explanations or
+        as a dict from the explained triple to the rest of its explanation.
+
+        With lazy=True the file is not read: an ExplanationReader (or its dict-like
+        view if as_dict=True) is returned, which memory-maps the file and reads
+        explanations on access. cache_index is passed to the reader. Close it with
+        `close()`, or use it in a `with` block, to release the file.
+        """
+        if lazy:
+            reader = ExplanationReader(file_path, cache_index=cache_index)
+            return reader.as_dict() if as_dict else reader
+
         if as_dict:
             explanations = {}
         else:
@@ -66,14 +644,82 @@ class SyntheticDataset(ABC):
         return explanations
 
     @classmethod
-    def load(cls, folder_hash: str):
+    def load(cls, folder_hash: str, mmap_mode: str | None = "r", num_workers: int = 1):
+        """
+        Load a dataset saved with `save`. The arrays of the dataset, its TripleStore
+        and its splits are memory-mapped with `mmap_mode`, so no data is read until
+        it is accessed. As with a cached dataset, `num_workers` is not restored
+        but given by the caller, so that e.g. reading the entity names of the
+        store does not start a process pool unless asked to.
+
+        Folders in the former pickle format are also supported: the pickled
+        dataset is upgraded with `upgrade_legacy`. As with pickles, the dataset
+        class can be any subclass of `cls`, e.g. `SyntheticDataset.load(folder)`.
+        """
         filename_obj = os.path.join(folder_hash, "dataset.pkl")
-        with open(filename_obj, "rb") as file:
-            my_obj = pickle.load(file)
+        if os.path.exists(filename_obj):
+            with open(filename_obj, "rb") as file:
+                my_obj = pickle.load(file)
+
+            assert isinstance(my_obj, cls)
+            if "graph" in my_obj.__dict__:
+                my_obj.upgrade_legacy()
+            my_obj.num_workers = num_workers
+            return my_obj
+
+        state = IOUtils.yaml_to_dict(os.path.join(folder_hash, "state.yaml"))
+        my_cls = cls.subclass(state.pop("class"))
 
-        assert isinstance(my_obj, cls)
+        my_obj = my_cls.__new__(my_cls)
+        pickled = state.pop("pickled", {})
+        my_obj.__dict__.update(state)
+        my_obj.__dict__.update(
+            {key: pickle.loads(value) for key, value in pickled.items()}
+        )
+        my_obj.num_workers = num_workers
+        my_obj.__dict__.update(
+            IOUtils.folder_to_arrays(os.path.join(folder_hash, "arrays"), mmap_mode)
+        )
+        my_obj._graph = None
+        splits = IOUtils.folder_to_arrays(
+            os.path.join(folder_hash, "splits"), mmap_mode
+        )
+        my_obj._splits = {
+            name: splits[name] for name in ["train", "valid", "test"] if name in splits
+        } or None
+        my_obj.store = TripleStore.load(
+            os.path.join(folder_hash, "store"),
+            entities=getattr(my_obj, "node_names", None),
+            mmap_mode=mmap_mode,
+        )
         return my_obj
 
+    @classmethod
+    def subclass(cls, name: str) -> type[SyntheticDataset]:
+        """
+        The class named `name` among `cls` and its subclasses.
+        """
+        classes = [cls]
+        while classes:
+            subclass = classes.pop()
+            if subclass.__name__ == name:
+                return subclass
+            classes.extend(subclass.__subclasses__())
+        raise TypeError(f"{name} is not a subclass of {cls.__name__}")
+
+    def upgrade_legacy(self) -> None:
+        """
+        Upgrade a dataset pickled by former versions, which kept the networkx graph
+        in the `graph` attribute, to a `Backend.NETWORKX` dataset. Subclasses
+        restore the attributes that former versions did not have.
+        """
+        graph = self.__dict__.pop("graph")
+        self.backend = Backend.NETWORKX
+        self.num_workers = 1
+        self._graph = graph
+        self._splits = None
+        self.store = TripleStore.from_networkx(graph)
+
     @abstractmethod
     def _id_str(self):
         pass
@@ -83,6 +729,11 @@ class SyntheticDataset(ABC):
             "percentages": self.percentages,
             "seed": self.seed,
         }
+        # Only set when used, so that the hashes of existing datasets do not change
+        if self.transductive:
+            id_attributes["transductive"] = True
+        if self.stratify:
+            id_attributes["stratify"] = True
 
         id_attributes.update(self._id_str())
 
@@ -111,6 +762,12 @@ class SyntheticDataset(ABC):
         """
         Save the dataset to a folder
 
+        The dataset is stored in a columnar format that `load` can memory-map:
+        `parameters.yaml` with the dataset parameters, `state.yaml` with the rest of
+        the scalar attributes, one .npy file per array attribute in `arrays`, the
+        TripleStore in `store` and the split indices in `splits`. Attributes of other
+        types are pickled into `state.yaml`.
+
         Parameters
         ----------
         root : str
@@ -121,6 +778,9 @@ class SyntheticDataset(ABC):
         None
         """
 
+        assert (
+            self.store is not None
+        ), "Datasets with Backend.STREAM are saved with save_triples"
         my_hash = self.get_hash()
 
         folder = os.path.join(root, my_hash)
@@ -129,12 +789,83 @@ class SyntheticDataset(ABC):
         IOUtils.makedirs(folder)
 
         filename_id = os.path.join(folder, "parameters.yaml")
-        filename_object = os.path.join(folder, "dataset.pkl")
         logging.info(f"Saving dataset to {folder}")
+        # A pickle of a former version would take precedence in `load`
+        filename_obj = os.path.join(folder, "dataset.pkl")
+        if os.path.exists(filename_obj):
+            os.remove(filename_obj)
         # Save the dataset parameters
         IOUtils.dict_to_yaml(self.__id_str(as_dict=True), filename_id)
+
         # Save the dataset object
-        IOUtils.object_to_pickle(self, filename_object)
+        state = {"class": type(self).__name__}
+        arrays = {}
+        for key, value in self.__dict__.items():
+            if key in ["store", "_graph", "_splits", "_profiler", "_layout"]:
+                continue
+            if isinstance(value, np.ndarray):
+                arrays[key] = value
+            elif isinstance(value, np.generic):
+                state[key] = value.item()
+            elif value is None or isinstance(value, (bool, int, float, str, list)):
+                state[key] = value
+            else:
+                # Other attributes of subclasses are pickled, as in former versions
+                state.setdefault("pickled", {})[key] = pickle.dumps(value)
+        with self.profiler.phase("save", folder=folder, num_edges=len(self.store)):
+            IOUtils.dict_to_yaml(state, os.path.join(folder, "state.yaml"))
+            IOUtils.arrays_to_folder(arrays, os.path.join(folder, "arrays"))
+            self.store.save(os.path.join(folder, "store"))
+            self.save_splits(folder)
+
+    def save_splits(self, folder: str) -> None:
+        """
+        Save only the split indices (see `get_splits`) of a dataset saved in `folder`.
+        """
+        IOUtils.arrays_to_folder(self.get_splits(), os.path.join(folder, "splits"))
+
+    def get_splits(self) -> dict[str, np.ndarray]:
+        """
+        Triple ids of every split, created on first use by `SplitUtils.split` with
+        the `transductive` and `stratify` options of the dataset.
+        """
+        if self._splits is None:
+            store = self.store
+            with self.profiler.phase("splits", num_edges=len(store)) as counts:
+                splits = SplitUtils.split(
+                    store.heads,
+                    store.rels,
+                    store.tails,
+                    self.percentages,
+                    self.rng(RNGStream.SPLITS),
+                    transductive=self.transductive,
+                    stratify=self.stratify,
+                )
+                self._splits = dict(zip(self.split_names(), splits))
+                for name, idx in self._splits.items():
+                    counts[f"num_{name}"] = len(idx)
+        return self._splits
+
+    def evaluate_ranking(
+        self,
+        score_fn: ScoreFn | None = None,
+        scores: dict[str, np.ndarray] | None = None,
+        split: str = "test",
+        **kwargs,
+    ) -> dict:
+        """
+        Filtered ranking metrics (MR, MRR, Hits@k) of a link predictor on a split,
+        filtering the triples of all the splits. See `RankingEvaluator` for the
+        scores and the keyword arguments.
+        """
+        assert self.store is not None, "Evaluate Backend.STREAM datasets from files"
+        evaluator = RankingEvaluator(self.store, **kwargs)
+        return evaluator.evaluate(self.get_splits()[split], score_fn, scores)
+
+    def split_names(self) -> list[str]:
+        if len(self.percentages) == 2:
+            return ["train", "test"]
+        return ["train", "valid", "test"][: len(self.percentages)]
 
     def save_triples(
         self,
@@ -142,7 +873,22 @@ class SyntheticDataset(ABC):
         only_train=False,
         use_hash=True,
         save_random_test_triples=0,
+        chunk_size=100_000,
+        num_workers=1,
+        num_negatives=0,
+        typed_negatives=True,
     ):
+        """
+        Save the train/valid/test splits of the triples and their explanations.
+
+        The splits are given by `get_splits`, which splits the triple ids of the
+        store without leaving any triple out. Every split is written in chunks of
+        `chunk_size` triples, as are the node categories, so memory usage is
+        bounded by the chunk size rather than by the size of the graph.
+        Explanations are computed by `num_workers` processes (see
+        `compute_explanations`). With num_negatives > 0, fixed negatives are
+        also written for every split (see `save_negatives`).
+        """
         id_str = self.__id_str()
 
         hash_object = hashlib.new("sha256")
@@ -155,63 +901,287 @@ class SyntheticDataset(ABC):
             folder = root
 
         IOUtils.makedirs(folder)
-        # Convert DiGraph to a list of triples
-        triples = []
-        explanations = []
-        for u, v, attrs in self.graph.edges(data=True):
-            relation = attrs["relation"]
-            assert isinstance(relation, str)
-            triples.append((u, relation, v))
-            explanation = self.get_explanation(u, relation, v)
-            explanations.append(explanation)
-
-        idx_list = list(range(len(triples)))
-        random.shuffle(idx_list)
-        triples = [triples[i] for i in idx_list]
-        explanations = [explanations[i] for i in idx_list]
-        total_elements = len(triples)
-        splits = [int(p * total_elements) for p in self.percentages]
 
-        if len(self.percentages) == 2:
-            names = ["train", "test"]
-        else:
-            names = ["train", "valid", "test"]
+        if self.store is None:
+            with self.profiler.phase("save_triples_stream", folder=folder) as counts:
+                counts["num_edges"] = self._save_triples_stream(
+                    folder, only_train, save_random_test_triples, chunk_size
+                )
+            if num_negatives > 0:
+                self.save_negatives(
+                    folder, num_negatives, typed_negatives, only_train, chunk_size
+                )
+            return
 
-        start = 0
-        for i, split in enumerate(splits):
-            end = start + split
-            if only_train:
-                triples_i = triples
-                explanations_i = explanations
-            else:
-                triples_i = triples[start:end]
-                explanations_i = explanations[start:end]
-            start = end
+        splits = self.get_splits()
+        permutation = np.concatenate(list(splits.values()))
 
-            # Save triples to a TSV file
-            path = os.path.join(folder, f"{names[i]}.txt")
-            path_explanations = os.path.join(folder, f"{names[i]}_explanations.txt")
+        with ExitStack() as stack:
+            # A single pool computes the explanations of all the splits
+            executor = None
+            if num_workers > 1:
+                executor = stack.enter_context(self.explanation_pool(num_workers))
+            for name, idx in splits.items():
+                if only_train:
+                    idx_i = permutation
+                else:
+                    idx_i = idx
+
+                # Save triples to a TSV file
+                path = os.path.join(folder, f"{name}.txt")
+                path_explanations = os.path.join(folder, f"{name}_explanations.txt")
 
-            IOUtils.list_to_txt(triples_i, path)
-            IOUtils.list_to_txt(explanations_i, path_explanations, as_string=True)
+                self._write_split(idx_i, path, path_explanations, chunk_size, executor)
 
         if save_random_test_triples > 0:
-            n = len(triples_i)
+            n = len(idx_i)
             assert (
                 save_random_test_triples <= n
             ), f"save_random_test_triples={save_random_test_triples} > n={n}"
-            random_indices = random.sample(range(n), save_random_test_triples)
+            random_indices = self.rng(RNGStream.SAMPLES).choice(
+                n, save_random_test_triples, replace=False
+            )
 
-            triples_rnd = [triples_i[i] for i in random_indices]
+            triples_rnd = list(self.store.iter_triples(idx_i[random_indices]))
             path = os.path.join(folder, f"test_random_{save_random_test_triples}.txt")
 
             IOUtils.list_to_txt(triples_rnd, path)
 
-        # Save category of nodes as a dictionary
+        # Save category of nodes as a dictionary, in chunks as the stream backend
+        store = self.store
+        with IOUtils.open_txt(os.path.join(folder, "node_category.yaml")) as f:
+            for start in range(0, store.num_entities, chunk_size):
+                names = store.entities[start : start + chunk_size]
+                categories = store.categories[start : start + chunk_size].tolist()
+                IOUtils.write_rows(
+                    f,
+                    zip(names, [store.category_list[c] for c in categories]),
+                    delimiter=": ",
+                )
+
+        if num_negatives > 0:
+            self.save_negatives(
+                folder, num_negatives, typed_negatives, only_train, chunk_size
+            )
+
+    def save_negatives(
+        self,
+        folder: str,
+        num_negatives: int,
+        typed: bool = True,
+        only_train: bool = False,
+        chunk_size: int = 100_000,
+    ) -> None:
+        """
+        Write `num_negatives` filtered negatives per triple of every split saved by
+        `save_triples` in `folder`, to `<split>_negatives.txt` (see
+        `NegativeSampler`). Known triples are those of all the splits. With
+        `Backend.STREAM` they are read back from the split files into an in-memory
+        TripleStore, so unlike the rest of the stream backend this step needs the
+        whole graph to fit in memory.
+        """
+        if self.store is None:
+            sampler, splits = NegativeSampler.from_folder(folder, seed=self.seed)
+        else:
+            sampler = NegativeSampler(self.store, seed=self.seed)
+            splits = self.get_splits()
+            if only_train:
+                permutation = np.concatenate(list(splits.values()))
+                splits = {name: permutation for name in splits}
+
+        num_edges = sum(len(idx) for idx in splits.values())
+        with self.profiler.phase("negatives", folder=folder, num_edges=num_edges):
+            sampler.save(
+                folder, splits, num_negatives, typed=typed, chunk_size=chunk_size
+            )
+
+    def _save_triples_stream(
+        self,
+        folder: str,
+        only_train: bool,
+        save_random_test_triples: int,
+        chunk_size: int,
+    ) -> int:
+        """
+        Single pass version of `save_triples` for `Backend.STREAM`. Returns the
+        number of generated triples.
+
+        Blocks are written as they are generated. Every triple is assigned to a
+        split at random with the split percentages as probabilities, so the split
+        sizes are only approximately those of `get_splits`. The random test triples
+        are the ones with the smallest random keys (bottom-k sampling).
+        """
+        names = self.split_names()
+        rng = self.rng(RNGStream.SPLITS)
+        rng_samples = self.rng(RNGStream.SAMPLES)
+        sample, sample_keys = [], np.empty(0)
+        num_triples = 0
+
+        with ExitStack() as stack:
+            f_category = stack.enter_context(
+                IOUtils.open_txt(os.path.join(folder, "node_category.yaml"))
+            )
+            files = [
+                (
+                    stack.enter_context(
+                        IOUtils.open_txt(os.path.join(folder, f"{name}.txt"))
+                    ),
+                    stack.enter_context(
+                        IOUtils.open_txt(
+                            os.path.join(folder, f"{name}_explanations.txt")
+                        )
+                    ),
+                )
+                for name in names
+            ]
+            for block in self.iter_blocks():
+                IOUtils.write_rows(
+                    f_category, zip(block.nodes, block.categories), delimiter=": "
+                )
+                num_triples += len(block.triples)
+                for start in range(0, len(block.triples), chunk_size):
+                    chunk = block.triples[start : start + chunk_size]
+                    if block.explain is not None:
+                        explanations = block.explain(start, start + len(chunk))
+                    else:
+                        explanations = [self.get_explanation(*t) for t in chunk]
+                    split = rng.choice(len(names), size=len(chunk), p=self.percentages)
+                    for i, (f, f_explanations) in enumerate(files):
+                        if only_train:
+                            idx = range(len(chunk))
+                        else:
+                            idx = np.nonzero(split == i)[0].tolist()
+                        IOUtils.write_rows(f, (chunk[j] for j in idx))
+                        IOUtils.write_rows(
+                            f_explanations,
+                            (explanations[j] for j in idx),
+                            delimiter=",",
+                        )
+
+                    # Random test triples are sampled from the last split
+                    if save_random_test_triples > 0:
+                        sample.extend(chunk[j] for j in idx)
+                        sample_keys = np.concatenate(
+                            [sample_keys, rng_samples.random(len(idx))]
+                        )
+                        keep = np.argsort(sample_keys)[:save_random_test_triples]
+                        sample = [sample[j] for j in keep]
+                        sample_keys = sample_keys[keep]
+
+        if save_random_test_triples > 0:
+            n = len(sample)
+            assert (
+                save_random_test_triples <= n
+            ), f"save_random_test_triples={save_random_test_triples} > n={n}"
+            path = os.path.join(folder, f"test_random_{save_random_test_triples}.txt")
+            IOUtils.list_to_txt(sample, path)
+        return num_triples
+
+    def _write_split(
+        self,
+        idx: np.ndarray,
+        path: str,
+        path_explanations: str,
+        chunk_size: int,
+        executor: ProcessPoolExecutor | None,
+    ) -> None:
+        profiler = self.profiler
+        with profiler.phase("write_triples", file=path, num_edges=len(idx)):
+            with IOUtils.open_txt(path) as f:
+                for chunk_start in range(0, len(idx), chunk_size):
+                    chunk = idx[chunk_start : chunk_start + chunk_size]
+                    IOUtils.write_rows(f, self.store.iter_triples(chunk))
+
+        with profiler.phase("explanations", file=path_explanations, num_edges=len(idx)):
+            self.compute_explanations(
+                idx, path_explanations, chunk_size=chunk_size, executor=executor
+            )
+
+    def explanation_pool(self, num_workers: int) -> ProcessPoolExecutor:
+        """
+        Process pool computing explanations for `compute_explanations`. Every
+        worker gets a copy of the dataset without its networkx graph.
+        """
+        return ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_worker,
+            initargs=(self._worker_copy(["_graph"]),),
+        )
+
+    def compute_explanations(
+        self,
+        idx: np.ndarray | None = None,
+        path: str | None = None,
+        num_workers: int = 1,
+        chunk_size: int = 100_000,
+        executor: ProcessPoolExecutor | None = None,
+    ) -> list[tuple[str, ...]] | None:
+        """
+        Compute the explanations of the triples with ids `idx` (all by default).
+
+        The ids are sharded in chunks of `chunk_size`. With num_workers > 1 the
+        shards are processed by a process pool, or by `executor` if given (see
+        `explanation_pool`), so that calls can share a pool; every shard is written
+        to its own file and the files are concatenated in shard order, so the
+        output is identical regardless of the number of workers.
+
+        Returns the list of explanations if `path` is None, otherwise writes them to
+        `path` (one comma-separated explanation per line) and returns None.
+        """
+        if idx is None:
+            idx = np.arange(len(self.store))
+        shards = [idx[i : i + chunk_size] for i in range(0, len(idx), chunk_size)]
+
+        if executor is None and num_workers <= 1:
+            if path is None:
+                return _explanations_of(self, idx)
+            with IOUtils.open_txt(path) as f:
+                for shard in shards:
+                    IOUtils.write_rows(f, _explanations_of(self, shard), delimiter=",")
+            return None
+
+        with ExitStack() as stack:
+            if executor is None:
+                executor = stack.enter_context(self.explanation_pool(num_workers))
+            if path is None:
+                explanations = []
+                for shard_explanations in executor.map(_explanations_shard, shards):
+                    explanations.extend(shard_explanations)
+                return explanations
+
+            shard_paths = [f"{path}.part{i}" for i in range(len(shards))]
+            list(executor.map(_explanations_shard, shards, shard_paths))
+
+        with IOUtils.open_txt(path) as f:
+            for shard_path in shard_paths:
+                with open(shard_path, "r") as f_shard:
+                    shutil.copyfileobj(f_shard, f)
+                os.remove(shard_path)
+        return None
+
+
+def _explanations_of(
+    dataset: SyntheticDataset, idx: np.ndarray
+) -> list[tuple[str, ...]]:
+    return dataset.explanation_names(dataset.explanation_ids(idx))
+
+
+_worker_dataset: SyntheticDataset | None = None
+
+
+def _init_worker(dataset: SyntheticDataset) -> None:
+    global _worker_dataset
+    _worker_dataset = dataset
+
+
+def _explanations_shard(idx: np.ndarray, path: str | None = None):
+    explanations = _explanations_of(_worker_dataset, idx)
+    if path is None:
+        return explanations
+    with open(path, "w") as f:
+        IOUtils.write_rows(f, explanations, delimiter=",")
+    return path
 
-        path = os.path.join(folder, "node_category.yaml")
-        category_dict = {
-            n: attrs.get("category") for n, attrs in self.graph.nodes(data=True)
-        }
 
-        IOUtils.dict_to_yaml(category_dict, path)
+def _run_block(name: str, *args):
+    return getattr(_worker_dataset, name)(*args)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+class ArrayUtils:
+    triple_dtype = np.dtype([("head", np.int64), ("rel", np.int64), ("tail", np.int64)])
+
+    @staticmethod
+    def triple_keys(
+        heads: np.ndarray,
+        rels: np.ndarray,
+        tails: np.ndarray,
+        num_entities: int,
+        num_relations: int,
+    ) -> np.ndarray:
+        """
+        Sortable key of every (head, relation, tail) triple of ids: the int64
+        (head * num_relations + rel) * num_entities + tail, or a `triple_dtype`
+        record when num_entities**2 * num_relations does not fit in an int64.
+        """
+        num_relations = max(int(num_relations), 1)
+        if int(num_entities) ** 2 * num_relations > np.iinfo(np.int64).max:
+            keys = np.empty(len(heads), dtype=ArrayUtils.triple_dtype)
+            keys["head"], keys["rel"], keys["tail"] = heads, rels, tails
+            return keys
+        heads = np.asarray(heads, dtype=np.int64)
+        return (heads * num_relations + rels) * num_entities + tails
+
+    @staticmethod
+    def copy_writeable(array: np.ndarray) -> np.ndarray:
+        """
+        Copy of a writeable array; read-only arrays (e.g. memory-mapped with
+        mmap_mode="r") cannot be modified, so they are returned as is.
+        """
+        return array.copy() if array.flags.writeable else array
+
+    @staticmethod
+    def offsets(counts: np.ndarray) -> np.ndarray:
+        """
+        Convert an array of counts into an array of offsets of length len(counts) + 1,
+        such that the i-th segment spans offsets[i]:offsets[i + 1].
+        """
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return offsets
+
+    @staticmethod
+    def ragged_arange(counts: np.ndarray) -> np.ndarray:
+        """
+        Concatenation of np.arange(c) for every c in counts, without a Python loop.
+
+        Example: counts=[2, 0, 3] -> [0, 1, 0, 1, 2]
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        total = int(counts.sum())
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        return np.arange(total, dtype=np.int64) - starts
+
+    @staticmethod
+    def block_ids(
+        ids: np.ndarray, lengths: np.ndarray, counts: np.ndarray
+    ) -> np.ndarray:
+        """
+        Global ids of ids local to blocks. Block b holds counts[b, c] nodes of
+        category c, laid out category by category, and ids[i] is local to the block
+        of its segment (ids are delimited by ArrayUtils.offsets(lengths)). Globally,
+        nodes are laid out category by category and, in a category, block by block.
+
+        Example: counts=[[1, 2], [1, 1]] lays out the nodes of block 0 as [0 | 1, 2]
+        and of block 1 as [0 | 1], and the global ids are [0, 2, 3 | 1, 4].
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        block = np.repeat(np.arange(len(counts)), lengths)
+        local_start = np.cumsum(counts, axis=1) - counts
+        category_start = np.cumsum(counts.sum(axis=0)) - counts.sum(axis=0)
+        global_start = np.cumsum(counts, axis=0) - counts + category_start
+        category = (ids[:, None] >= local_start[block, 1:]).sum(axis=1)
+        return ids + (global_start - local_start)[block, category]
+
+    @staticmethod
+    def contains_sorted(sorted_values: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        Boolean mask of the values found in the sorted array `sorted_values`, with a
+        binary search per value instead of a hash set.
+        """
+        values = np.asarray(values)
+        if len(sorted_values) == 0:
+            return np.zeros(values.shape, dtype=bool)
+        position = np.searchsorted(sorted_values, values)
+        position = np.minimum(position, len(sorted_values) - 1)
+        return sorted_values[position] == values
+
+    @staticmethod
+    def sample_without_replacement(
+        population: np.ndarray, counts: np.ndarray, random=np.random
+    ) -> np.ndarray:
+        """
+        For every row i, sample counts[i] distinct integers from range(population[i]).
+
+        Rows are sampled simultaneously with a vectorized version of Floyd's
+        algorithm, so the Python loop only runs max(counts) times. The samples are
+        returned as a flat array, row by row, delimited by ArrayUtils.offsets(counts).
+        """
+        population = np.asarray(population, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        assert np.all(counts <= population)
+
+        n_max = int(counts.max()) if len(counts) > 0 else 0
+        chosen = np.full((len(counts), n_max), -1, dtype=np.int64)
+        for step in range(n_max):
+            rows = np.nonzero(counts > step)[0]
+            j = population[rows] - counts[rows] + step
+            t = (random.random(len(rows)) * (j + 1)).astype(np.int64)
+            taken = (chosen[rows, :step] == t[:, None]).any(axis=1)
+            chosen[rows, step] = np.where(taken, j, t)
+
+        return chosen[np.arange(n_max) < counts[:, None]]
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+import numpy as np
+
+from synthetic_knowledge_graphs.core.entities.ragged_array import RaggedArray
+
+
+class EntityNames:
+    """
+    Entity names of the form `<category>-<id>-<id>...`, e.g. `fr-3-1-0` for friend 0
+    of student 1 of university 3.
+
+    Names are only formatted from integer ids when they are exported; `parse` is the
+    reverse mapping, from a name to its category and ids. It is not cached: names
+    of a TripleStore are parsed once in bulk with `parse_ids` (see
+    `TripleStore.name_ids`).
+    """
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def formatter(category: str, num_ids: int):
+        return "-".join([category] + ["{}"] * num_ids).format
+
+    @staticmethod
+    def name(category: str, *ids: int) -> str:
+        return EntityNames.formatter(category, len(ids))(*ids)
+
+    @staticmethod
+    def format(category: str, *ids: np.ndarray) -> list[str]:
+        """
+        Names of the entities of a category whose i-th entity has ids
+        (ids[0][i], ids[1][i], ...). Scalars are broadcast.
+        """
+        ids = np.broadcast_arrays(*[np.asarray(i) for i in ids])
+        return list(
+            map(EntityNames.formatter(category, len(ids)), *[i.tolist() for i in ids])
+        )
+
+    @staticmethod
+    def parse(name: str) -> tuple[str, tuple[int, ...]]:
+        """
+        Category and ids of a name, e.g. `fr-3-1-0` -> ("fr", (3, 1, 0)).
+        """
+        category, *ids = name.split("-")
+        return category, tuple(map(int, ids))
+
+    @staticmethod
+    def parse_ids(names: list[str]) -> RaggedArray:
+        """
+        Ids of every name as a RaggedArray, e.g. ["uni-3", "fr-3-1-0"] gives the
+        segments [3] and [3, 1, 0]. The ids of all the names are converted at once.
+        """
+        ids = [name.partition("-")[2] for name in names]
+        lengths = [i.count("-") + 1 if i else 0 for i in ids]
+        values = "-".join(i for i in ids if i).split("-") if any(lengths) else []
+        return RaggedArray.from_lengths(np.array(values, dtype=np.int64), lengths)
+
+    @staticmethod
+    def category(name: str) -> str:
+        return EntityNames.parse(name)[0]
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+from collections.abc import Callable, Mapping, Sequence
+
+import numpy as np
+
+
+class ExplanationReader(Sequence):
+    """
+    Random access reader for `*_explanations.txt` files.
+
+    The file is memory-mapped and indexed by the byte offset of every line, so
+    reading an explanation only touches its own line. The line-offset index is
+    computed with numpy and cached next to the file as `<file>.idx.npy`. If the
+    folder is not writable (e.g. a read-only dataset mount) the index is only kept
+    in memory.
+
+    Every item is an explanation in the format of
+    `SyntheticDataset.load_explanation`: a list of (head, relation, tail) tuples.
+
+    Args:
+        file_path (str): Path of the explanations file.
+
+        cache_index (bool, optional): Whether to save/reuse the line-offset index
+            and the key index of `as_dict`. Defaults to True.
+    """
+
+    def __init__(self, file_path: str, cache_index: bool = True):
+        self.file_path = file_path
+        self.cache_index = cache_index
+        self._file = open(file_path, "rb")
+        if os.path.getsize(file_path) > 0:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._data = b""
+        self.offsets = self.cached_index("idx", self._line_offsets)
+
+    def cached_index(self, name: str, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Array `compute()`, cached as `<file>.<name>.npy` if cache_index is set and
+        the folder is writable.
+        """
+        index_path = f"{self.file_path}.{name}.npy"
+        if (
+            self.cache_index
+            and os.path.exists(index_path)
+            and os.path.getmtime(index_path) >= os.path.getmtime(self.file_path)
+        ):
+            return np.load(index_path, mmap_mode="r")
+
+        index = compute()
+        if self.cache_index:
+            try:
+                np.save(index_path, index)
+            except OSError:
+                pass
+        return index
+
+    def _line_offsets(self) -> np.ndarray:
+        data = np.frombuffer(self._data, dtype=np.uint8)
+        ends = np.flatnonzero(data == ord("\n")) + 1
+        if len(data) > 0 and data[-1] != ord("\n"):
+            ends = np.append(ends, len(data))
+        return np.concatenate([[0], ends]).astype(np.int64)
+
+    def close(self) -> None:
+        """
+        Release the memory map and the file handle. The reader can also be used as
+        a context manager, which closes it on exit.
+        """
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self) -> ExplanationReader:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def line(self, i: int) -> str:
+        return self._data[self.offsets[i] : self.offsets[i + 1]].decode().strip()
+
+    def __getitem__(self, i: int) -> list[tuple[str, str, str]]:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Explanation {i} out of range")
+        explanation_flat = self.line(i).split(",")
+        return [
+            tuple(explanation_flat[j : j + 3])
+            for j in range(0, len(explanation_flat), 3)
+        ]
+
+    def take(self, idx: np.ndarray) -> list[list[tuple[str, str, str]]]:
+        return [self[i] for i in np.asarray(idx).tolist()]
+
+    def as_dict(self) -> ExplanationDict:
+        return ExplanationDict(self)
+
+
+class ExplanationDict(Mapping):
+    """
+    Read-only dict-like view of an ExplanationReader, mapping the explained triple
+    to the rest of its explanation (the `as_dict=True` format of
+    `SyntheticDataset.load_explanation`).
+
+    The key index holds the sorted int64 hashes of the keys of all the lines and
+    their line numbers. It is built on first lookup by hashing every line in a
+    Python loop, which reads the whole file once, and cached next to the file as
+    `<file>.keys.npy` like the line-offset index, so other processes and later
+    runs reuse it.
+
+    Closing the view (or using it as a context manager) closes its reader.
+    """
+
+    def __init__(self, reader: ExplanationReader):
+        self.reader = reader
+        self._hashes: np.ndarray | None = None
+        self._order: np.ndarray | None = None
+
+    def close(self) -> None:
+        self.reader.close()
+
+    def __enter__(self) -> ExplanationDict:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @staticmethod
+    def key_hash(key: str) -> int:
+        # Stable across processes, unlike hash()
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little", signed=True)
+
+    def _key(self, i: int) -> tuple[str, str, str]:
+        return tuple(self.reader.line(i).split(",", 3)[:3])
+
+    def _key_index(self) -> np.ndarray:
+        hashes = np.fromiter(
+            (self.key_hash(",".join(self._key(i))) for i in range(len(self.reader))),
+            dtype=np.int64,
+            count=len(self.reader),
+        )
+        order = np.argsort(hashes, kind="stable")
+        return np.stack([hashes[order], order])
+
+    def __getitem__(self, key: tuple[str, str, str]) -> list[tuple[str, str, str]]:
+        if self._hashes is None:
+            self._hashes, self._order = self.reader.cached_index(
+                "keys", self._key_index
+            )
+        key = tuple(key)
+        h = self.key_hash(",".join(key))
+        start = np.searchsorted(self._hashes, h, side="left")
+        end = np.searchsorted(self._hashes, h, side="right")
+        # The last line with the key wins, as in a dict built line by line
+        for i in sorted(self._order[start:end].tolist(), reverse=True):
+            if self._key(i) == key:
+                return self.reader[i][1:]
+        raise KeyError(key)
+
+    def __iter__(self):
+        for i in range(len(self.reader)):
+            yield self._key(i)
+
+    def __len__(self) -> int:
+        return len(self.reader)
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from synthetic_knowledge_graphs.core.entities.array_utils import ArrayUtils
+from synthetic_knowledge_graphs.core.entities.ragged_array import RaggedArray
+from synthetic_knowledge_graphs.core.entities.triple_store import TripleStore
+
+
+class ExplanationScorer:
+    """
+    Faithfulness of predicted explanations with respect to ground-truth ones.
+
+    Explanations are RaggedArrays whose i-th segment is the (num_triples, 3) array
+    of (head, relation, tail) ids explaining the i-th triple, as returned by
+    `SyntheticDataset.explanation_ids`. Every triple is encoded as an int64 key
+    and the predicted and true sets of every explanation are intersected at once
+    by sorting (segment, key) pairs, so there is no per-explanation Python code.
+
+    Precision, recall, F1 and Jaccard are computed per explanation, ignoring
+    duplicated triples. A metric whose denominator is zero is 1 if both sets are
+    empty and 0 otherwise.
+
+    Args:
+        store (TripleStore): Store of the ids of the explanations.
+    """
+
+    metric_names = ("precision", "recall", "f1", "jaccard")
+
+    def __init__(self, store: TripleStore):
+        self.num_entities = store.num_entities
+        self.num_relations = store.num_relations
+        self.store = store
+
+    def __getstate__(self) -> dict:
+        # Workers only need the sizes of the vocabularies
+        state = self.__dict__.copy()
+        state["store"] = None
+        return state
+
+    def keys(self, explanations: RaggedArray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Segment and key of every triple of the explanations (see
+        `ArrayUtils.triple_keys`), without duplicates within a segment.
+        """
+        values = np.asarray(explanations.values, dtype=np.int64).reshape(-1, 3)
+        segments = np.repeat(np.arange(len(explanations)), explanations.lengths)
+        keys = ArrayUtils.triple_keys(
+            values[:, 0],
+            values[:, 1],
+            values[:, 2],
+            self.num_entities,
+            self.num_relations,
+        )
+        # Triples with unknown (negative) ids get distinct negative keys
+        unknown = np.nonzero((values < 0).any(axis=1))[0]
+        if keys.dtype.names is None:
+            keys[unknown] = -1 - unknown
+        else:
+            keys[unknown] = (-1, -1, -1)
+            keys["head"][unknown] = -1 - unknown
+        return _unique_pairs(segments, keys)
+
+    def encode(self, explanations: list[list[tuple[str, str, str]]]) -> RaggedArray:
+        """
+        Explanations of (head, relation, tail) names, e.g. read with
+        `SyntheticDataset.load_explanation`, as a RaggedArray of ids. Unknown names
+        get id -1, so their triples never match a true one.
+        """
+        store = self.store
+        entity_id = {name: i for i, name in enumerate(store.entities)}
+        return RaggedArray.from_list(
+            [
+                [
+                    (
+                        entity_id.get(h, -1),
+                        store.relation_to_id.get(r, -1),
+                        entity_id.get(t, -1),
+                    )
+                    for h, r, t in explanation
+                ]
+                for explanation in explanations
+            ],
+            shape=(3,),
+        )
+
+    def score(
+        self, predicted: RaggedArray, truth: RaggedArray
+    ) -> dict[str, np.ndarray]:
+        """
+        Precision, recall, F1 and Jaccard of every predicted explanation.
+        """
+        assert len(predicted) == len(truth)
+        num = len(truth)
+        pred_segments, pred_keys = self.keys(predicted)
+        true_segments, true_keys = self.keys(truth)
+        num_pred = np.bincount(pred_segments, minlength=num)
+        num_true = np.bincount(true_segments, minlength=num)
+
+        # Pairs present in both sets are adjacent once all the pairs are sorted
+        segments = np.concatenate([pred_segments, true_segments])
+        keys = np.concatenate([pred_keys, true_keys])
+        order = _pair_order(segments, keys)
+        segments, keys = segments[order], keys[order]
+        both = (segments[1:] == segments[:-1]) & (keys[1:] == keys[:-1])
+        num_both = np.bincount(segments[1:][both], minlength=num)
+
+        num_union = num_pred + num_true - num_both
+        return {
+            "precision": _ratio(num_both, num_pred, num_union),
+            "recall": _ratio(num_both, num_true, num_union),
+            "f1": _ratio(2 * num_both, num_pred + num_true, num_union),
+            "jaccard": _ratio(num_both, num_union, num_union),
+        }
+
+    def evaluate(
+        self,
+        predicted: RaggedArray,
+        truth: RaggedArray,
+        chunk_size: int = 1_000_000,
+        num_workers: int = 1,
+    ) -> dict[str, float]:
+        """
+        Mean metrics of the predicted explanations.
+
+        Explanations are scored in chunks of `chunk_size`, so memory is bounded by
+        the chunk size. With num_workers > 1 the chunks are scored by a process
+        pool, with at most 2 * num_workers chunks in flight.
+        """
+        assert len(predicted) == len(truth)
+        chunks = (
+            np.arange(start, min(start + chunk_size, len(truth)))
+            for start in range(0, len(truth), chunk_size)
+        )
+        pairs = ((predicted.take(chunk), truth.take(chunk)) for chunk in chunks)
+
+        if num_workers <= 1:
+            sums = [self._sums(*pair) for pair in pairs]
+        else:
+            sums = []
+            pending = deque()
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                for pair in pairs:
+                    if len(pending) >= 2 * num_workers:
+                        sums.append(pending.popleft().result())
+                    pending.append(executor.submit(self._sums, *pair))
+                sums.extend(future.result() for future in pending)
+
+        results = {"num_explanations": len(truth)}
+        for name in self.metric_names:
+            total = sum(s[name] for s in sums)
+            results[name] = total / len(truth) if len(truth) > 0 else float("nan")
+        return results
+
+    def _sums(self, predicted: RaggedArray, truth: RaggedArray) -> dict[str, float]:
+        return {
+            name: float(values.sum())
+            for name, values in self.score(predicted, truth).items()
+        }
+
+
+def _pair_order(segments: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    if keys.dtype.names is None:
+        return np.lexsort((keys, segments))
+    return np.lexsort((keys["tail"], keys["rel"], keys["head"], segments))
+
+
+def _unique_pairs(
+    segments: np.ndarray, keys: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    order = _pair_order(segments, keys)
+    segments, keys = segments[order], keys[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = (segments[1:] != segments[:-1]) | (keys[1:] != keys[:-1])
+    return segments[first], keys[first]
+
+
+def _ratio(
+    numerator: np.ndarray, denominator: np.ndarray, num_union: np.ndarray
+) -> np.ndarray:
+    # 0 / 0 is 1 when both sets are empty and 0 otherwise
+    empty = np.where(num_union == 0, 1.0, 0.0)
+    return np.divide(numerator, denominator, out=empty, where=denominator > 0)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+import shutil
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from synthetic_knowledge_graphs.core.contracts.synthetic_dataset import (
+        SyntheticDataset,
+    )
+
+
+class GenerationCache:
+    """
+    Content-addressed cache of generated datasets.
+
+    Datasets are stored on disk in the columnar format of `SyntheticDataset.save`,
+    under `<folder>/<class>-<backend>/<hash>`, where hash is `get_hash()`. The disk
+    cache is bounded to `max_bytes`; when it grows larger the least recently used
+    entries are evicted (entries are touched on every hit). On top of it, the last
+    `max_memory_items` datasets are kept in memory, as loaded from disk, i.e. with
+    their arrays memory-mapped read-only.
+
+    Every hit returns a new copy of the cached dataset (see `SyntheticDataset.copy`),
+    so modifying a dataset taken from the cache does not affect the cache or other
+    datasets taken from it. The read-only arrays are shared, so copies are cheap.
+
+    Args:
+        folder (str): Root folder of the on-disk cache.
+
+        max_bytes (int, optional): Maximum size of the on-disk cache. Defaults to 10 GiB.
+
+        max_memory_items (int, optional): Number of datasets kept in memory.
+            Defaults to 8.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        max_bytes: int = 10 * 2**30,
+        max_memory_items: int = 8,
+    ):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_memory_items = max_memory_items
+        self._memory: OrderedDict[str, SyntheticDataset] = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def path(self, dataset: SyntheticDataset) -> str:
+        return os.path.join(self.root(dataset), dataset.get_hash())
+
+    def root(self, dataset: SyntheticDataset) -> str:
+        return os.path.join(self.folder, f"{type(dataset).__name__}-{dataset.backend}")
+
+    def get(self, dataset: SyntheticDataset) -> SyntheticDataset | None:
+        """
+        Return the cached dataset with the same class, backend and parameters as
+        `dataset`, or None if there is none.
+        """
+        path = self.path(dataset)
+        if path in self._memory:
+            self._memory.move_to_end(path)
+            self.stats["memory_hits"] += 1
+            return self._memory[path].copy()
+
+        if os.path.exists(os.path.join(path, "state.yaml")):
+            os.utime(path)
+            cached = type(dataset).load(path)
+            self._remember(path, cached)
+            self.stats["disk_hits"] += 1
+            return cached.copy()
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, dataset: SyntheticDataset) -> None:
+        dataset.save(self.root(dataset))
+        path = self.path(dataset)
+        self._remember(path, type(dataset).load(path))
+        self.evict()
+
+    def _remember(self, path: str, dataset: SyntheticDataset) -> None:
+        self._memory[path] = dataset
+        self._memory.move_to_end(path)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def entries(self) -> list[tuple[str, float, int]]:
+        """
+        (path, last access time, size in bytes) of every entry on disk.
+        """
+        entries = []
+        if not os.path.exists(self.folder):
+            return entries
+        for root_name in sorted(os.listdir(self.folder)):
+            root = os.path.join(self.folder, root_name)
+            for hash_name in sorted(os.listdir(root)):
+                path = os.path.join(root, hash_name)
+                entries.append((path, os.path.getmtime(path), _folder_size(path)))
+        return entries
+
+    def size(self) -> int:
+        return sum(size for _, _, size in self.entries())
+
+    def evict(self) -> None:
+        entries = sorted(self.entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path)
+            self._memory.pop(path, None)
+            total -= size
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if os.path.exists(self.folder):
+            shutil.rmtree(self.folder)
+
+
+def _folder_size(folder: str) -> int:
+    size = 0
+    for root, _, files in os.walk(folder):
+        for file_name in files:
+            size += os.path.getsize(os.path.join(root, file_name))
+    return size
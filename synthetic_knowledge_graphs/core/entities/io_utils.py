@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Any
+from typing import Any, Iterable, TextIO
 import yaml
 import pickle
 
@@ -16,6 +16,11 @@ class IOUtils:
         with open(file_path, "w") as file:
             yaml.dump(my_dict, file)
 
+    @staticmethod
+    def yaml_to_dict(file_path: str) -> dict[str, Any]:
+        with open(file_path, "r") as file:
+            return yaml.safe_load(file)
+
     @staticmethod
     def object_to_pickle(obj: Any, file_path: str) -> None:
         with open(file_path, "wb") as file:
@@ -44,6 +49,44 @@ class IOUtils:
         else:
             np.savetxt(file_path, my_list, fmt=fmt, delimiter=delimiter)
 
+    @staticmethod
+    def open_txt(file_path: str) -> TextIO:
+        if os.path.exists(file_path):
+            logging.info(f"{file_path} already exists. Overwriting...")
+        else:
+            logging.info(f"Creating {file_path}...")
+        return open(file_path, "w")
+
+    @staticmethod
+    def write_rows(
+        file: TextIO, rows: Iterable[tuple[str, ...]], delimiter: str = "\t"
+    ) -> None:
+        file.writelines(delimiter.join(row) + "\n" for row in rows)
+
+    @staticmethod
+    def arrays_to_folder(arrays: dict[str, np.ndarray], folder: str) -> None:
+        IOUtils.makedirs(folder)
+        # Remove arrays of a previous save
+        for file_name in os.listdir(folder):
+            if file_name.endswith(".npy"):
+                os.remove(os.path.join(folder, file_name))
+        for key, value in arrays.items():
+            np.save(os.path.join(folder, f"{key}.npy"), value)
+
+    @staticmethod
+    def folder_to_arrays(
+        folder: str, mmap_mode: str | None = "r"
+    ) -> dict[str, np.ndarray]:
+        arrays = {}
+        if not os.path.exists(folder):
+            return arrays
+        for file_name in sorted(os.listdir(folder)):
+            key, ext = os.path.splitext(file_name)
+            if ext == ".npy":
+                path = os.path.join(folder, file_name)
+                arrays[key] = np.load(path, mmap_mode=mmap_mode)
+        return arrays
+
     @staticmethod
     def makedirs(folder: str) -> None:
         if not os.path.exists(folder):
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+
+from synthetic_knowledge_graphs.core.entities.array_utils import ArrayUtils
+from synthetic_knowledge_graphs.core.entities.io_utils import IOUtils
+from synthetic_knowledge_graphs.core.entities.rng_utils import RNGUtils
+from synthetic_knowledge_graphs.core.entities.triple_store import TripleStore
+from synthetic_knowledge_graphs.core.values.constants import RNGStream
+
+
+class NegativeSampler:
+    """
+    Filtered negative sampler for link prediction.
+
+    Negatives are sampled in bulk by replacing the head or the tail of positive
+    triples with random entities. A corruption that gives a known triple (any triple
+    of the store) is detected with a binary search over the sorted int64 keys of
+    the known triples, and resampled. Keys are (head * num_relations + relation) *
+    num_entities + tail when that fits in an int64, and (head, relation, tail)
+    records compared lexicographically otherwise. With typed=True, an entity is only replaced
+    by entities of its own category.
+
+    Args:
+        store (TripleStore): Known triples, usually all the splits of a dataset.
+
+        seed (int, optional): Seed of the sampler. Defaults to 42.
+
+    Attributes:
+        max_rounds (int): Number of resampling rounds of the corruptions that give
+            known triples. Negatives still known after them are dropped (see
+            `sample`).
+    """
+
+    max_rounds = 100
+    record_dtype = ArrayUtils.triple_dtype
+
+    def __init__(self, store: TripleStore, seed: int = 42):
+        self.store = store
+        self.rng = RNGUtils.generator(seed, RNGStream.NEGATIVES)
+        self.keys = np.unique(self.triple_keys(store.heads, store.rels, store.tails))
+
+    @classmethod
+    def from_folder(cls, folder: str, seed: int = 42):
+        """
+        Sampler of the triples saved by `SyntheticDataset.save_triples` in
+        `folder`, and the triple ids of every split of the folder.
+        """
+        store, splits = TripleStore.from_split_files(folder)
+        return cls(store, seed=seed), splits
+
+    def triple_keys(
+        self, heads: np.ndarray, rels: np.ndarray, tails: np.ndarray
+    ) -> np.ndarray:
+        store = self.store
+        return ArrayUtils.triple_keys(
+            heads, rels, tails, store.num_entities, store.num_relations
+        )
+
+    def contains(
+        self, heads: np.ndarray, rels: np.ndarray, tails: np.ndarray
+    ) -> np.ndarray:
+        """
+        Boolean mask of the triples that are known.
+        """
+        return ArrayUtils.contains_sorted(
+            self.keys, self.triple_keys(heads, rels, tails)
+        )
+
+    def random_entities(self, entities: np.ndarray, typed: bool) -> np.ndarray:
+        """
+        A random entity per entity of `entities`, of the same category if typed.
+        """
+        if not typed:
+            return self.rng.integers(0, self.store.num_entities, size=len(entities))
+        index = self.store.category_index
+        category = self.store.categories[entities]
+        k = (self.rng.random(len(entities)) * index.lengths[category]).astype(np.int64)
+        return index.values[index.offsets[category] + k].astype(np.int64)
+
+    def sample(
+        self,
+        idx: np.ndarray,
+        num_negatives: int,
+        mode: str = "both",
+        typed: bool = True,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Sample `num_negatives` negatives for every triple with ids `idx`.
+
+        mode is "head", "tail" or "both" (head or tail with equal probability).
+        Returns the (len(idx), num_negatives) arrays of head, relation and tail
+        ids of the negatives. Negatives for which no unknown corruption was found
+        in `max_rounds` rounds have head and tail -1.
+        """
+        assert mode in ["head", "tail", "both"]
+        store = self.store
+        idx = np.asarray(idx, dtype=np.int64)
+        shape = (len(idx), num_negatives)
+        pos_heads = np.repeat(store.heads[idx].astype(np.int64), num_negatives)
+        pos_tails = np.repeat(store.tails[idx].astype(np.int64), num_negatives)
+        rels = np.repeat(store.rels[idx].astype(np.int64), num_negatives)
+        if mode == "both":
+            corrupt_head = self.rng.random(len(rels)) < 0.5
+        else:
+            corrupt_head = np.full(len(rels), mode == "head")
+
+        heads, tails = pos_heads.copy(), pos_tails.copy()
+        pending = np.arange(len(rels))
+        for _ in range(self.max_rounds):
+            if len(pending) == 0:
+                break
+            head = corrupt_head[pending]
+            original = np.where(head, pos_heads[pending], pos_tails[pending])
+            entities = self.random_entities(original, typed)
+            heads[pending] = np.where(head, entities, pos_heads[pending])
+            tails[pending] = np.where(head, pos_tails[pending], entities)
+            known = self.contains(heads[pending], rels[pending], tails[pending])
+            pending = pending[known]
+
+        heads[pending] = -1
+        tails[pending] = -1
+        return heads.reshape(shape), rels.reshape(shape), tails.reshape(shape)
+
+    def save(
+        self,
+        folder: str,
+        splits: dict[str, np.ndarray],
+        num_negatives: int,
+        mode: str = "both",
+        typed: bool = True,
+        chunk_size: int = 100_000,
+    ) -> None:
+        """
+        Write the negatives of every split to `<split>_negatives.txt`: one line per
+        triple of the split, in the order of `<split>.txt`, with its negatives as
+        comma-separated (head, relation, tail) names like `*_explanations.txt`.
+        """
+        names = self.store.entities
+        relations = self.store.relations
+        for name, idx in splits.items():
+            path = os.path.join(folder, f"{name}_negatives.txt")
+            with IOUtils.open_txt(path) as f:
+                for start in range(0, len(idx), chunk_size):
+                    heads, rels, tails = self.sample(
+                        idx[start : start + chunk_size], num_negatives, mode, typed
+                    )
+                    IOUtils.write_rows(
+                        f,
+                        (
+                            tuple(
+                                x
+                                for h, r, t in zip(row_h, row_r, row_t)
+                                if h >= 0
+                                for x in (names[h], relations[r], names[t])
+                            )
+                            for row_h, row_r, row_t in zip(
+                                heads.tolist(), rels.tolist(), tails.tolist()
+                            )
+                        ),
+                        delimiter=",",
+                    )
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Hashable, Iterable
+
+import networkx as nx
+
+from synthetic_knowledge_graphs.core.entities.entity_names import EntityNames
+
+
+class NodeIndex:
+    """
+    Index of the nodes of a graph by category.
+
+    It answers "all the nodes of a category", "node by (category, ids)" and "nodes
+    whose ids start with the given ones" in time proportional to the result (plus a
+    binary search), instead of scanning every node. Nodes are expected to be named
+    as in `EntityNames`; prefix queries sort the names of a category on first use.
+    """
+
+    def __init__(self):
+        # Nodes of every category as an insertion-ordered dict, so that removing a
+        # node is O(1)
+        self._nodes: dict[str | None, dict[Hashable, None]] = {}
+        self._sorted: dict[str | None, list[str]] = {}
+        self._category: dict[Hashable, str | None] = {}
+
+    def __len__(self) -> int:
+        return len(self._category)
+
+    def __contains__(self, node: Hashable) -> bool:
+        return node in self._category
+
+    def add(self, nodes: Iterable[Hashable], category: str | None) -> None:
+        """
+        Index nodes under a category, moving the ones indexed under another one.
+        """
+        nodes = list(nodes)
+        self.remove([n for n in nodes if self._category.get(n, category) != category])
+        self._nodes.setdefault(category, {}).update(dict.fromkeys(nodes))
+        self._category.update(dict.fromkeys(nodes, category))
+        self._sorted.pop(category, None)
+
+    def remove(self, nodes: Iterable[Hashable]) -> None:
+        for node in nodes:
+            if node not in self._category:
+                continue
+            category = self._category.pop(node)
+            group = self._nodes[category]
+            del group[node]
+            if len(group) == 0:
+                del self._nodes[category]
+            self._sorted.pop(category, None)
+
+    def matches(self, graph: nx.Graph) -> bool:
+        """
+        Whether the indexed nodes are the nodes of `graph`.
+        """
+        # A dict comparison of the node dicts, in C for regular graphs
+        return len(graph) == len(self) and self._category.keys() == graph._node.keys()
+
+    @classmethod
+    def from_graph(cls, graph: nx.Graph) -> NodeIndex:
+        """
+        Index of the nodes of a graph, by their "category" attribute.
+        """
+        groups: dict[str | None, list[Hashable]] = {}
+        for node, category in graph.nodes(data="category"):
+            groups.setdefault(category, []).append(node)
+        index = cls()
+        for category, nodes in groups.items():
+            index.add(nodes, category)
+        return index
+
+    @property
+    def categories(self) -> list[str | None]:
+        return list(self._nodes)
+
+    def nodes(self, category: str | None) -> list[Hashable]:
+        """
+        Nodes of a category, in the order they were added.
+        """
+        return list(self._nodes.get(category, {}))
+
+    def node(self, category: str, *ids: int) -> str | None:
+        """
+        Name of the node of a category with the given ids, None if not indexed.
+        """
+        name = EntityNames.name(category, *ids)
+        if name in self._category and self._category[name] == category:
+            return name
+        return None
+
+    def with_prefix(self, category: str, *ids: int) -> list[str]:
+        """
+        Nodes of a category whose first ids are `ids`, in lexicographic order, e.g.
+        with_prefix("fr", 3) gives the friends of the students of university 3.
+        """
+        if category not in self._sorted:
+            self._sorted[category] = sorted(self._nodes.get(category, {}))
+        names = self._sorted[category]
+        # "." follows "-", so names with the prefix are in [prefix, prefix[:-1] + ".")
+        prefix = EntityNames.name(category, *ids) + "-"
+        start = bisect_left(names, prefix)
+        end = bisect_left(names, prefix[:-1] + ".", lo=start)
+        return names[start:end]
+
+
+class IndexedDiGraph(nx.DiGraph):
+    """
+    networkx DiGraph that keeps a NodeIndex of its nodes up to date as nodes are
+    added and removed through the graph methods (`add_node`, `add_edges_from`,
+    `remove_nodes_from`...), by their "category" attribute.
+
+    Changing the category attribute of an existing node in place is not tracked;
+    add the node again with the new category instead. Views of the graph (e.g.
+    `subgraph`) do not share the index.
+    """
+
+    def __init__(self, incoming_graph_data=None, **attr):
+        self.node_index = NodeIndex()
+        super().__init__(incoming_graph_data, **attr)
+
+    def _index(self, nodes: Iterable[Hashable]) -> None:
+        groups: dict[str | None, list[Hashable]] = {}
+        for node in nodes:
+            groups.setdefault(self._node[node].get("category"), []).append(node)
+        for category, group in groups.items():
+            self.node_index.add(group, category)
+
+    def add_node(self, node_for_adding, **attr):
+        super().add_node(node_for_adding, **attr)
+        self._index([node_for_adding])
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        nodes_for_adding = list(nodes_for_adding)
+        super().add_nodes_from(nodes_for_adding, **attr)
+        self._index(_node_of(n) for n in nodes_for_adding)
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        super().add_edge(u_of_edge, v_of_edge, **attr)
+        self._index(n for n in (u_of_edge, v_of_edge) if n not in self.node_index)
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        ebunch_to_add = list(ebunch_to_add)
+        num_nodes = len(self._node)
+        super().add_edges_from(ebunch_to_add, **attr)
+        # Edges between existing nodes do not change the index
+        if len(self._node) != num_nodes:
+            self._index(
+                n
+                for e in ebunch_to_add
+                for n in e[:2]
+                if n not in self.node_index and n in self._node
+            )
+
+    def remove_node(self, n):
+        super().remove_node(n)
+        self.node_index.remove([n])
+
+    def remove_nodes_from(self, nodes):
+        nodes = list(nodes)
+        super().remove_nodes_from(nodes)
+        self.node_index.remove(n for n in nodes if n not in self._node)
+
+    def clear(self):
+        super().clear()
+        self.node_index = NodeIndex()
+
+
+def _node_of(node_for_adding) -> Hashable:
+    # add_nodes_from takes nodes and (node, attribute dict) pairs
+    try:
+        hash(node_for_adding)
+        return node_for_adding
+    except TypeError:
+        return node_for_adding[0]
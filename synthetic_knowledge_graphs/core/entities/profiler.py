@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import functools
+import sys
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from typing import Any, ContextManager
+
+from synthetic_knowledge_graphs.core.contracts.logger import Logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class Profiler:
+    """
+    Times the phases of the lifecycle of a dataset and reports them through a Logger.
+
+    Every phase is logged once, when it ends, as a dict under the name of the phase:
+    its wall time in `seconds`, the peak resident set size of the process in
+    `peak_rss` (bytes) and the counts added to the phase, plus `edges_per_sec` if
+    `num_edges` is one of them. Without an enabled logger a phase is a no-op
+    context, so hot paths can be timed at close to no cost.
+
+    Args:
+        logger (Logger, optional): Logger receiving the phases. Defaults to None,
+            which disables the profiler.
+    """
+
+    def __init__(self, logger: Logger | None = None):
+        self.logger = logger
+
+    @property
+    def enabled(self) -> bool:
+        return self.logger is not None and self.logger.is_enabled
+
+    def phase(self, name: str, **counts: Any) -> ContextManager[dict]:
+        """
+        Context timing the phase `name`. It yields the dict of counts of the phase,
+        to which the timed code can add more counts, e.g. the number of edges.
+        """
+        if not self.enabled:
+            return _DISABLED_PHASE
+        return self._phase(name, counts)
+
+    @contextmanager
+    def _phase(self, name: str, counts: dict):
+        start = time.perf_counter()
+        yield counts
+        seconds = time.perf_counter() - start
+        record = {"seconds": seconds, "peak_rss": Profiler.peak_rss(), **counts}
+        if "num_edges" in counts and seconds > 0:
+            record["edges_per_sec"] = counts["num_edges"] / seconds
+        self.logger.log(name, record)
+
+    @staticmethod
+    def timed(name: str | None = None) -> Callable:
+        """
+        Decorator timing a method as the phase `name` (the name of the method by
+        default) of the `profiler` of its object.
+        """
+
+        def decorator(method: Callable) -> Callable:
+            phase = name or method.__name__
+
+            @functools.wraps(method)
+            def wrapper(self, *args, **kwargs):
+                profiler = self.profiler
+                if not profiler.enabled:
+                    return method(self, *args, **kwargs)
+                with profiler.phase(phase):
+                    return method(self, *args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def peak_rss() -> int | None:
+        """
+        Peak resident set size of the process in bytes, None if unavailable.
+        """
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _DisabledPhase:
+    def __enter__(self) -> dict:
+        return {}
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+_DISABLED_PHASE = _DisabledPhase()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import numpy as np
+
+from synthetic_knowledge_graphs.core.entities.array_utils import ArrayUtils
+
+
+class RaggedArray:
+    """
+    Sequence of variable-length segments stored as one flat array.
+
+    The i-th segment is values[offsets[i]:offsets[i + 1]]. Values can have trailing
+    dimensions, e.g. explanations are stored as (num_triples, 3) arrays of
+    (head, relation, tail) ids.
+
+    Args:
+        values (np.ndarray): Concatenation of all the segments.
+
+        offsets (np.ndarray): Start of every segment, plus the total length.
+    """
+
+    def __init__(self, values: np.ndarray, offsets: np.ndarray):
+        assert offsets[0] == 0 and offsets[-1] == len(values)
+        self.values = values
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    @classmethod
+    def from_lengths(cls, values: np.ndarray, lengths: np.ndarray) -> RaggedArray:
+        return cls(values, ArrayUtils.offsets(lengths))
+
+    @classmethod
+    def from_list(cls, segments: list, dtype=np.int64, shape=()) -> RaggedArray:
+        lengths = [len(s) for s in segments]
+        if sum(lengths) == 0:
+            values = np.empty((0, *shape), dtype=dtype)
+        else:
+            values = np.concatenate(
+                [np.asarray(s, dtype=dtype) for s in segments if len(s)]
+            )
+        return cls.from_lengths(values, lengths)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        return self.values[self.offsets[i] : self.offsets[i + 1]]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def take(self, idx: np.ndarray) -> RaggedArray:
+        """
+        Gather the segments with the given indices into a new RaggedArray.
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        lengths = self.lengths[idx]
+        positions = np.repeat(self.offsets[idx], lengths) + ArrayUtils.ragged_arange(
+            lengths
+        )
+        return RaggedArray.from_lengths(self.values[positions], lengths)
+
+    def tolist(self) -> list:
+        values = self.values.tolist()
+        offsets = self.offsets.tolist()
+        return [values[offsets[i] : offsets[i + 1]] for i in range(len(self))]
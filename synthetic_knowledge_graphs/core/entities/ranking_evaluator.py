@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+
+import numpy as np
+
+from synthetic_knowledge_graphs.core.entities.array_utils import ArrayUtils
+from synthetic_knowledge_graphs.core.entities.ragged_array import RaggedArray
+from synthetic_knowledge_graphs.core.entities.triple_store import TripleStore
+
+ScoreFn = Callable[[np.ndarray, np.ndarray, str], np.ndarray]
+
+
+class RankingEvaluator:
+    """
+    Filtered ranking evaluation (MR, MRR and Hits@k) of link predictors.
+
+    For every evaluated triple (h, r, t), the tail t is ranked against all the
+    entities as tails of (h, r, ?), and the head h against all the entities as
+    heads of (?, r, t). In the filtered setting the other known triples are not
+    counted as errors: the known tails of every (head, relation) and heads of every
+    (relation, tail) are kept in CSR indexes, so filtering a batch is one masked
+    assignment on its score matrix. Ties count half, i.e. the rank is the mean of
+    the optimistic and the pessimistic ranks.
+
+    Args:
+        store (TripleStore): Known triples, usually all the splits of a dataset.
+
+        ks (tuple of int, optional): Cut-offs of Hits@k. Defaults to (1, 3, 10).
+
+        max_memory (int, optional): Memory budget in bytes of the score matrix of a
+            batch of triples, which sets the batch size. Defaults to 256 MB.
+    """
+
+    sides = ("head", "tail")
+
+    def __init__(
+        self,
+        store: TripleStore,
+        ks: tuple[int, ...] = (1, 3, 10),
+        max_memory: int = 2**28,
+    ):
+        self.store = store
+        self.ks = ks
+        self.max_memory = max_memory
+        heads = store.heads.astype(np.int64)
+        rels = store.rels.astype(np.int64)
+        tails = store.tails.astype(np.int64)
+        # Known tails of every (head, relation) and heads of every (relation, tail)
+        self.index = {
+            "tail": RankingEvaluator.csr(heads * store.num_relations + rels, tails),
+            "head": RankingEvaluator.csr(tails * store.num_relations + rels, heads),
+        }
+
+    @staticmethod
+    def csr(keys: np.ndarray, values: np.ndarray) -> tuple[np.ndarray, RaggedArray]:
+        """
+        Sorted unique keys and the RaggedArray of the values of every key.
+        """
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        unique, starts = np.unique(keys, return_index=True)
+        offsets = np.append(starts, len(keys))
+        return unique, RaggedArray(values[order], offsets)
+
+    @property
+    def batch_size(self) -> int:
+        # The score matrix and its comparison masks
+        return max(1, self.max_memory // (10 * max(self.store.num_entities, 1)))
+
+    def known(
+        self, side: str, entities: np.ndarray, rels: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (row, entity) pairs of the known `side` entities of every row: the tails of
+        (entities[i], rels[i], ?) for side "tail", the heads of (?, rels[i],
+        entities[i]) for side "head".
+        """
+        keys, values = self.index[side]
+        if len(keys) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        query = entities.astype(np.int64) * self.store.num_relations + rels
+        segment = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+        lengths = np.where(keys[segment] == query, values.lengths[segment], 0)
+        rows = np.repeat(np.arange(len(query)), lengths)
+        positions = np.repeat(values.offsets[segment], lengths)
+        positions += ArrayUtils.ragged_arange(lengths)
+        return rows, values.values[positions]
+
+    def ranks(
+        self,
+        idx: np.ndarray,
+        score_fn: ScoreFn | None = None,
+        scores: dict[str, np.ndarray] | None = None,
+    ) -> dict[str, np.ndarray]:
+        """
+        Filtered rank of the head and of the tail of every triple with ids `idx`.
+
+        Scores come either from `score_fn(entities, rels, side)`, returning the
+        (len(entities), num_entities) scores of all the candidate heads (side
+        "head", given the tails) or tails (side "tail", given the heads), or from
+        precomputed `scores[side]` matrices with a row per triple of `idx`. Higher
+        scores are better.
+        """
+        assert (score_fn is None) != (scores is None)
+        store = self.store
+        idx = np.asarray(idx, dtype=np.int64)
+        ranks = {}
+        for side in self.sides:
+            ranks[side] = np.empty(len(idx), dtype=np.float64)
+            for start in range(0, len(idx), self.batch_size):
+                batch = idx[start : start + self.batch_size]
+                heads, rels, tails = (
+                    store.heads[batch],
+                    store.rels[batch],
+                    store.tails[batch],
+                )
+                given, targets = (tails, heads) if side == "head" else (heads, tails)
+                if score_fn is not None:
+                    batch_scores = score_fn(given, rels, side)
+                else:
+                    batch_scores = scores[side][start : start + len(batch)]
+                batch_scores = np.array(batch_scores, dtype=np.float64)
+                assert batch_scores.shape == (len(batch), store.num_entities)
+
+                rows = np.arange(len(batch))
+                target_scores = batch_scores[rows, targets]
+                batch_scores[self.known(side, given, rels)] = -np.inf
+                batch_scores[rows, targets] = target_scores
+                greater = (batch_scores > target_scores[:, None]).sum(axis=1)
+                ties = (batch_scores == target_scores[:, None]).sum(axis=1) - 1
+                ranks[side][start : start + len(batch)] = 1 + greater + ties / 2
+        return ranks
+
+    def metrics(self, ranks: np.ndarray) -> dict[str, float]:
+        if len(ranks) == 0:
+            ranks = np.full(1, np.nan)
+        metrics = {
+            "num_ranks": int(np.sum(~np.isnan(ranks))),
+            "mr": float(np.mean(ranks)),
+            "mrr": float(np.mean(1 / ranks)),
+        }
+        for k in self.ks:
+            metrics[f"hits@{k}"] = float(np.mean(ranks <= k))
+        return metrics
+
+    def evaluate(
+        self,
+        idx: np.ndarray,
+        score_fn: ScoreFn | None = None,
+        scores: dict[str, np.ndarray] | None = None,
+    ) -> dict:
+        """
+        Filtered metrics of the triples with ids `idx` (see `ranks`), over both
+        sides, per side and per relation.
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        ranks = self.ranks(idx, score_fn=score_fn, scores=scores)
+        rels = self.store.rels[idx]
+
+        results = self.metrics(np.concatenate([ranks[side] for side in self.sides]))
+        for side in self.sides:
+            results[side] = self.metrics(ranks[side])
+        results["per_relation"] = {
+            self.store.relation_name(r): self.metrics(
+                np.concatenate([ranks[side][rels == r] for side in self.sides])
+            )
+            for r in np.unique(rels).tolist()
+        }
+        return results
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+class RNGUtils:
+    @staticmethod
+    def generator(seed: int, *key: int) -> np.random.Generator:
+        """
+        Independent Generator for the stream identified by key, derived from seed.
+
+        The generator is seeded with np.random.SeedSequence(seed, spawn_key=key), i.e.
+        the same sequence that SeedSequence(seed).spawn would give to child key, so
+        every stream can be created on its own, in any process and in any order.
+        """
+        return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=key))
+
+    @staticmethod
+    def blocks(num: int, block_size: int) -> list[tuple[int, int]]:
+        """
+        Split range(num) into consecutive (start, end) blocks of block_size elements.
+        """
+        return [
+            (start, min(start + block_size, num)) for start in range(0, num, block_size)
+        ]
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import numpy as np
+
+from synthetic_knowledge_graphs.core.entities.array_utils import ArrayUtils
+
+
+class SplitUtils:
+    @staticmethod
+    def sizes(counts: np.ndarray, percentages: list[float]) -> np.ndarray:
+        """
+        (len(counts), len(percentages)) sizes of the splits of groups of counts[i]
+        triples. Every split but the first gets floor(p * count) triples and the
+        first one, train, gets the rest, so no triple is left out.
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        sizes = np.floor(np.outer(counts, percentages[1:]) + 1e-9).astype(np.int64)
+        sizes = np.minimum(sizes, counts[:, None])
+        return np.concatenate([counts[:, None] - sizes.sum(axis=1)[:, None], sizes], 1)
+
+    @staticmethod
+    def first_occurrences(
+        heads: np.ndarray, rels: np.ndarray, tails: np.ndarray
+    ) -> np.ndarray:
+        """
+        Boolean mask of the triples where an entity or a relation appears for the
+        first time.
+        """
+        num = len(heads)
+        positions = np.arange(num)
+        mask = np.zeros(num, dtype=bool)
+        if num == 0:
+            return mask
+        for ids in [np.concatenate([heads, tails]), rels]:
+            first = np.full(int(ids.max()) + 1, num, dtype=np.int64)
+            np.minimum.at(first, ids, np.tile(positions, len(ids) // num))
+            mask[first[first < num]] = True
+        return mask
+
+    @staticmethod
+    def split(
+        heads: np.ndarray,
+        rels: np.ndarray,
+        tails: np.ndarray,
+        percentages: list[float],
+        rng: np.random.Generator,
+        transductive: bool = False,
+        stratify: bool = False,
+    ) -> list[np.ndarray]:
+        """
+        Split the triple ids 0..len(heads)-1 at random with the given percentages,
+        the first split being train. Returns the triple ids of every split.
+
+        With transductive=True every entity and relation of the graph is in some
+        train triple: the first triple of every entity and relation, in a random
+        order, is put in train, and the other splits shrink if train needs more
+        triples than its share. With stratify=True the percentages are applied to
+        the triples of every relation. Everything is done with integer arrays in
+        O(num_triples), but for the sort by relation of stratify.
+        """
+        num = len(heads)
+        num_splits = len(percentages)
+        permutation = rng.permutation(num)
+        if stratify and num > 0:
+            groups = np.asarray(rels)[permutation].astype(np.int64)
+        else:
+            groups = np.zeros(num, dtype=np.int64)
+        num_groups = int(groups.max()) + 1 if num > 0 else 0
+
+        if transductive:
+            required = SplitUtils.first_occurrences(
+                heads[permutation], rels[permutation], tails[permutation]
+            )
+        else:
+            required = np.zeros(num, dtype=bool)
+
+        # Required triples go to train, taking triples from the other splits
+        sizes = SplitUtils.sizes(np.bincount(groups, minlength=num_groups), percentages)
+        num_required = np.bincount(groups[required], minlength=num_groups)
+        overflow = np.maximum(num_required - sizes[:, 0], 0)
+        sizes[:, 0] += overflow
+        for s in range(1, num_splits):
+            taken = np.minimum(overflow, sizes[:, s])
+            sizes[:, s] -= taken
+            overflow -= taken
+        sizes[:, 0] -= num_required
+
+        # The other triples of every group fill the splits in the permuted order
+        free = np.nonzero(~required)[0]
+        free = free[np.argsort(groups[free], kind="stable")]
+        rank = ArrayUtils.ragged_arange(np.bincount(groups[free], minlength=num_groups))
+        bounds = np.cumsum(sizes, axis=1)
+        assignment = np.zeros(num, dtype=np.int64)
+        assignment[free] = (rank[:, None] >= bounds[groups[free]]).sum(axis=1)
+
+        return [permutation[assignment == s] for s in range(num_splits)]
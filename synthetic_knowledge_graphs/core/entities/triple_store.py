@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import os
+from functools import partial
+from typing import Callable, Iterable
+
+import networkx as nx
+import numpy as np
+
+from synthetic_knowledge_graphs.core.entities.array_utils import ArrayUtils
+from synthetic_knowledge_graphs.core.entities.entity_names import EntityNames
+from synthetic_knowledge_graphs.core.entities.io_utils import IOUtils
+from synthetic_knowledge_graphs.core.entities.node_index import IndexedDiGraph
+from synthetic_knowledge_graphs.core.entities.ragged_array import RaggedArray
+
+
+class TripleStore:
+    """
+    Compact in-memory knowledge graph.
+
+    Entities and relations are interned as integer ids; the triples are stored as
+    int32 head/relation/tail arrays. The entity vocabulary can be given as a list or
+    as a callable returning the list, in which case names are only formatted the
+    first time they are needed.
+
+    Args:
+        entities (list of str or callable): Entity names, indexed by entity id.
+
+        relations (list of str): Relation names, indexed by relation id.
+
+        categories (np.ndarray): Category code of every entity, indexing
+            `category_list`.
+
+        category_list (list of str): Category names.
+    """
+
+    def __init__(
+        self,
+        entities: list[str] | Callable[[], list[str]],
+        relations: list[str],
+        categories: np.ndarray,
+        category_list: list[str | None],
+    ):
+        self._entities = entities
+        self._entity_to_id: dict[str, int] | None = None
+        self.relations = list(relations)
+        self.relation_to_id = {r: i for i, r in enumerate(self.relations)}
+        self.categories = np.asarray(categories, dtype=np.int8)
+        self.category_list = list(category_list)
+        self._category_index: RaggedArray | None = None
+        self._name_ids: RaggedArray | None = None
+
+        self._chunks: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._triples = tuple(np.empty(0, dtype=np.int32) for _ in range(3))
+
+    @property
+    def entities(self) -> list[str]:
+        if callable(self._entities):
+            self._entities = list(self._entities())
+            assert len(self._entities) == len(self.categories)
+        return self._entities
+
+    @property
+    def num_entities(self) -> int:
+        return len(self.categories)
+
+    @property
+    def num_relations(self) -> int:
+        return len(self.relations)
+
+    def __len__(self) -> int:
+        return len(self.heads)
+
+    def copy(self) -> TripleStore:
+        """
+        Copy of the store that can be modified independently. Read-only arrays are
+        shared (see `ArrayUtils.copy_writeable`).
+        """
+        entities = self._entities
+        store = TripleStore(
+            entities if callable(entities) else list(entities),
+            self.relations,
+            ArrayUtils.copy_writeable(self.categories),
+            self.category_list,
+        )
+        store._triples = tuple(
+            ArrayUtils.copy_writeable(a) for a in self._consolidate()
+        )
+        return store
+
+    def add_entities(self, names: list[str], category: str | None) -> np.ndarray:
+        if category not in self.category_list:
+            self.category_list.append(category)
+        code = self.category_list.index(category)
+
+        start = self.num_entities
+        self.entities.extend(names)
+        self.categories = np.concatenate(
+            [self.categories, np.full(len(names), code, dtype=np.int8)]
+        )
+        if self._entity_to_id is not None:
+            self._entity_to_id.update({n: start + i for i, n in enumerate(names)})
+        self._category_index = None
+        self._name_ids = None
+        return np.arange(start, self.num_entities)
+
+    @property
+    def category_index(self) -> RaggedArray:
+        """
+        Sorted ids of the entities of every category code, built in
+        O(num_entities) on first use.
+        """
+        if self._category_index is None:
+            order = np.argsort(self.categories, kind="stable")
+            counts = np.bincount(self.categories, minlength=len(self.category_list))
+            self._category_index = RaggedArray.from_lengths(order, counts)
+        return self._category_index
+
+    def category_ids(self, category: str | None) -> np.ndarray:
+        """
+        Sorted ids of the entities of a category, in O(result) once the
+        `category_index` is built.
+        """
+        if category not in self.category_list:
+            return np.empty(0, dtype=np.int64)
+        return self.category_index[self.category_list.index(category)]
+
+    def add_relation(self, name: str) -> int:
+        if name not in self.relation_to_id:
+            self.relation_to_id[name] = len(self.relations)
+            self.relations.append(name)
+        return self.relation_to_id[name]
+
+    def add_triples(
+        self, heads: np.ndarray, rels: np.ndarray, tails: np.ndarray
+    ) -> None:
+        assert len(heads) == len(rels) == len(tails)
+        self._chunks.append(
+            (
+                np.asarray(heads, dtype=np.int32),
+                np.asarray(rels, dtype=np.int32),
+                np.asarray(tails, dtype=np.int32),
+            )
+        )
+
+    def _consolidate(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if len(self._chunks) > 0:
+            self._triples = tuple(
+                np.concatenate([t] + [c[i] for c in self._chunks])
+                for i, t in enumerate(self._triples)
+            )
+            self._chunks = []
+        return self._triples
+
+    @property
+    def heads(self) -> np.ndarray:
+        return self._consolidate()[0]
+
+    @property
+    def rels(self) -> np.ndarray:
+        return self._consolidate()[1]
+
+    @property
+    def tails(self) -> np.ndarray:
+        return self._consolidate()[2]
+
+    def entity_id(self, name: str) -> int:
+        if self._entity_to_id is None:
+            self._entity_to_id = {n: i for i, n in enumerate(self.entities)}
+        return self._entity_to_id[name]
+
+    @property
+    def name_ids(self) -> RaggedArray:
+        """
+        Ids in the name of every entity (see `EntityNames`), parsed in bulk on
+        first use, so that the ids of an entity are a lookup instead of a parse.
+        """
+        if self._name_ids is None:
+            self._name_ids = EntityNames.parse_ids(self.entities)
+        return self._name_ids
+
+    def entity_name(self, entity_id: int) -> str:
+        return self.entities[entity_id]
+
+    def relation_id(self, name: str) -> int:
+        return self.relation_to_id[name]
+
+    def relation_name(self, relation_id: int) -> str:
+        return self.relations[relation_id]
+
+    def category(self, entity_id: int) -> str | None:
+        return self.category_list[self.categories[entity_id]]
+
+    def triple(self, idx: int) -> tuple[str, str, str]:
+        return (
+            self.entities[self.heads[idx]],
+            self.relations[self.rels[idx]],
+            self.entities[self.tails[idx]],
+        )
+
+    def iter_triples(self, idx: Iterable[int] | None = None):
+        """
+        Iterate over (head, relation, tail) names, optionally for the given triple ids.
+        """
+        heads, rels, tails = self._consolidate()
+        if idx is not None:
+            idx = np.asarray(idx)
+            heads, rels, tails = heads[idx], rels[idx], tails[idx]
+        names = self.entities
+        for h, r, t in zip(heads.tolist(), rels.tolist(), tails.tolist()):
+            yield names[h], self.relations[r], names[t]
+
+    def to_networkx(self) -> nx.DiGraph:
+        graph = IndexedDiGraph()
+        graph.add_nodes_from(
+            (name, {"category": self.category_list[c]})
+            for name, c in zip(self.entities, self.categories.tolist())
+        )
+        graph.add_edges_from((h, t, {"relation": r}) for h, r, t in self.iter_triples())
+        return graph
+
+    def save(self, folder: str) -> None:
+        """
+        Save the store as .npy arrays plus a vocabulary file. Entity names are only
+        saved if they have already been materialized; otherwise the owner of the
+        store is expected to provide them again on load.
+        """
+        IOUtils.makedirs(folder)
+        heads, rels, tails = self._consolidate()
+        np.save(os.path.join(folder, "heads.npy"), heads)
+        np.save(os.path.join(folder, "rels.npy"), rels)
+        np.save(os.path.join(folder, "tails.npy"), tails)
+        np.save(os.path.join(folder, "categories.npy"), self.categories)
+        path_entities = os.path.join(folder, "entities.npy")
+        if not callable(self._entities):
+            np.save(path_entities, np.array(self._entities, dtype=np.bytes_))
+        elif os.path.exists(path_entities):
+            os.remove(path_entities)
+        vocab = {"relations": self.relations, "category_list": self.category_list}
+        IOUtils.dict_to_yaml(vocab, os.path.join(folder, "vocab.yaml"))
+
+    @classmethod
+    def load(
+        cls,
+        folder: str,
+        entities: Callable[[], list[str]] | None = None,
+        mmap_mode: str | None = "r",
+    ) -> TripleStore:
+        """
+        Load a store saved with `save`. Arrays are memory-mapped with `mmap_mode`
+        (no copy is made until they are modified). `entities` provides the entity
+        names if they were not saved.
+        """
+        vocab = IOUtils.yaml_to_dict(os.path.join(folder, "vocab.yaml"))
+        path_entities = os.path.join(folder, "entities.npy")
+        if os.path.exists(path_entities):
+            names = np.load(path_entities, mmap_mode=mmap_mode)
+            entities = partial(_decode_names, names)
+        assert entities is not None, f"Entity names not found in {folder}"
+
+        store = cls(
+            entities=entities,
+            relations=vocab["relations"],
+            categories=np.load(
+                os.path.join(folder, "categories.npy"), mmap_mode=mmap_mode
+            ),
+            category_list=vocab["category_list"],
+        )
+        store._triples = tuple(
+            np.load(os.path.join(folder, f"{key}.npy"), mmap_mode=mmap_mode)
+            for key in ["heads", "rels", "tails"]
+        )
+        return store
+
+    @classmethod
+    def from_split_files(cls, folder: str) -> tuple[TripleStore, dict[str, np.ndarray]]:
+        """
+        Store of the triples written by `SyntheticDataset.save_triples` in `folder`,
+        and the triple ids of every split file found (train, valid, test).
+        """
+        entities, node_category = [], []
+        with open(os.path.join(folder, "node_category.yaml"), "r") as f:
+            for line in f:
+                name, _, category = line.rstrip("\n").partition(": ")
+                entities.append(name)
+                node_category.append(category)
+        category_list = list(dict.fromkeys(node_category))
+        code = {c: i for i, c in enumerate(category_list)}
+        store = cls(
+            entities=entities,
+            relations=[],
+            categories=np.array([code[c] for c in node_category], dtype=np.int8),
+            category_list=category_list,
+        )
+
+        splits = {}
+        for name in ["train", "valid", "test"]:
+            path = os.path.join(folder, f"{name}.txt")
+            if not os.path.exists(path):
+                continue
+            with open(path, "r") as f:
+                rows = [line.rstrip("\n").split("\t") for line in f if line.strip()]
+            heads = np.array([store.entity_id(h) for h, _, _ in rows], dtype=np.int32)
+            rels = np.array([store.add_relation(r) for _, r, _ in rows], dtype=np.int32)
+            tails = np.array([store.entity_id(t) for _, _, t in rows], dtype=np.int32)
+            start = len(store)
+            store.add_triples(heads, rels, tails)
+            splits[name] = np.arange(start, start + len(rows))
+        return store, splits
+
+    @classmethod
+    def from_networkx(cls, graph: nx.DiGraph) -> TripleStore:
+        entities = list(graph.nodes)
+        node_category = [c for _, c in graph.nodes(data="category")]
+        category_list = list(dict.fromkeys(node_category))
+        code = {c: i for i, c in enumerate(category_list)}
+        store = cls(
+            entities=entities,
+            relations=[],
+            categories=np.array([code[c] for c in node_category], dtype=np.int8),
+            category_list=category_list,
+        )
+
+        entity_to_id = {n: i for i, n in enumerate(entities)}
+        num_edges = graph.number_of_edges()
+        heads = np.empty(num_edges, dtype=np.int32)
+        rels = np.empty(num_edges, dtype=np.int32)
+        tails = np.empty(num_edges, dtype=np.int32)
+        for i, (u, v, relation) in enumerate(graph.edges(data="relation")):
+            heads[i] = entity_to_id[u]
+            rels[i] = store.add_relation(relation)
+            tails[i] = entity_to_id[v]
+        store._entity_to_id = entity_to_id
+        store.add_triples(heads, rels, tails)
+        return store
+
+
+def _decode_names(names: np.ndarray) -> list[str]:
+    return np.char.decode(names, "utf-8").tolist()
@@ -30,3 +30,17 @@ class Relation:
 
     HELD_BY = "held_by"
     BOUGHT_BY = "bought_by"
+
+
+class Backend:
+    NETWORKX = "networkx"
+    NUMPY = "numpy"
+    STREAM = "stream"
+
+
+class RNGStream:
+    COMPONENTS = 0
+    LINKS = 1
+    SPLITS = 2
+    SAMPLES = 3
+    NEGATIVES = 4
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from typing import Callable, NamedTuple
+
+
+class GraphBlock(NamedTuple):
+    """
+    Part of a graph generated on its own: the nodes introduced by a block of
+    components, with their categories, and the (head, relation, tail) triples of
+    the block. Triples can point to nodes introduced by other blocks.
+
+    `explain(start, end)`, if given, returns the explanations of triples
+    start..end-1 as the flat name tuples of `get_explanation`, computed from the
+    ids the block was built from instead of parsing the names of every triple.
+    """
+
+    nodes: list[str]
+    categories: list[str]
+    triples: list[tuple[str, str, str]]
+    explain: Callable[[int, int], list[tuple[str, ...]]] | None = None
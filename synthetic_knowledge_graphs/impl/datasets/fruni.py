@@ -1,18 +1,24 @@
-import random
-
-
-import networkx as nx
-
+import functools
+from itertools import repeat
 
 from synthetic_knowledge_graphs.core.contracts.synthetic_dataset import SyntheticDataset
-from synthetic_knowledge_graphs.core.entities.name_generator import NameGeneratorFRUNI
-from synthetic_knowledge_graphs.core.values.constants import EntityType, Relation
+from synthetic_knowledge_graphs.core.entities.array_utils import ArrayUtils
+from synthetic_knowledge_graphs.core.entities.entity_names import EntityNames
+from synthetic_knowledge_graphs.core.entities.profiler import Profiler
+from synthetic_knowledge_graphs.core.entities.ragged_array import RaggedArray
+from synthetic_knowledge_graphs.core.entities.rng_utils import RNGUtils
+from synthetic_knowledge_graphs.core.entities.triple_store import TripleStore
+from synthetic_knowledge_graphs.core.values.constants import (
+    Backend,
+    EntityType,
+    Relation,
+    RNGStream,
+)
+from synthetic_knowledge_graphs.core.values.graph_block import GraphBlock
 
 
 import numpy as np
 
-from synthetic_knowledge_graphs.impl.graph_utils import GraphUtilsNX
-
 
 class FRUNIDataset(SyntheticDataset):
     """
@@ -29,14 +35,26 @@ class FRUNIDataset(SyntheticDataset):
         Probability of collaborative relationships between universities (default is 0.0).
     n_f : int
         Number of universities that foster friendship.
+    num_students : int, optional
+        Number of students per university (default is 2).
+    backend : str, optional
+        `Backend.NETWORKX` (default), `Backend.NUMPY` or `Backend.STREAM`. The numpy
+        backend builds the TripleStore directly with vectorized operations and
+        materializes the networkx graph on demand. The stream backend generates
+        the universities block by block (see `iter_blocks`).
     """
 
+    backends = (Backend.NETWORKX, Backend.NUMPY, Backend.STREAM)
+    relation_list = [Relation.ENROLLS, Relation.FRIEND_OF, Relation.COLLABORATES_WITH]
+    category_list = [EntityType.UNIVERSITY, EntityType.STUDENT, EntityType.FRIEND]
+
     def __init__(
         self,
         n_u: int,
         lambda_f: float,
         alpha_u: float = 0.0,
         n_f: float | None = None,
+        num_students: int = 2,
         **kwargs,
     ):
         if n_f is None:
@@ -45,12 +63,13 @@ class FRUNIDataset(SyntheticDataset):
         assert lambda_f > 0.0
         assert alpha_u >= 0.0 and alpha_u <= 1.0
         assert n_f >= 0 and n_f <= n_u
+        assert num_students >= 1
 
         self.n_u = n_u
         self.lambda_f = lambda_f
         self.alpha_u = alpha_u
         self.n_f = n_f
-        self.num_students = 2
+        self.num_students = num_students
 
         super().__init__(**kwargs)
 
@@ -63,85 +82,409 @@ class FRUNIDataset(SyntheticDataset):
             "num_students": self.num_students,
         }
 
-    def create_graph(self):
-        NameGeneratorFRUNI.reset_counter()
-        graph = nx.DiGraph()
-        graph_list = []
+    def sample_friends(self, rng: np.random.Generator, start: int, end: int):
+        """
+        Number of friends of the students of universities start..end-1.
+        """
+        num_st = (end - start) * self.num_students
+        return (np.maximum(1, rng.poisson(self.lambda_f, size=num_st)),)
 
-        for uni_id in range(self.n_u):
-            # Create graph for a university
-            graph_uni = nx.DiGraph()
+    def sample_collaborations(self, rng: np.random.Generator, start: int, end: int):
+        """
+        Collaborations (uni_i, uni_j) of universities uni_i in start..end-1.
 
-            # Add university node
-            uni_name = NameGeneratorFRUNI.generate(EntityType.UNIVERSITY, uni_id=uni_id)
-            graph_uni.add_node(uni_name, category=EntityType.UNIVERSITY)
+        Each of the (end - start) * (n_u - 1) pairs is a collaboration with
+        probability alpha_u. Instead of drawing every pair, the number of
+        collaborations is drawn from the binomial distribution and that many
+        distinct pairs are sampled, in O(expected collaborations).
+        """
+        num_pairs = (end - start) * (self.n_u - 1)
+        num_collaborations = rng.binomial(num_pairs, self.alpha_u)
+        pairs = np.sort(rng.choice(num_pairs, num_collaborations, replace=False))
+        uni_i = start + pairs // (self.n_u - 1)
+        uni_j = pairs % (self.n_u - 1)
+        # Skip the diagonal
+        uni_j += uni_j >= uni_i
+        return uni_i, uni_j
 
-            friends_of_student = {}
+    def sample_block_edges(self, rng: np.random.Generator, start: int, end: int):
+        """
+        Number of friends of the students of universities start..end-1 and their
+        FRIEND_OF edges (student-friend edges, then friend cliques), with the ids
+        local to the block of `create_block`: [universities | students | friends].
+        """
+        (num_friends,) = self.sample_friends(rng, start, end)
+        fr_start = (end - start) + len(num_friends)
+        fr_student = np.repeat(np.arange(len(num_friends)), num_friends)
+        fr_head, fr_tail = self.friend_clique(num_friends, start)
+        return (
+            num_friends,
+            (end - start) + fr_student,
+            fr_start + np.arange(len(fr_student)),
+            fr_start + fr_head,
+            fr_start + fr_tail,
+        )
 
-            # Create students nodes and add edges to the university
-            for student_id in range(self.num_students):
-                student_name = NameGeneratorFRUNI.generate(
-                    EntityType.STUDENT, uni_id=uni_id, student_id=student_id
+    def collaborations(self) -> tuple[np.ndarray, np.ndarray]:
+        if self.alpha_u == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        uni_i, uni_j = self.sample_blocks(
+            self.n_u, self.sample_collaborations, RNGStream.LINKS
+        )
+        return uni_i, uni_j
+
+    def create_graph(self):
+        if self.backend == Backend.NUMPY:
+            num_friends, *edges = self.sample_blocks(
+                self.n_u, self.sample_block_edges, ragged=True
+            )
+            return self.create_store(num_friends, *edges)
+        return self.graph_from_blocks()
+
+    def iter_blocks(self):
+        for block, (start, end) in enumerate(
+            RNGUtils.blocks(self.n_u, self.block_size)
+        ):
+            (num_friends,) = self.sample_friends(
+                self.rng(RNGStream.COMPONENTS, block), start, end
+            )
+            if self.alpha_u > 0:
+                collaborations = self.sample_collaborations(
+                    self.rng(RNGStream.LINKS, block), start, end
                 )
-                graph_uni.add_node(student_name, category=EntityType.STUDENT)
-                graph_uni.add_edge(uni_name, student_name, relation=Relation.ENROLLS)
-                friend_list = []
-
-                # Create friends of students and add edges to the student
-                num_friends = max(1, int(np.random.poisson(self.lambda_f)))
-                for fr_id in range(num_friends):
-                    friend_name = NameGeneratorFRUNI.generate(
-                        EntityType.FRIEND,
-                        uni_id=uni_id,
-                        student_id=student_id,
-                        friend_id=fr_id,
-                    )
-                    friend_list.append(friend_name)
-                    graph_uni.add_node(friend_name, category=EntityType.FRIEND)
-                    graph_uni.add_edge(
-                        student_name,
-                        friend_name,
-                        relation=Relation.FRIEND_OF,
-                    )
-
-                friends_of_student[student_id] = friend_list
-            if uni_id < self.n_f:
-                # Add edges between friends of different students in the same uni
-                for student_id, friends in friends_of_student.items():
-                    for friend_i in friends:
-                        for student_id_j, friends_j in friends_of_student.items():
-                            if student_id_j == student_id:
-                                continue
-                            for friend_j in friends_j:
-                                graph_uni.add_edge(
-                                    friend_i, friend_j, relation=Relation.FRIEND_OF
-                                )
-            graph_list.append(graph_uni)
-
-        for graph_i in graph_list:
-            graph.add_nodes_from(graph_i.nodes(data=True))
-            graph.add_edges_from(graph_i.edges(data=True))
-
-        uni_nodes = GraphUtilsNX.filter_nodes_contain(graph, str(EntityType.UNIVERSITY))
-
-        # Add edges between universities
-        if self.alpha_u > 0:
-            for uni_i in range(self.n_u):
-                for uni_j in range(self.n_u):
-                    if uni_i == uni_j:
-                        continue
-                    if random.random() < self.alpha_u:
-                        uni_name_i = uni_nodes[uni_i]
-                        uni_name_j = uni_nodes[uni_j]
-                        graph.add_edge(
-                            uni_name_i, uni_name_j, relation=Relation.COLLABORATES_WITH
-                        )
-
-        return graph
+            else:
+                collaborations = (np.empty(0, np.int64), np.empty(0, np.int64))
+            yield self.create_block(start, end, num_friends, *collaborations)
+
+    def create_block(
+        self,
+        start: int,
+        end: int,
+        num_friends: np.ndarray,
+        uni_i: np.ndarray,
+        uni_j: np.ndarray,
+    ) -> GraphBlock:
+        """
+        Nodes and triples of universities start..end-1, given the sampled number of
+        friends of their students and their collaborations.
+        """
+        n_s = self.num_students
+        uni_names, st_names, fr_names = self.block_names(start, end, num_friends)
+        st_ids = np.arange(len(st_names))
+        fr_student = np.repeat(st_ids, num_friends)
+        fr_head, fr_tail = self.friend_clique(num_friends, start)
+        collaboration_names = EntityNames.format(
+            EntityType.UNIVERSITY, np.concatenate([uni_i, uni_j]).astype(np.int64)
+        )
+
+        triples = list(
+            zip(
+                [uni_names[u] for u in (st_ids // n_s).tolist()],
+                repeat(Relation.ENROLLS),
+                st_names,
+            )
+        )
+        triples.extend(
+            zip(
+                [st_names[st] for st in fr_student.tolist()],
+                repeat(Relation.FRIEND_OF),
+                fr_names,
+            )
+        )
+        # Friends of different students in the same uni
+        triples.extend(
+            (fr_names[h], Relation.FRIEND_OF, fr_names[t])
+            for h, t in zip(fr_head.tolist(), fr_tail.tolist())
+        )
+        # Collaborations between universities
+        triples.extend(
+            zip(
+                collaboration_names[: len(uni_i)],
+                repeat(Relation.COLLABORATES_WITH),
+                collaboration_names[len(uni_i) :],
+            )
+        )
+
+        ff = len(st_names) + len(fr_names) + np.arange(len(fr_head))
+        index = self.friend_explanation_index(
+            len(st_names), ff, fr_head, fr_tail, fr_student, len(triples)
+        )
+        return GraphBlock(
+            nodes=uni_names + st_names + fr_names,
+            categories=[EntityType.UNIVERSITY] * len(uni_names)
+            + [EntityType.STUDENT] * len(st_names)
+            + [EntityType.FRIEND] * len(fr_names),
+            triples=triples,
+            explain=functools.partial(self.indexed_explanations, triples, index),
+        )
+
+    def friend_clique(
+        self, num_friends: np.ndarray, start: int = 0
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        FRIEND_OF edges between friends of different students of the same
+        university, for the universities that foster friendship (the first n_f).
+
+        num_friends holds the number of friends of the students of universities
+        start, start + 1...; friends are indexed student by student, as in
+        np.repeat(students, num_friends). Every friend is linked to all the
+        friends of its university but the ones of its own student, which are
+        skipped over with offsets instead of building the dense per-university
+        Cartesian product.
+        """
+        n_s = self.num_students
+        fr_offsets = ArrayUtils.offsets(num_friends)
+        fr_student = np.repeat(np.arange(len(num_friends)), num_friends)
+        uni_offsets = fr_offsets[::n_s]
+
+        fr_clique = np.nonzero(start + fr_student // n_s < self.n_f)[0]
+        st_clique = fr_student[fr_clique]
+        uni_begin = uni_offsets[st_clique // n_s]
+        uni_count = uni_offsets[st_clique // n_s + 1] - uni_begin
+        own_begin = fr_offsets[st_clique] - uni_begin
+        own_count = num_friends[st_clique]
+        num_targets = uni_count - own_count
+
+        k = ArrayUtils.ragged_arange(num_targets)
+        own_begin = np.repeat(own_begin, num_targets)
+        own_count = np.repeat(own_count, num_targets)
+        # Skip over the friends of the head's own student
+        target = np.repeat(uni_begin, num_targets) + k + (k >= own_begin) * own_count
+        return np.repeat(fr_clique, num_targets), target
+
+    @Profiler.timed()
+    def create_store(
+        self,
+        num_friends: RaggedArray,
+        st_fr_head: RaggedArray,
+        st_fr_tail: RaggedArray,
+        fr_head: RaggedArray,
+        fr_tail: RaggedArray,
+    ) -> TripleStore:
+        """
+        Vectorized construction of the graph as a TripleStore, from the blocks of
+        `sample_block_edges`.
+
+        Node ids are laid out as [universities | students | friends]; the students
+        of a university and the friends of a student are contiguous. The block-local
+        ids of the edges are offset with `ArrayUtils.block_ids`.
+        """
+        n_u, n_s = self.n_u, self.num_students
+        num_st = n_u * n_s
+        st_start = n_u
+        self.num_friends = num_friends.values
+        num_fr = len(st_fr_head.values)
+
+        # Nodes of every block per category
+        fr_offsets = ArrayUtils.offsets(self.num_friends)
+        block_st = num_friends.lengths
+        block_fr = np.diff(fr_offsets[num_friends.offsets])
+        counts = np.stack([block_st // n_s, block_st, block_fr], axis=1)
+
+        st_ids = np.arange(num_st, dtype=np.int64)
+        heads = [st_ids // n_s]
+        tails = [st_start + st_ids]
+        rels = [np.full(num_st, 0)]
+        # Student-friend edges, then friends of different students in the same
+        # university (first n_f unis)
+        for head, tail in [(st_fr_head, st_fr_tail), (fr_head, fr_tail)]:
+            heads.append(ArrayUtils.block_ids(head.values, head.lengths, counts))
+            tails.append(ArrayUtils.block_ids(tail.values, tail.lengths, counts))
+            rels.append(np.full(len(head.values), 1))
+        self.friend_student = heads[1] - st_start
+
+        # Edges between universities
+        uni_i, uni_j = self.collaborations()
+        heads.append(uni_i)
+        tails.append(uni_j)
+        rels.append(np.full(len(uni_i), 2))
+
+        store = TripleStore(
+            entities=self.node_names,
+            relations=self.relation_list,
+            categories=np.repeat(np.arange(3), [n_u, num_st, num_fr]),
+            category_list=self.category_list,
+        )
+        store.add_triples(
+            np.concatenate(heads), np.concatenate(rels), np.concatenate(tails)
+        )
+        return store
+
+    def node_names(self):
+        uni_names, st_names, fr_names = self.map_blocks(
+            self.n_u, self.block_name_arrays
+        )
+        return uni_names.tolist() + st_names.tolist() + fr_names.tolist()
+
+    def block_name_arrays(self, start: int, end: int) -> tuple[np.ndarray, ...]:
+        """
+        `block_names` of universities start..end-1 as arrays, for `map_blocks`.
+        """
+        n_s = self.num_students
+        num_friends = self.num_friends[start * n_s : end * n_s]
+        names = self.block_names(start, end, num_friends)
+        return tuple(np.array(category, dtype=str) for category in names)
+
+    def block_names(
+        self, start: int, end: int, num_friends: np.ndarray
+    ) -> tuple[list[str], list[str], list[str]]:
+        """
+        Names of the universities start..end-1, of their students and of the friends
+        of their students.
+        """
+        n_s = self.num_students
+        st_ids = np.arange((end - start) * n_s)
+        st_uni = start + st_ids // n_s
+        st_local = st_ids % n_s
+        fr_student = np.repeat(st_ids, num_friends)
+
+        uni_names = EntityNames.format(EntityType.UNIVERSITY, np.arange(start, end))
+        st_names = EntityNames.format(EntityType.STUDENT, st_uni, st_local)
+        fr_names = EntityNames.format(
+            EntityType.FRIEND,
+            st_uni[fr_student],
+            st_local[fr_student],
+            ArrayUtils.ragged_arange(num_friends),
+        )
+        return uni_names, st_names, fr_names
+
+    def get_explanations(self, heads, rels, tails):
+        return self.explanations_in_layout(self.friend_explanations, heads, rels, tails)
+
+    def layout_ids(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Ids of the store in the layout of `create_store`, from the university,
+        student and friend ids of the entity names. `num_friends` and
+        `friend_student` are derived along the way.
+        """
+        store = self.store
+        n_s = self.num_students
+        num_st = self.n_u * n_s
+        uni, st, fr = (store.category_ids(category) for category in self.category_list)
+
+        def parts(ids: np.ndarray) -> np.ndarray:
+            return store.name_ids.take(ids).values.reshape(len(ids), -1).T
+
+        fr_uni, fr_st, fr_local = parts(fr)
+        fr_student = fr_uni * n_s + fr_st
+        self.num_friends = np.bincount(fr_student, minlength=num_st)
+        self.friend_student = np.repeat(np.arange(num_st), self.num_friends)
+        fr_offsets = ArrayUtils.offsets(self.num_friends)
+        st_uni, st_local = parts(st)
+
+        entity_ids = np.empty(store.num_entities, dtype=np.int64)
+        entity_ids[uni] = parts(uni)[0]
+        entity_ids[st] = self.n_u + st_uni * n_s + st_local
+        entity_ids[fr] = self.n_u + num_st + fr_offsets[fr_student] + fr_local
+        relation_ids = np.array(
+            [self.relation_list.index(r) for r in store.relations], dtype=np.int64
+        )
+        return entity_ids, relation_ids
+
+    def friend_explanations(self, heads, rels, tails) -> RaggedArray:
+        """
+        `get_explanations` over ids in the layout of `create_store`.
+        """
+        uni, st, fr = 0, 1, 2
+        enrolls = self.relation_list.index(Relation.ENROLLS)
+        friend_of = self.relation_list.index(Relation.FRIEND_OF)
+        n_s = self.num_students
+        st_start = self.n_u
+        fr_start = self.n_u + len(self.num_friends)
+
+        bounds = [st_start, fr_start]
+        h_cat = np.searchsorted(bounds, heads, side="right")
+        t_cat = np.searchsorted(bounds, tails, side="right")
+        valid = (
+            ((h_cat == uni) & ((t_cat == uni) | (t_cat == st)))
+            | ((h_cat == st) & (t_cat == fr))
+            | ((h_cat == fr) & ((t_cat == st) | (t_cat == fr)))
+        )
+        if not np.all(valid):
+            i = np.nonzero(~valid)[0][0]
+            raise ValueError(f"Wrong triple ({heads[i]}, {rels[i]}, {tails[i]})")
+
+        # Friend-friend triples are explained through the students (and uni)
+        ff = np.nonzero((h_cat == fr) & (t_cat == fr))[0]
+        st_h = st_start + self.friend_student[heads[ff] - fr_start]
+        st_t = st_start + self.friend_student[tails[ff] - fr_start]
+        uni_h = (st_h - st_start) // n_s
+        if np.any(uni_h != (st_t - st_start) // n_s):
+            i = ff[np.nonzero(uni_h != (st_t - st_start) // n_s)[0][0]]
+            raise ValueError(f"Wrong triple ({heads[i]}, {rels[i]}, {tails[i]})")
+        inter = st_h != st_t
+
+        lengths = np.ones(len(heads), dtype=np.int64)
+        lengths[ff] += 2 + 2 * inter
+        explanations = RaggedArray.from_lengths(
+            np.empty((int(lengths.sum()), 3), dtype=np.int64), lengths
+        )
+        values = explanations.values
+        start = explanations.offsets[:-1]
+        values[start] = np.stack([heads, rels, tails], axis=1)
+
+        start = start[ff]
+        values[start + 1] = np.stack([heads[ff], np.full(len(ff), friend_of), st_h], 1)
+        values[start + 2] = np.stack([tails[ff], np.full(len(ff), friend_of), st_t], 1)
+        start, st_h, st_t, uni_h = start[inter], st_h[inter], st_t[inter], uni_h[inter]
+        values[start + 3] = np.stack([st_h, np.full(len(start), enrolls), uni_h], 1)
+        values[start + 4] = np.stack([st_t, np.full(len(start), enrolls), uni_h], 1)
+        return explanations
+
+    def create_explanation_index(self) -> RaggedArray:
+        if self.backend != Backend.NUMPY:
+            return super().create_explanation_index()
+
+        num_st = self.n_u * self.num_students
+        fr_start = self.n_u + num_st
+        store = self.store
+        ff = np.nonzero(store.categories[store.heads] == 2)[0]
+        fr_head = store.heads[ff].astype(np.int64) - fr_start
+        fr_tail = store.tails[ff].astype(np.int64) - fr_start
+        return self.friend_explanation_index(
+            num_st, ff, fr_head, fr_tail, self.friend_student, len(store)
+        )
+
+    @staticmethod
+    def friend_explanation_index(
+        num_st: int,
+        ff: np.ndarray,
+        fr_head: np.ndarray,
+        fr_tail: np.ndarray,
+        friend_student: np.ndarray,
+        num_edges: int,
+    ) -> RaggedArray:
+        """
+        Explanation index of `num_edges` edges laid out as [enrolls | student-friend
+        | friend cliques | unis] (see `create_store` and `create_block`), ff being
+        the positions of the friend-friend edges (fr_head, fr_tail).
+        """
+        # A friend-friend edge is explained by the reversed student-friend edges of
+        # its friends and, between different students, by their reversed enrolls
+        # edges.
+        st_h = friend_student[fr_head]
+        st_t = friend_student[fr_tail]
+        inter = st_h != st_t
+
+        lengths = np.ones(num_edges, dtype=np.int64)
+        lengths[ff] += 2 + 2 * inter
+        index = RaggedArray.from_lengths(
+            np.empty(int(lengths.sum()), dtype=np.int64), lengths
+        )
+        values = index.values
+        start = index.offsets[:-1]
+        values[start] = np.arange(len(lengths))
+
+        start = start[ff]
+        values[start + 1] = ~(num_st + fr_head)
+        values[start + 2] = ~(num_st + fr_tail)
+        values[start[inter] + 3] = ~st_h[inter]
+        values[start[inter] + 4] = ~st_t[inter]
+        return index
 
     def get_explanation(self, head: str, relation: str, tail: str):
-        head_type = head.split("-")[0]
-        tail_type = tail.split("-")[0]
+        head_type, head_ids = self.entity_parts(head)
+        tail_type, tail_ids = self.entity_parts(tail)
 
         uni_type = EntityType.UNIVERSITY
         student_type = EntityType.STUDENT
@@ -156,16 +499,16 @@ class FRUNIDataset(SyntheticDataset):
         elif head_type == friend_type and tail_type == student_type:
             explanation.append((head, relation, tail))
         elif head_type == friend_type and tail_type == friend_type:
-            uni_h, st_h, idx_h = head.split("-")[1:]
-            uni_t, st_t, idx_t = tail.split("-")[1:]
+            uni_h, st_h, _ = head_ids
+            uni_t, st_t, _ = tail_ids
             if uni_t != uni_h:
                 raise ValueError(f"Wrong triple ({head}, {relation}, {tail})")
             explanation.append((head, relation, tail))
-            st_h_name = f"{student_type}-{uni_t}-{st_h}"
+            st_h_name = EntityNames.name(student_type, uni_t, st_h)
             explanation.append((head, Relation.FRIEND_OF, st_h_name))
-            st_t_name = f"{student_type}-{uni_t}-{st_t}"
+            st_t_name = EntityNames.name(student_type, uni_t, st_t)
             explanation.append((tail, Relation.FRIEND_OF, st_t_name))
-            uni_name = f"{uni_type}-{uni_h}"
+            uni_name = EntityNames.name(uni_type, uni_h)
             if st_h != st_t:  # Inter edge
                 explanation.append((st_h_name, Relation.ENROLLS, uni_name))
                 explanation.append((st_t_name, Relation.ENROLLS, uni_name))
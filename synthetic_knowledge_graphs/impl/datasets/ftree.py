@@ -1,12 +1,19 @@
-import random
-
-
-import networkx as nx
-
+import functools
 
 from synthetic_knowledge_graphs.core.contracts.synthetic_dataset import SyntheticDataset
-from synthetic_knowledge_graphs.core.entities.name_generator import NameGeneratorFTREE
-from synthetic_knowledge_graphs.core.values.constants import EntityType, Relation
+from synthetic_knowledge_graphs.core.entities.array_utils import ArrayUtils
+from synthetic_knowledge_graphs.core.entities.entity_names import EntityNames
+from synthetic_knowledge_graphs.core.entities.profiler import Profiler
+from synthetic_knowledge_graphs.core.entities.ragged_array import RaggedArray
+from synthetic_knowledge_graphs.core.entities.rng_utils import RNGUtils
+from synthetic_knowledge_graphs.core.entities.triple_store import TripleStore
+from synthetic_knowledge_graphs.core.values.constants import (
+    Backend,
+    EntityType,
+    Relation,
+    RNGStream,
+)
+from synthetic_knowledge_graphs.core.values.graph_block import GraphBlock
 
 
 import numpy as np
@@ -22,8 +29,21 @@ class FTREEDataset(SyntheticDataset):
         lambda_b (float): The average number of branches per family tree
 
         n_d (int): The number of different lengths of descendants
+
+        backend (str, optional): `Backend.NETWORKX` (default), `Backend.NUMPY` or
+            `Backend.STREAM`. The numpy backend fills the TripleStore with edges
+            grouped by tree, with `tree_offsets` delimiting the edges of each tree.
+            The stream backend generates the trees block by block (see `iter_blocks`).
     """
 
+    backends = (Backend.NETWORKX, Backend.NUMPY, Backend.STREAM)
+    category_list = [
+        EntityType.PROGENITOR,
+        EntityType.KID,
+        EntityType.HOBBIE,
+        EntityType.LAST_KID,
+    ]
+
     def __init__(
         self,
         n_t: int,
@@ -35,9 +55,21 @@ class FTREEDataset(SyntheticDataset):
         self.n_t = n_t
         self.lambda_b = lambda_b
         self.n_d = n_d
+        self.relation_list = self.relations(n_d)
+        self.edge_keys = list(self.relation_list)
 
         super().__init__(**kwargs)
 
+    @staticmethod
+    def relations(n_d: int) -> list[str]:
+        return [Relation.ANCESTOR_OF] + [
+            Relation.SENTIMENT(b_len) for b_len in range(1, n_d + 1)
+        ]
+
+    def upgrade_legacy(self) -> None:
+        super().upgrade_legacy()
+        self.relation_list = self.relations(self.n_d)
+
     def _id_str(self):
         return {
             "n_t": self.n_t,
@@ -45,73 +77,290 @@ class FTREEDataset(SyntheticDataset):
             "n_d": self.n_d,
         }
 
-    def create_graph(self):
-        NameGeneratorFTREE.reset_counter()
-        graph = nx.DiGraph()
-
-        graph_list = []
-
-        b_len_list = list(range(1, self.n_d + 1))
-
-        for tree_id in range(self.n_t):
-            # Create graph for a family tree
-            graph_c = nx.DiGraph()
+    def sample_trees(self, rng: np.random.Generator, start: int, end: int):
+        """
+        Number of branches of trees start..end-1 and length of each of their branches.
+        """
+        num_branches = np.maximum(2, rng.poisson(self.lambda_b, size=end - start))
+        branch_lengths = rng.integers(1, self.n_d + 1, size=int(num_branches.sum()))
+        return num_branches, branch_lengths
+
+    def sample_block_edges(self, rng: np.random.Generator, start: int, end: int):
+        """
+        Branches of trees start..end-1 (see `sample_trees`) and their edges, with
+        the ids local to the block of `branch_edges`.
+        """
+        num_branches, branch_lengths = self.sample_trees(rng, start, end)
+        heads, rels, tails = self.branch_edges(num_branches, branch_lengths)
+        return num_branches, branch_lengths, heads, rels, tails
 
-            # Add progenitor node
-            progneitor_name = NameGeneratorFTREE.generate(
-                EntityType.PROGENITOR, tree_id
+    def create_graph(self):
+        if self.backend == Backend.NUMPY:
+            blocks = self.sample_blocks(self.n_t, self.sample_block_edges, ragged=True)
+            return self.create_store(*blocks)
+        return self.graph_from_blocks()
+
+    def iter_blocks(self):
+        for block, (start, end) in enumerate(
+            RNGUtils.blocks(self.n_t, self.block_size)
+        ):
+            num_branches, branch_lengths = self.sample_trees(
+                self.rng(RNGStream.COMPONENTS, block), start, end
             )
+            yield self.create_block(start, end, num_branches, branch_lengths)
 
-            graph_c.add_node(progneitor_name, category=EntityType.PROGENITOR)
-
-            # Add branches
-            num_branches = max(2, np.random.poisson(self.lambda_b))
-
-            for branch_id in range(num_branches):
-                # Sample b_len from b_len_list
-                b_len = random.choice(b_len_list)
-                for kid_id in range(b_len):
-                    kid_name = NameGeneratorFTREE.generate(
-                        EntityType.KID, tree_id, branch_id, kid_id
-                    )
-                    graph_c.add_node(kid_name, category=EntityType.KID)
-
-                    if kid_id == 0:
-                        graph_c.add_edge(
-                            progneitor_name, kid_name, relation=Relation.ANCESTOR_OF
-                        )
-                    else:
-                        kid_prev_name = NameGeneratorFTREE.generate(
-                            EntityType.KID, tree_id, branch_id, kid_id - 1
-                        )
-                        graph_c.add_edge(
-                            kid_prev_name, kid_name, relation=Relation.ANCESTOR_OF
-                        )
-
-                hobbie_name = NameGeneratorFTREE.generate(
-                    EntityType.HOBBIE, tree_id, branch_id
-                )
-                graph_c.add_node(hobbie_name, category=EntityType.HOBBIE)
-
-                tail_relation = Relation.SENTIMENT(b_len)
-
-                graph_c.add_edge(kid_name, hobbie_name, relation=tail_relation)
-                last_kid_name = NameGeneratorFTREE.generate(
-                    EntityType.LAST_KID, tree_id, branch_id
-                )
-                graph_c.add_node(last_kid_name, category=EntityType.LAST_KID)
-                graph_c.add_edge(kid_name, last_kid_name, relation=Relation.ANCESTOR_OF)
-
-            graph_list.append(graph_c)
-
-        for graph_i in graph_list:
-            graph.add_nodes_from(graph_i.nodes(data=True))
-            graph.add_edges_from(graph_i.edges(data=True))
-
-        self.edge_keys = [Relation.ANCESTOR_OF]
-        self.edge_keys.extend([Relation.SENTIMENT(b_len) for b_len in b_len_list])
-
-        return graph
+    def create_block(
+        self,
+        start: int,
+        end: int,
+        num_branches: np.ndarray,
+        branch_lengths: np.ndarray,
+    ) -> GraphBlock:
+        """
+        Nodes and triples of trees start..end-1, given their sampled branches.
+        """
+        names = self.block_names(start, num_branches, branch_lengths)
+        heads, rels, tails = self.branch_edges(num_branches, branch_lengths)
+        num_br = len(branch_lengths)
+        categories = [EntityType.PROGENITOR] * len(num_branches)
+        categories += [EntityType.KID] * (len(names) - len(num_branches) - 2 * num_br)
+        categories += [EntityType.HOBBIE] * num_br + [EntityType.LAST_KID] * num_br
+
+        relations = self.relation_list
+        triples = [
+            (names[h], relations[r], names[t])
+            for h, r, t in zip(heads.tolist(), rels.tolist(), tails.tolist())
+        ]
+        index = self.branch_explanation_index(branch_lengths)
+        return GraphBlock(
+            nodes=names,
+            categories=categories,
+            triples=triples,
+            explain=functools.partial(self.indexed_explanations, triples, index),
+        )
+
+    def branch_edges(
+        self, num_branches: np.ndarray, branch_lengths: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Edges (heads, rels, tails) of consecutive trees with the given branches.
+
+        Node ids are laid out as [progenitors | kids | hobbies | last kids] of these
+        trees. Every branch of length b_len contributes b_len + 2 consecutive edges:
+        the ANCESTOR_OF chain from the progenitor, the sent_{b_len} edge to the hobby
+        and the ANCESTOR_OF edge to the last kid.
+        """
+        num_t, num_br = len(num_branches), len(branch_lengths)
+        kid_offsets = ArrayUtils.offsets(branch_lengths)
+
+        kid_start = num_t
+        ho_start = kid_start + int(kid_offsets[-1])
+        lkid_start = ho_start + num_br
+
+        branch_tree = np.repeat(np.arange(num_t), num_branches)
+        edges_per_branch = branch_lengths + 2
+        edge_branch = np.repeat(np.arange(num_br), edges_per_branch)
+        k = ArrayUtils.ragged_arange(edges_per_branch)
+        b_len = branch_lengths[edge_branch]
+        kid = kid_start + kid_offsets[edge_branch]
+
+        heads = np.where(
+            k == 0, branch_tree[edge_branch], kid + np.minimum(k, b_len) - 1
+        )
+        tails = np.where(
+            k < b_len,
+            kid + k,
+            np.where(k == b_len, ho_start, lkid_start) + edge_branch,
+        )
+        rels = np.where(k == b_len, b_len, 0)
+        return heads, rels, tails
+
+    def block_names(
+        self, start: int, num_branches: np.ndarray, branch_lengths: np.ndarray
+    ) -> list[str]:
+        """
+        Names of the nodes of trees start, start + 1..., laid out as in `branch_edges`.
+        """
+        num_t, num_br = len(num_branches), len(branch_lengths)
+        branch_tree = start + np.repeat(np.arange(num_t), num_branches)
+        branch_local = ArrayUtils.ragged_arange(num_branches)
+        kid_branch = np.repeat(np.arange(num_br), branch_lengths)
+
+        names = EntityNames.format(
+            EntityType.PROGENITOR, np.arange(start, start + num_t)
+        )
+        names += EntityNames.format(
+            EntityType.KID,
+            branch_tree[kid_branch],
+            branch_local[kid_branch],
+            ArrayUtils.ragged_arange(branch_lengths),
+        )
+        for category in [EntityType.HOBBIE, EntityType.LAST_KID]:
+            names += EntityNames.format(category, branch_tree, branch_local)
+        return names
+
+    @Profiler.timed()
+    def create_store(
+        self,
+        num_branches: RaggedArray,
+        branch_lengths: RaggedArray,
+        heads: RaggedArray,
+        rels: RaggedArray,
+        tails: RaggedArray,
+    ) -> TripleStore:
+        """
+        Vectorized construction of the family trees as a TripleStore, from the
+        blocks of `sample_block_edges`, with the node layout of `branch_edges`. The
+        block-local ids of the edges are offset with `ArrayUtils.block_ids`. The
+        edges of every tree are contiguous and delimited by `tree_offsets`.
+        """
+        self.num_branches = num_branches.values
+        self.branch_lengths = branch_lengths.values
+        num_br = len(self.branch_lengths)
+        self.kid_offsets = ArrayUtils.offsets(self.branch_lengths)
+        self.branch_tree = np.repeat(np.arange(self.n_t), self.num_branches)
+        num_kids = int(self.kid_offsets[-1])
+
+        # Nodes of every block per category
+        block_br = branch_lengths.lengths
+        block_kids = np.diff(self.kid_offsets[branch_lengths.offsets])
+        counts = np.stack([num_branches.lengths, block_kids, block_br, block_br], 1)
+        heads = ArrayUtils.block_ids(heads.values, heads.lengths, counts)
+        tails = ArrayUtils.block_ids(tails.values, tails.lengths, counts)
+        rels = rels.values
+
+        tree_edges = np.bincount(
+            self.branch_tree, weights=self.branch_lengths + 2, minlength=self.n_t
+        )
+        self.tree_offsets = ArrayUtils.offsets(tree_edges.astype(np.int64))
+
+        store = TripleStore(
+            entities=self.node_names,
+            relations=self.relation_list,
+            categories=np.repeat(np.arange(4), [self.n_t, num_kids, num_br, num_br]),
+            category_list=self.category_list,
+        )
+        store.add_triples(heads, rels, tails)
+        return store
+
+    def node_names(self):
+        names = self.map_blocks(self.n_t, self.block_name_arrays)
+        return [name for category in names for name in category.tolist()]
+
+    def block_name_arrays(self, start: int, end: int) -> list[np.ndarray]:
+        """
+        `block_names` of trees start..end-1 as an array per category, for
+        `map_blocks`.
+        """
+        br_start, br_end = np.searchsorted(self.branch_tree, [start, end])
+        branch_lengths = self.branch_lengths[br_start:br_end]
+        num_br = br_end - br_start
+        names = self.block_names(start, self.num_branches[start:end], branch_lengths)
+        sizes = [end - start, int(branch_lengths.sum()), num_br]
+        return np.split(np.array(names, dtype=str), np.cumsum(sizes))
+
+    def get_explanations(self, heads, rels, tails):
+        return self.explanations_in_layout(self.branch_explanations, heads, rels, tails)
+
+    def layout_ids(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Ids of the store in the layout of `branch_edges`, from the tree, branch and
+        kid ids of the entity names. `num_branches`, `branch_lengths`,
+        `kid_offsets` and `branch_tree` are derived along the way.
+        """
+        store = self.store
+        progenitor, kid, hobbie, last_kid = (
+            store.category_ids(category) for category in self.category_list
+        )
+
+        def parts(ids: np.ndarray) -> np.ndarray:
+            return store.name_ids.take(ids).values.reshape(len(ids), -1).T
+
+        ho_tree, ho_branch = parts(hobbie)
+        self.num_branches = np.bincount(ho_tree, minlength=self.n_t)
+        branch_offsets = ArrayUtils.offsets(self.num_branches)
+        num_br = int(branch_offsets[-1])
+        kid_tree, kid_branch, kid_local = parts(kid)
+        kid_branch = branch_offsets[kid_tree] + kid_branch
+        self.branch_lengths = np.bincount(kid_branch, minlength=num_br)
+        self.kid_offsets = ArrayUtils.offsets(self.branch_lengths)
+        self.branch_tree = np.repeat(np.arange(self.n_t), self.num_branches)
+        ho_start = self.n_t + int(self.kid_offsets[-1])
+        lkid_tree, lkid_branch = parts(last_kid)
+
+        entity_ids = np.empty(store.num_entities, dtype=np.int64)
+        entity_ids[progenitor] = parts(progenitor)[0]
+        entity_ids[kid] = self.n_t + self.kid_offsets[kid_branch] + kid_local
+        entity_ids[hobbie] = ho_start + branch_offsets[ho_tree] + ho_branch
+        entity_ids[last_kid] = (
+            ho_start + num_br + branch_offsets[lkid_tree] + lkid_branch
+        )
+        relation_ids = np.array(
+            [self.relation_list.index(r) for r in store.relations], dtype=np.int64
+        )
+        return entity_ids, relation_ids
+
+    def branch_explanations(self, heads, rels, tails) -> RaggedArray:
+        """
+        `get_explanations` over ids in the layout of `branch_edges`.
+        """
+        kid, hobbie = 1, 2
+        ho_start = self.n_t + int(self.kid_offsets[-1])
+        bounds = [self.n_t, ho_start, ho_start + len(self.branch_lengths)]
+
+        # Relation id b_len > 0 is sent_{b_len}, whose explanation is the branch
+        sent = np.nonzero(rels > 0)[0]
+        h_cat = np.searchsorted(bounds, heads[sent], side="right")
+        t_cat = np.searchsorted(bounds, tails[sent], side="right")
+        valid = (h_cat == kid) & (t_cat == hobbie)
+        if not np.all(valid):
+            i = sent[np.nonzero(~valid)[0][0]]
+            raise ValueError(f"Wrong triple ({heads[i]}, {rels[i]}, {tails[i]})")
+
+        lengths = np.ones(len(heads), dtype=np.int64)
+        lengths[sent] += rels[sent]
+        explanations = RaggedArray.from_lengths(
+            np.empty((int(lengths.sum()), 3), dtype=np.int64), lengths
+        )
+        values = explanations.values
+        start = explanations.offsets[:-1]
+        values[start] = np.stack([heads, rels, tails], axis=1)
+
+        branch = tails[sent] - ho_start
+        b_len = rels[sent]
+        j = ArrayUtils.ragged_arange(b_len)
+        kid_tail = np.repeat(self.n_t + self.kid_offsets[branch], b_len) + j
+        kid_head = np.where(
+            j == 0, np.repeat(self.branch_tree[branch], b_len), kid_tail - 1
+        )
+        position = np.repeat(start[sent] + 1, b_len) + j
+        values[position] = np.stack([kid_head, np.zeros_like(j), kid_tail], axis=1)
+        return explanations
+
+    def create_explanation_index(self) -> RaggedArray:
+        if self.backend != Backend.NUMPY:
+            return super().create_explanation_index()
+        return self.branch_explanation_index(self.branch_lengths)
+
+    @staticmethod
+    def branch_explanation_index(branch_lengths: np.ndarray) -> RaggedArray:
+        """
+        Explanation index of the edges of `branch_edges` for the given branches.
+        """
+        # The sent_{b_len} edge of a branch is explained by the b_len edges before it
+        branch_offsets = ArrayUtils.offsets(branch_lengths + 2)
+        sent = branch_offsets[:-1] + branch_lengths
+        lengths = np.ones(int(branch_offsets[-1]), dtype=np.int64)
+        lengths[sent] += branch_lengths
+        index = RaggedArray.from_lengths(
+            np.empty(int(lengths.sum()), dtype=np.int64), lengths
+        )
+        index.values[index.offsets[:-1]] = np.arange(len(lengths))
+
+        j = ArrayUtils.ragged_arange(branch_lengths)
+        position = np.repeat(index.offsets[sent] + 1, branch_lengths) + j
+        index.values[position] = np.repeat(branch_offsets[:-1], branch_lengths) + j
+        return index
 
     def get_explanation(self, head: str, relation: str, tail: str):
         explanation = []
@@ -119,32 +368,18 @@ class FTREEDataset(SyntheticDataset):
             explanation.append((head, relation, tail))
         elif Relation.SENTIMENT() in relation:
             explanation.append((head, relation, tail))
-            head_list = head.split("-")
-            assert len(head_list) == 4
-            h_tree_id, h_branch_id, h_kid_id = head_list[1:]
-
-            tail_list = tail.split("-")
-            assert len(tail_list) == 3
-            t_name, t_tree_id, t_branch_id = tail_list
-            assert h_tree_id == t_tree_id
-            assert h_branch_id == t_branch_id
-
-            b_len = int(relation.split("_")[-1])
-            progenitor_name = NameGeneratorFTREE.generate(
-                EntityType.PROGENITOR, t_tree_id
+            h_category, h_ids = self.entity_parts(head)
+            t_category, t_ids = self.entity_parts(tail)
+            assert h_category == EntityType.KID and t_category == EntityType.HOBBIE
+            # Head and tail belong to the same branch (tree id, branch id)
+            assert h_ids[:2] == t_ids
+
+            b_len = self.relation_list.index(relation)
+            branch = [EntityNames.name(EntityType.PROGENITOR, t_ids[0])]
+            branch += EntityNames.format(EntityType.KID, *t_ids, np.arange(b_len))
+            explanation.extend(
+                (branch[i], Relation.ANCESTOR_OF, branch[i + 1]) for i in range(b_len)
             )
-            branch = Relation.ANCESTOR_OF
-            for kid_id in range(b_len):
-                kid_name = NameGeneratorFTREE.generate(
-                    EntityType.KID, t_tree_id, t_branch_id, kid_id
-                )
-                if kid_id == 0:
-                    explanation.append((progenitor_name, branch, kid_name))
-                else:
-                    kid_prev_name = NameGeneratorFTREE.generate(
-                        EntityType.KID, t_branch_id, t_branch_id, kid_id - 1
-                    )
-                    explanation.append((kid_prev_name, branch, kid_name))
 
         else:
             raise ValueError(f"Wrong triple ({head}, {relation}, {tail})")
@@ -1,12 +1,20 @@
-import random
-
-
-import networkx as nx
-
+import functools
 
 from synthetic_knowledge_graphs.core.contracts.synthetic_dataset import SyntheticDataset
-from synthetic_knowledge_graphs.core.entities.name_generator import NameGeneratorUIA
-from synthetic_knowledge_graphs.core.values.constants import EntityType, Relation
+from synthetic_knowledge_graphs.core.entities.array_utils import ArrayUtils
+from synthetic_knowledge_graphs.core.entities.entity_names import EntityNames
+from synthetic_knowledge_graphs.core.entities.node_index import IndexedDiGraph
+from synthetic_knowledge_graphs.core.entities.profiler import Profiler
+from synthetic_knowledge_graphs.core.entities.ragged_array import RaggedArray
+from synthetic_knowledge_graphs.core.entities.rng_utils import RNGUtils
+from synthetic_knowledge_graphs.core.entities.triple_store import TripleStore
+from synthetic_knowledge_graphs.core.values.constants import (
+    Backend,
+    EntityType,
+    Relation,
+    RNGStream,
+)
+from synthetic_knowledge_graphs.core.values.graph_block import GraphBlock
 
 
 import numpy as np
@@ -22,8 +30,20 @@ class UserItemAttrDataset(SyntheticDataset):
     - num_u (int): The number of users in the dataset.
     - lambda_a (float): The average number of attributes that an item possesses.
     - lambda_i (float):The average number of items that a user has bought.
+    - backend (str, optional): `Backend.NETWORKX` (default), `Backend.NUMPY` or
+      `Backend.STREAM`. The numpy backend builds the TripleStore directly with
+      vectorized sampling; the stream backend generates users block by block (see
+      `iter_blocks`).
+
+    Both backends keep a compact representation of the features: node features are
+    described by `x_index`/`x_fill` (see `node_features`), edge features by the
+    relation id (rows of `rel_emb_matrix`) and the attribute of each user by
+    `user_attr`.
     """
 
+    backends = (Backend.NETWORKX, Backend.NUMPY, Backend.STREAM)
+    relation_list = [Relation.HELD_BY, Relation.BOUGHT_BY]
+
     def __init__(
         self,
         num_attrs: int,
@@ -57,14 +77,164 @@ class UserItemAttrDataset(SyntheticDataset):
             "lambda_i": self.lambda_i,
         }
 
+    @property
+    def rel_emb(self):
+        return {r: self.rel_emb_matrix[i] for i, r in enumerate(self.relation_list)}
+
+    def sample_items(self, rng: np.random.Generator, start: int, end: int):
+        """
+        Attributes (held_attr, held_item) of items start..end-1.
+        """
+        num_it = end - start
+        if self.lambda_a > 0.0:
+            n_attr = np.maximum(1, rng.poisson(self.lambda_a, size=num_it))
+        else:
+            n_attr = np.ones(num_it, dtype=np.int64)
+        n_attr = np.minimum(n_attr, self.num_attr)
+        held_attr = ArrayUtils.sample_without_replacement(
+            np.full(num_it, self.num_attr), n_attr, random=rng
+        )
+        held_item = start + np.repeat(np.arange(num_it), n_attr)
+        return held_attr, held_item
+
+    def sample_users(self, rng: np.random.Generator, start: int, end: int):
+        """
+        Attribute of users start..end-1 and their purchases (bought_item,
+        bought_user). Requires the attribute -> items index.
+        """
+        num_u = end - start
+        user_attr = rng.integers(0, self.num_attr, size=num_u)
+        n_items = np.maximum(1, rng.poisson(self.lambda_i, size=num_u))
+        degree = np.diff(self.attr_item_indptr)[user_attr]
+        n_items = np.minimum(n_items, degree)
+        position = ArrayUtils.sample_without_replacement(degree, n_items, random=rng)
+        bought_user = start + np.repeat(np.arange(num_u), n_items)
+        bought_item = self.attr_item_indices[
+            np.repeat(self.attr_item_indptr[user_attr], n_items) + position
+        ]
+        return user_attr, bought_item, bought_user
+
+    def sample_edges(self):
+        """
+        Sample the HELD_BY and BOUGHT_BY edges, as (attr, item) and (item, user)
+        pairs. Items and users are sampled in independent blocks.
+
+        Items of every attribute are indexed with a CSR structure
+        (`attr_item_indptr`, `attr_item_indices`) so that all users are sampled in
+        bulk.
+        """
+        held_attr, held_item = self.sample_blocks(self.num_it, self.sample_items)
+
+        # CSR index attribute -> items
+        order = np.argsort(held_attr, kind="stable")
+        self.attr_item_indptr = ArrayUtils.offsets(
+            np.bincount(held_attr, minlength=self.num_attr)
+        )
+        self.attr_item_indices = held_item[order]
+
+        self.user_attr, bought_item, bought_user = self.sample_blocks(
+            self.num_u, self.sample_users, RNGStream.LINKS
+        )
+        return held_attr, held_item, bought_item, bought_user
+
+    def iter_blocks(self):
+        """
+        Attributes come in a first block, followed by blocks of items and blocks of
+        users. The attribute -> items index is kept in memory to sample the users,
+        and `user_attr` is filled as the users are generated.
+        """
+        attr_names = EntityNames.format(EntityType.ATTRIBUTE, np.arange(self.num_attr))
+        yield GraphBlock(
+            nodes=attr_names,
+            categories=[EntityType.ATTRIBUTE] * self.num_attr,
+            triples=[],
+        )
+
+        held_attr, held_item = self.sample_blocks(self.num_it, self.sample_items)
+        order = np.argsort(held_attr, kind="stable")
+        self.attr_item_indptr = ArrayUtils.offsets(
+            np.bincount(held_attr, minlength=self.num_attr)
+        )
+        self.attr_item_indices = held_item[order]
+        held_offsets = ArrayUtils.offsets(np.bincount(held_item, minlength=self.num_it))
+
+        item_name = EntityNames.formatter(EntityType.ITEM, 1)
+        for start, end in RNGUtils.blocks(self.num_it, self.block_size):
+            held = slice(held_offsets[start], held_offsets[end])
+            triples = [
+                (attr_names[attr], Relation.HELD_BY, item_name(it))
+                for attr, it in zip(held_attr[held].tolist(), held_item[held].tolist())
+            ]
+            # HELD_BY triples explain themselves
+            index = RaggedArray(np.arange(len(triples)), np.arange(len(triples) + 1))
+            yield GraphBlock(
+                nodes=[item_name(i) for i in range(start, end)],
+                categories=[EntityType.ITEM] * (end - start),
+                triples=triples,
+                explain=functools.partial(self.indexed_explanations, triples, index),
+            )
+
+        user_name = EntityNames.formatter(EntityType.USER, 1)
+        self.user_attr = np.zeros(self.num_u, dtype=np.int64)
+        for block, (start, end) in enumerate(
+            RNGUtils.blocks(self.num_u, self.block_size)
+        ):
+            user_attr, bought_item, bought_user = self.sample_users(
+                self.rng(RNGStream.LINKS, block), start, end
+            )
+            self.user_attr[start:end] = user_attr
+            triples = [
+                (item_name(it), Relation.BOUGHT_BY, user_name(u))
+                for it, u in zip(bought_item.tolist(), bought_user.tolist())
+            ]
+            bought_attr = user_attr[bought_user - start].tolist()
+            yield GraphBlock(
+                nodes=[user_name(u) for u in range(start, end)],
+                categories=[EntityType.USER] * (end - start),
+                triples=triples,
+                explain=functools.partial(
+                    self.purchase_explanations,
+                    triples,
+                    [attr_names[attr] for attr in bought_attr],
+                ),
+            )
+
+    def init_features(self) -> None:
+        self.rel_emb_matrix = np.eye(2, 2)
+
+        # One-hot index (-1 if none) and fill value of the node features
+        num_nodes = self.num_attr + self.num_it + self.num_u
+        self.x_index = np.full(num_nodes, -1, dtype=np.int64)
+        self.x_index[: self.num_attr] = np.arange(self.num_attr)
+        self.x_fill = np.zeros(num_nodes)
+        self.x_fill[self.num_attr + self.num_it :] = -1.0
+
+    def upgrade_legacy(self) -> None:
+        # Former versions kept the relation embeddings in a rel_emb dict
+        self.__dict__.pop("rel_emb", None)
+        super().upgrade_legacy()
+        self.init_features()
+        store = self.store
+        users = store.entities[self.num_attr + self.num_it :]
+        self.user_attr = np.array(
+            [store.entity_id(self._graph.nodes[u]["attribute"]) for u in users],
+            dtype=np.int64,
+        )
+
     def create_graph(self):
-        NameGeneratorUIA.reset_counter()
-        graph = nx.DiGraph()
+        self.init_features()
 
-        r = np.eye(2, 2)
-        self.rel_emb = {}
-        self.rel_emb[Relation.HELD_BY] = r[0]
-        self.rel_emb[Relation.BOUGHT_BY] = r[1]
+        edges = self.sample_edges()
+        if self.backend == Backend.NUMPY:
+            return self.create_store(*edges)
+
+        held_attr, held_item, bought_item, bought_user = edges
+        held_offsets = ArrayUtils.offsets(np.bincount(held_item, minlength=self.num_it))
+        bought_offsets = ArrayUtils.offsets(
+            np.bincount(bought_user, minlength=self.num_u)
+        )
+
+        graph = IndexedDiGraph()
 
         attr_name_list = []
 
@@ -72,25 +242,20 @@ class UserItemAttrDataset(SyntheticDataset):
         for i in range(self.num_attr):
             x = np.zeros(self.num_attr)
             x[i] = 1.0
-            attr_name = NameGeneratorUIA.generate(EntityType.ATTRIBUTE)
+            attr_name = EntityNames.name(EntityType.ATTRIBUTE, i)
             graph.add_node(attr_name, x=x, category=EntityType.ATTRIBUTE)
             attr_name_list.append(attr_name)
 
         # Generate item nodes
+        item_name_list = []
         for i in range(self.num_it):
             x = np.zeros(self.num_attr)
-            if self.lambda_a > 0.0:
-                n = max(1, np.random.poisson(self.lambda_a))
-            else:
-                n = 1
-            n = min(n, self.num_attr)
-            # Sample n elements from a list of elements without replacement
-            attr_names_of_item = np.random.choice(attr_name_list, n, replace=False)
-            item_name = NameGeneratorUIA.generate(EntityType.ITEM)
+            item_name = EntityNames.name(EntityType.ITEM, i)
             graph.add_node(item_name, x=x, category=EntityType.ITEM)
-            for attr_name_j in attr_names_of_item:
+            item_name_list.append(item_name)
+            for attr_j in held_attr[held_offsets[i] : held_offsets[i + 1]]:
                 graph.add_edge(
-                    attr_name_j,
+                    attr_name_list[attr_j],
                     item_name,
                     x=self.rel_emb[Relation.HELD_BY],
                     relation=Relation.HELD_BY,
@@ -99,23 +264,16 @@ class UserItemAttrDataset(SyntheticDataset):
         # Generate user nodes
         for i in range(self.num_u):
             x = -1.0 * np.ones(self.num_attr)
-            # Sample attribute of user
-            user_name = NameGeneratorUIA.generate(EntityType.USER)
-            attr_name_i = np.random.choice(attr_name_list, 1, replace=False)[0]
+            user_name = EntityNames.name(EntityType.USER, i)
+            attr_name_i = attr_name_list[self.user_attr[i]]
 
             graph.add_node(
                 user_name, x=x, attribute=attr_name_i, category=EntityType.USER
             )
 
-            # Find item nodes that are connected to attr-attr_idx
-            it_nodes = [n for n in graph.successors(attr_name_i)]
-
-            n = max(1, np.random.poisson(self.lambda_i))
-            # n = int(lambda_i)
-            n = min(n, len(it_nodes))
-            for it_j in np.random.choice(it_nodes, n, replace=False):
+            for it_j in bought_item[bought_offsets[i] : bought_offsets[i + 1]]:
                 graph.add_edge(
-                    it_j,
+                    item_name_list[it_j],
                     user_name,
                     x=self.rel_emb[Relation.BOUGHT_BY],
                     relation=Relation.BOUGHT_BY,
@@ -123,6 +281,127 @@ class UserItemAttrDataset(SyntheticDataset):
 
         return graph
 
+    @Profiler.timed()
+    def create_store(
+        self,
+        held_attr: np.ndarray,
+        held_item: np.ndarray,
+        bought_item: np.ndarray,
+        bought_user: np.ndarray,
+    ) -> TripleStore:
+        """
+        Vectorized construction of the graph as a TripleStore from the sampled
+        edges (see `sample_edges`).
+
+        Node ids are laid out as [attributes | items | users].
+        """
+        num_attr, num_it, num_u = self.num_attr, self.num_it, self.num_u
+        it_start = num_attr
+        user_start = num_attr + num_it
+
+        store = TripleStore(
+            entities=self.node_names,
+            relations=self.relation_list,
+            categories=np.repeat(np.arange(3), [num_attr, num_it, num_u]),
+            category_list=[EntityType.ATTRIBUTE, EntityType.ITEM, EntityType.USER],
+        )
+        store.add_triples(
+            np.concatenate([held_attr, it_start + bought_item]),
+            np.repeat(np.arange(2), [len(held_attr), len(bought_user)]),
+            np.concatenate([it_start + held_item, user_start + bought_user]),
+        )
+        return store
+
+    def node_features(self, node_ids: np.ndarray) -> np.ndarray:
+        """
+        Dense features of the given nodes, materialized from the compact representation.
+        """
+        node_ids = np.asarray(node_ids)
+        x = np.repeat(self.x_fill[node_ids, None], self.num_attr, axis=1)
+        rows = np.nonzero(self.x_index[node_ids] >= 0)[0]
+        x[rows, self.x_index[node_ids[rows]]] = 1.0
+        return x
+
+    def node_names(self):
+        names = []
+        for category, num in [
+            (EntityType.ATTRIBUTE, self.num_attr),
+            (EntityType.ITEM, self.num_it),
+            (EntityType.USER, self.num_u),
+        ]:
+            names += EntityNames.format(category, np.arange(num))
+        return names
+
+    def build_graph(self):
+        if self.store is None:
+            return super().build_graph()
+
+        store = self.store
+        names = store.entities
+        user_start = self.num_attr + self.num_it
+
+        graph = IndexedDiGraph()
+        for i, name in enumerate(names):
+            attrs = {"x": self.node_features([i])[0], "category": store.category(i)}
+            if i >= user_start:
+                attrs["attribute"] = names[self.user_attr[i - user_start]]
+            graph.add_node(name, **attrs)
+        graph.add_edges_from(
+            (
+                names[h],
+                names[t],
+                {"x": self.rel_emb_matrix[r], "relation": store.relations[r]},
+            )
+            for h, r, t in zip(
+                store.heads.tolist(), store.rels.tolist(), store.tails.tolist()
+            )
+        )
+        return graph
+
+    def get_attribute(self, user: str) -> str:
+        _, (user_id,) = self.entity_parts(user)
+        return EntityNames.name(EntityType.ATTRIBUTE, self.user_attr[user_id])
+
+    def get_explanations(self, heads, rels, tails):
+        held_by = self.relation_list.index(Relation.HELD_BY)
+        bought_by = self.relation_list.index(Relation.BOUGHT_BY)
+        user_start = self.num_attr + self.num_it
+
+        # A purchase is explained by the attribute of the user held by the item
+        bought = np.nonzero(rels == bought_by)[0]
+        if np.any(tails[bought] < user_start):
+            raise ValueError("BOUGHT_BY triples must have a user as tail")
+
+        lengths = np.ones(len(heads), dtype=np.int64)
+        lengths[bought] += 1
+        explanations = RaggedArray.from_lengths(
+            np.empty((int(lengths.sum()), 3), dtype=np.int64), lengths
+        )
+        values = explanations.values
+        start = explanations.offsets[:-1]
+        values[start] = np.stack([heads, rels, tails], axis=1)
+        attr = self.user_attr[tails[bought] - user_start]
+        values[start[bought] + 1] = np.stack(
+            [attr, np.full(len(bought), held_by), heads[bought]], axis=1
+        )
+        return explanations
+
+    def purchase_explanations(
+        self,
+        triples: list[tuple[str, str, str]],
+        attr_names: list[str],
+        start: int,
+        end: int,
+    ) -> list[tuple[str, ...]]:
+        """
+        Explanations of the BOUGHT_BY triples start..end-1, attr_names holding the
+        attribute of the user of every triple (see `get_explanation`).
+        """
+        return [
+            (*triple, attr, Relation.HELD_BY, triple[0])
+            for triple, attr in zip(triples[start:end], attr_names[start:end])
+        ]
+
     def get_explanation(self, head: str, relation: str, tail: str):
         explanation = []
         explanation.append((head, relation, tail))
@@ -131,7 +410,7 @@ class UserItemAttrDataset(SyntheticDataset):
         elif Relation.BOUGHT_BY in relation:
             assert EntityType.USER in tail
 
-            attr_name = self.graph.nodes[tail]["attribute"]
+            attr_name = self.get_attribute(tail)
             explanation.append((attr_name, Relation.HELD_BY, head))
 
         explanation = tuple(item for sublist in explanation for item in sublist)
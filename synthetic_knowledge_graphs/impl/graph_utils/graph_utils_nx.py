@@ -1,5 +1,43 @@
+from collections.abc import Hashable
+from weakref import WeakKeyDictionary
+
+import networkx as nx
+
 from synthetic_knowledge_graphs.core.contracts.graph_utils import GraphUtils
+from synthetic_knowledge_graphs.core.entities.node_index import (
+    IndexedDiGraph,
+    NodeIndex,
+)
 
 
 class GraphUtilsNX(GraphUtils):
-    pass
+    """
+    Queries over networkx graphs. Category queries go through a NodeIndex: the one
+    an IndexedDiGraph (the graphs built by the datasets) maintains as nodes are
+    added and removed, or for other graphs one built on first use and kept aside
+    of the graph, which is rebuilt when the set of nodes of the graph changes.
+    """
+
+    _indexes: WeakKeyDictionary = WeakKeyDictionary()
+
+    @staticmethod
+    def node_index(graph: nx.Graph) -> NodeIndex:
+        if isinstance(graph, IndexedDiGraph) and not nx.is_frozen(graph):
+            return graph.node_index
+        index = GraphUtilsNX._indexes.get(graph)
+        if index is None or not index.matches(graph):
+            index = NodeIndex.from_graph(graph)
+            GraphUtilsNX._indexes[graph] = index
+        return index
+
+    @staticmethod
+    def nodes_of_category(graph: nx.Graph, category: str) -> list[Hashable]:
+        return GraphUtilsNX.node_index(graph).nodes(category)
+
+    @staticmethod
+    def node(graph: nx.Graph, category: str, *ids: int) -> str | None:
+        return GraphUtilsNX.node_index(graph).node(category, *ids)
+
+    @staticmethod
+    def nodes_with_prefix(graph: nx.Graph, category: str, *ids: int) -> list[str]:
+        return GraphUtilsNX.node_index(graph).with_prefix(category, *ids)
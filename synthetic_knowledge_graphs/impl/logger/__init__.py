@@ -1,7 +1,9 @@
+from synthetic_knowledge_graphs.impl.logger.buffered_fs_logger import BufferedFSLogger
 from synthetic_knowledge_graphs.impl.logger.dummy_logger import DummyLogger
 from synthetic_knowledge_graphs.impl.logger.fs_logger import FSLogger
 
 __all__ = [
+    "BufferedFSLogger",
     "FSLogger",
     "DummyLogger",
 ]
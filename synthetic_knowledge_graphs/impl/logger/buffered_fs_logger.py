@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Any
+
+import numpy as np
+
+from synthetic_knowledge_graphs.impl.logger.fs_logger import FSLogger
+
+
+class BufferedFSLogger(FSLogger):
+    """
+    FSLogger that buffers the logged values in memory and appends them to their files
+    from a background thread, so that logging from generation loops costs a JSON
+    encoding and a list append.
+
+    Every value is written as one JSON line to the file `key` of the folder. The
+    buffer is flushed every `flush_interval` seconds, as soon as it holds
+    `max_buffer` values, on `flush`, and on `close`, which is also called at exit.
+
+    Args:
+        folder (str, optional): Folder of the log files. Defaults to "logs".
+
+        clean (bool, optional): Remove the folder first. Defaults to False.
+
+        flush_interval (float, optional): Seconds between flushes. Defaults to 1.0.
+
+        max_buffer (int, optional): Number of buffered values that triggers a
+            flush. Defaults to 10000.
+    """
+
+    def __init__(
+        self,
+        folder: str = "logs",
+        clean: bool = False,
+        flush_interval: float = 1.0,
+        max_buffer: int = 10_000,
+    ):
+        super().__init__(folder=folder, clean=clean)
+        assert flush_interval > 0 and max_buffer >= 1
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+
+        self._buffer: defaultdict[str, list[str]] = defaultdict(list)
+        self._buffered = 0
+        self._buffer_lock = threading.Lock()
+        # Serializes flushes, so lines of a key are written in the logged order
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="BufferedFSLogger", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, key: str, value: Any) -> None:
+        if not self.is_enabled:
+            return
+        assert not self._closed, "Logger is closed"
+        line = json.dumps(value, default=_to_json)
+        with self._buffer_lock:
+            self._buffer[key].append(line)
+            self._buffered += 1
+            full = self._buffered >= self.max_buffer
+        if full:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """
+        Write all the buffered values to their files.
+        """
+        with self._flush_lock:
+            with self._buffer_lock:
+                buffer, self._buffer = self._buffer, defaultdict(list)
+                self._buffered = 0
+            for key, lines in buffer.items():
+                with open(os.path.join(self.folder, key), "a") as f:
+                    f.write("\n".join(lines) + "\n")
+
+    def close(self) -> None:
+        """
+        Stop the background thread and flush the buffer.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> BufferedFSLogger:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Value of type {type(value)} is not JSON serializable")
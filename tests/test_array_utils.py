@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from synthetic_knowledge_graphs.core.entities.array_utils import ArrayUtils
+from synthetic_knowledge_graphs.core.entities.ragged_array import RaggedArray
+
+
+def test_ragged_arange():
+    counts = np.array([2, 0, 3, 1])
+    assert ArrayUtils.offsets(counts).tolist() == [0, 2, 2, 5, 6]
+    assert ArrayUtils.ragged_arange(counts).tolist() == [0, 1, 0, 1, 2, 0]
+
+
+def test_block_ids():
+    counts = np.array([[1, 2], [1, 1], [2, 0]])
+    # Block-local ids of every node, block by block
+    ids = np.array([0, 1, 2, 0, 1, 0, 1])
+    global_ids = ArrayUtils.block_ids(ids, [3, 2, 2], counts)
+    assert global_ids.tolist() == [0, 4, 5, 1, 6, 2, 3]
+
+
+@pytest.mark.parametrize("seed", list(range(5)))
+def test_sample_without_replacement(seed: int):
+    np.random.seed(seed)
+    population = np.random.randint(0, 20, size=50)
+    counts = np.minimum(np.random.poisson(5.0, size=50), population)
+
+    samples = ArrayUtils.sample_without_replacement(population, counts)
+    assert len(samples) == counts.sum()
+
+    offsets = ArrayUtils.offsets(counts)
+    for i in range(len(counts)):
+        row = samples[offsets[i] : offsets[i + 1]]
+        assert len(set(row.tolist())) == counts[i]
+        assert np.all((row >= 0) & (row < population[i]))
+
+
+def test_ragged_array():
+    segments = [[(0, 1, 2)], [], [(3, 4, 5), (6, 7, 8)]]
+    ragged = RaggedArray.from_list(segments, shape=(3,))
+
+    assert len(ragged) == 3
+    assert ragged.lengths.tolist() == [1, 0, 2]
+    assert ragged[2].tolist() == [[3, 4, 5], [6, 7, 8]]
+    assert ragged.tolist() == [[list(t) for t in s] for s in segments]
+
+    taken = ragged.take([2, 0, 2])
+    assert taken.lengths.tolist() == [2, 1, 2]
+    assert taken[1].tolist() == [[0, 1, 2]]
@@ -0,0 +1,32 @@
+import numpy as np
+
+from synthetic_knowledge_graphs import FRUNIDataset
+from synthetic_knowledge_graphs.core.entities.entity_names import EntityNames
+from synthetic_knowledge_graphs.core.values.constants import Backend, EntityType
+
+
+def test_format_parse():
+    names = EntityNames.format(EntityType.FRIEND, np.array([3, 4]), 1, np.arange(2))
+    assert names == ["fr-3-1-0", "fr-4-1-1"]
+    assert EntityNames.name(EntityType.UNIVERSITY, 7) == "uni-7"
+
+    for name in names:
+        category, ids = EntityNames.parse(name)
+        assert category == EntityType.FRIEND
+        assert EntityNames.name(category, *ids) == name
+    assert EntityNames.parse("user-12") == ("user", (12,))
+    assert EntityNames.category("kid-1-2-3") == EntityType.KID
+
+    ids = EntityNames.parse_ids(["uni-3", "fr-3-1-0", "x"])
+    assert ids.tolist() == [[3], [3, 1, 0], []]
+    assert len(EntityNames.parse_ids([])) == 0
+
+
+def test_dataset_names():
+    for backend in [Backend.NETWORKX, Backend.NUMPY]:
+        dataset = FRUNIDataset(n_u=3, lambda_f=2.0, backend=backend)
+        for name in dataset.store.entities:
+            category, ids = EntityNames.parse(name)
+            assert dataset.store.category(dataset.store.entity_id(name)) == category
+            assert len(ids) == {"uni": 1, "st": 2, "fr": 3}[category]
+            assert dataset.entity_parts(name) == (category, ids)
@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pytest
+
+from synthetic_knowledge_graphs import FRUNIDataset, FTREEDataset
+from synthetic_knowledge_graphs.core.entities.explanation_reader import (
+    ExplanationReader,
+)
+
+
+@pytest.mark.parametrize("dataset_cls", [FRUNIDataset, FTREEDataset])
+def test_explanation_reader(dataset_cls):
+    if dataset_cls is FRUNIDataset:
+        dataset = FRUNIDataset(n_u=20, lambda_f=2.0, percentages=[0.8, 0.2])
+    else:
+        dataset = FTREEDataset(n_t=10, lambda_b=4.0, n_d=3, percentages=[0.8, 0.2])
+    folder = os.path.join("tests", "data", "explanation_reader", dataset_cls.__name__)
+    dataset.save_triples(folder, use_hash=False)
+    path = os.path.join(folder, "train_explanations.txt")
+
+    explanations = dataset_cls.load_explanation(path)
+    explanations_dict = dataset_cls.load_explanation(path, as_dict=True)
+
+    reader = dataset_cls.load_explanation(path, lazy=True)
+    assert isinstance(reader, ExplanationReader)
+    assert len(reader) == len(explanations)
+    assert list(reader) == explanations
+    idx = np.random.permutation(len(reader))[:10]
+    assert reader.take(idx) == [explanations[i] for i in idx]
+    assert reader[-1] == explanations[-1]
+    reader.close()
+    assert reader._file.closed
+
+    # The cached line-offset index is reused
+    assert os.path.exists(f"{path}.idx.npy")
+    with ExplanationReader(path) as reader:
+        assert list(reader) == explanations
+
+    with dataset_cls.load_explanation(path, as_dict=True, lazy=True) as view:
+        assert len(view) == len(explanations_dict)
+        assert set(view.keys()) == set(explanations_dict.keys())
+        for key, value in explanations_dict.items():
+            assert view[key] == value
+        with pytest.raises(KeyError):
+            view[("a", "b", "c")]
+    assert view.reader._file.closed
+
+    # The key index is cached too and reused by new views
+    assert os.path.exists(f"{path}.keys.npy")
+    key = next(iter(explanations_dict))
+    with dataset_cls.load_explanation(path, as_dict=True, lazy=True) as view:
+        assert view[key] == explanations_dict[key]
+
+
+def test_read_only_folder(monkeypatch):
+    dataset = FRUNIDataset(n_u=10, lambda_f=2.0, percentages=[0.8, 0.2])
+    folder = os.path.join("tests", "data", "explanation_reader", "read_only")
+    dataset.save_triples(folder, use_hash=False)
+    path = os.path.join(folder, "test_explanations.txt")
+    explanations = FRUNIDataset.load_explanation(path, as_dict=True)
+
+    def save(*args, **kwargs):
+        raise PermissionError("Read-only file system")
+
+    monkeypatch.setattr(np, "save", save)
+    with FRUNIDataset.load_explanation(path, as_dict=True, lazy=True) as view:
+        for key, value in explanations.items():
+            assert view[key] == value
+    assert not os.path.exists(f"{path}.idx.npy")
+    assert not os.path.exists(f"{path}.keys.npy")
+
+
+def test_empty_file():
+    folder = os.path.join("tests", "data", "explanation_reader")
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, "empty_explanations.txt")
+    open(path, "w").close()
+
+    with ExplanationReader(path, cache_index=False) as reader:
+        assert len(reader) == 0
+        assert len(reader.as_dict()) == 0
@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pytest
+
+from synthetic_knowledge_graphs import FRUNIDataset, FTREEDataset
+from synthetic_knowledge_graphs.core.entities.explanation_scorer import (
+    ExplanationScorer,
+)
+from synthetic_knowledge_graphs.core.entities.ragged_array import RaggedArray
+from synthetic_knowledge_graphs.core.values.constants import Backend
+
+
+def create_scorer():
+    dataset = FTREEDataset(n_t=5, lambda_b=3.0, n_d=3, backend=Backend.NUMPY)
+    return ExplanationScorer(dataset.store)
+
+
+def test_score():
+    scorer = create_scorer()
+    a, b, c, d = (0, 0, 1), (1, 0, 2), (2, 0, 3), (3, 1, 4)
+    predicted = RaggedArray.from_list([[a, b], [a, a, c], [], [], [a]], shape=(3,))
+    truth = RaggedArray.from_list([[a, b], [a, b], [d], [], []], shape=(3,))
+    scores = scorer.score(predicted, truth)
+
+    assert scores["precision"].tolist() == [1.0, 0.5, 0.0, 1.0, 0.0]
+    assert scores["recall"].tolist() == [1.0, 0.5, 0.0, 1.0, 0.0]
+    assert scores["f1"].tolist() == [1.0, 0.5, 0.0, 1.0, 0.0]
+    assert scores["jaccard"].tolist() == [1.0, 1 / 3, 0.0, 1.0, 0.0]
+
+
+def test_unknown_ids():
+    scorer = create_scorer()
+    predicted = RaggedArray.from_list([[(0, 0, -1), (-1, 0, 1)]], shape=(3,))
+    truth = RaggedArray.from_list([[(0, 0, 1), (0, 0, 0)]], shape=(3,))
+    assert scorer.score(predicted, truth)["precision"].tolist() == [0.0]
+
+
+def test_record_keys():
+    scorer = create_scorer()
+    a, b, c = (0, 0, 1), (1, 0, 2), (2, 0, 3)
+    predicted = RaggedArray.from_list([[a, b], [a, a, c], [(0, 0, -1)]], shape=(3,))
+    truth = RaggedArray.from_list([[a, b], [a, b], [(-1, 0, 1)]], shape=(3,))
+    expected = scorer.score(predicted, truth)
+
+    # Keys that would overflow an int64 are compared as records
+    scorer.num_entities = 2**40
+    scores = scorer.score(predicted, truth)
+    for name in ExplanationScorer.metric_names:
+        assert np.array_equal(scores[name], expected[name])
+
+    # 2**23 * num_relations * num_entities wraps around to 0 in int64
+    predicted = RaggedArray.from_list([[(2**23, 0, 0)]], shape=(3,))
+    truth = RaggedArray.from_list([[(0, 0, 0)]], shape=(3,))
+    assert scorer.score(predicted, truth)["precision"].tolist() == [0.0]
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_score_explanations(num_workers: int):
+    dataset = FRUNIDataset(
+        n_u=20, lambda_f=2.0, alpha_u=0.1, n_f=10, backend=Backend.NUMPY
+    )
+    idx = np.arange(len(dataset.store))
+    truth = dataset.explanation_ids(idx)
+
+    results = dataset.score_explanations(
+        truth, idx, include_target=True, chunk_size=7, num_workers=num_workers
+    )
+    assert results["num_explanations"] == len(idx)
+    for name in ExplanationScorer.metric_names:
+        assert results[name] == 1.0
+
+    # Empty predictions are only right for the triples explained by themselves
+    empty = RaggedArray.from_lengths(np.empty((0, 3), dtype=np.int64), idx * 0)
+    results = dataset.score_explanations(empty, idx, chunk_size=7)
+    num_explained = np.sum(truth.lengths > 1)
+    assert 0 < num_explained < len(idx)
+    for name in ExplanationScorer.metric_names:
+        assert np.isclose(results[name], 1 - num_explained / len(idx))
+
+
+def test_encode():
+    dataset = FTREEDataset(n_t=5, lambda_b=3.0, n_d=3, backend=Backend.NUMPY)
+    root = os.path.join("tests", "data", "explanation_scorer")
+    dataset.save_triples(root, use_hash=False, only_train=True)
+
+    scorer = ExplanationScorer(dataset.store)
+    explanations = dataset.load_explanation(
+        os.path.join(root, "train_explanations.txt")
+    )
+    predicted = scorer.encode(explanations)
+    truth = dataset.explanation_ids(dataset.get_splits()["train"])
+    assert np.array_equal(predicted.values, truth.values)
+    assert scorer.evaluate(predicted, truth)["f1"] == 1.0
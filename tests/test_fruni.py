@@ -1,9 +1,10 @@
 import os
 
+import numpy as np
 import pytest
 
 from synthetic_knowledge_graphs import FRUNIDataset
-from synthetic_knowledge_graphs.core.values.constants import EntityType
+from synthetic_knowledge_graphs.core.values.constants import Backend, EntityType
 from synthetic_knowledge_graphs.impl.graph_utils import GraphUtilsNX
 
 
@@ -52,6 +53,85 @@ def test_constructor(
     ), f"Number of student entities mismatch {len(uni_nodes)} != {n_u}"
 
 
+@pytest.mark.parametrize("n_u", [1, 50])
+@pytest.mark.parametrize("lambda_f", [0.001, 3.0])
+@pytest.mark.parametrize("n_f", [0, 10])
+@pytest.mark.parametrize("num_students", [1, 2, 4])
+@pytest.mark.parametrize("seed", list(range(2)))
+def test_numpy_backend(
+    n_u: int, lambda_f: float, n_f: int, num_students: int, seed: int
+):
+    n_f = min(n_f, n_u)
+    dataset_nx = FRUNIDataset(
+        n_u=n_u,
+        lambda_f=lambda_f,
+        alpha_u=0.0,
+        n_f=n_f,
+        num_students=num_students,
+        seed=seed,
+    )
+    dataset_np = FRUNIDataset(
+        n_u=n_u,
+        lambda_f=lambda_f,
+        alpha_u=0.0,
+        n_f=n_f,
+        num_students=num_students,
+        seed=seed,
+        backend=Backend.NUMPY,
+    )
+
+    assert dataset_np._graph is None
+    assert len(dataset_np.store.heads) == dataset_nx.graph.number_of_edges()
+
+    edges_nx = set(dataset_nx.graph.edges(data="relation"))
+    edges_np = set(dataset_np.graph.edges(data="relation"))
+    assert edges_nx == edges_np
+    assert dict(dataset_nx.graph.nodes(data=True)) == dict(
+        dataset_np.graph.nodes(data=True)
+    )
+
+    # Friends of fostering universities are linked to the friends of all the
+    # other students of their university
+    graph = dataset_nx.graph
+    for friend, category in graph.nodes(data="category"):
+        if category != EntityType.FRIEND:
+            continue
+        uni_id, student_id, _ = friend.split("-")[1:]
+        friend_of = [
+            v for v in graph.successors(friend) if v.startswith(EntityType.FRIEND)
+        ]
+        if int(uni_id) >= n_f:
+            assert len(friend_of) == 0
+            continue
+        expected = [
+            v
+            for v in graph.nodes
+            if v.startswith(f"{EntityType.FRIEND}-{uni_id}-")
+            and v.split("-")[2] != student_id
+        ]
+        assert sorted(friend_of) == sorted(expected)
+
+
+@pytest.mark.parametrize("n_u", [1, 2, 300])
+@pytest.mark.parametrize("alpha_u", [0.01, 0.5, 1.0])
+def test_collaborations(n_u: int, alpha_u: float):
+    dataset = FRUNIDataset(
+        n_u=n_u, lambda_f=1.0, alpha_u=alpha_u, backend=Backend.NUMPY
+    )
+    uni_i, uni_j = dataset.collaborations()
+
+    assert np.all(uni_i != uni_j)
+    assert np.all((0 <= uni_j) & (uni_j < n_u))
+    pairs = uni_i * n_u + uni_j
+    assert len(np.unique(pairs)) == len(pairs)
+    num_pairs = n_u * (n_u - 1)
+    if alpha_u == 1.0:
+        assert len(pairs) == num_pairs
+    elif num_pairs > 1000:
+        std = np.sqrt(num_pairs * alpha_u * (1 - alpha_u))
+        assert abs(len(pairs) - alpha_u * num_pairs) < 5 * std
+
+
 def test_save():
     dataset = create_default_dataset()
     root = os.path.join("tests", "data", "fruni")
@@ -3,7 +3,11 @@ import os
 import pytest
 
 from synthetic_knowledge_graphs import FTREEDataset
-from synthetic_knowledge_graphs.core.values.constants import EntityType
+from synthetic_knowledge_graphs.core.values.constants import (
+    Backend,
+    EntityType,
+    Relation,
+)
 from synthetic_knowledge_graphs.impl.graph_utils import GraphUtilsNX
 
 
@@ -39,6 +43,40 @@ def test_constructor(
     ), f"Number of family trees mismatch {len(root_nodes)} != {n_t}"
 
 
+@pytest.mark.parametrize("n_t", [1, 5])
+@pytest.mark.parametrize("lambda_b", [0.5, 6.0])
+@pytest.mark.parametrize("n_d", [2, 3])
+def test_numpy_backend(n_t: int, lambda_b: float, n_d: int):
+    dataset = FTREEDataset(n_t=n_t, lambda_b=lambda_b, n_d=n_d, backend=Backend.NUMPY)
+
+    num_branches = int(dataset.num_branches.sum())
+    assert len(dataset.store.heads) == int((dataset.branch_lengths + 2).sum())
+    assert dataset.tree_offsets[-1] == len(dataset.store.heads)
+
+    graph = dataset.graph
+    root_nodes = GraphUtilsNX.filter_nodes_contain(graph, EntityType.PROGENITOR)
+    assert len(root_nodes) == n_t
+    assert graph.number_of_edges() == len(dataset.store.heads)
+
+    sent_edges = [
+        (u, v, r)
+        for u, v, r in graph.edges(data="relation")
+        if Relation.SENTIMENT() in r
+    ]
+    assert len(sent_edges) == num_branches
+    for u, v, relation in sent_edges:
+        explanation = dataset.get_explanation(u, relation, v)
+        b_len = int(relation.split("_")[-1])
+        assert len(explanation) == 3 * (b_len + 1)
+
+    # Edges of every tree are contiguous and stay inside the tree
+    names = dataset.store.entities
+    for tree_id in range(n_t):
+        start, end = dataset.tree_offsets[tree_id], dataset.tree_offsets[tree_id + 1]
+        for h in dataset.store.heads[start:end]:
+            assert names[h].split("-")[1] == str(tree_id)
+
+
 def test_save():
     dataset = create_default_dataset()
     root = os.path.join("tests", "data", "ftree")
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+
+from synthetic_knowledge_graphs import FRUNIDataset, FTREEDataset
+from synthetic_knowledge_graphs.core.entities.generation_cache import GenerationCache
+from synthetic_knowledge_graphs.core.values.constants import Backend
+
+
+@pytest.mark.parametrize("backend", [Backend.NETWORKX, Backend.NUMPY])
+def test_cache_hit(backend: str):
+    folder = os.path.join("tests", "data", "cache", backend)
+    cache = GenerationCache(folder)
+    cache.clear()
+
+    dataset = FTREEDataset(n_t=5, lambda_b=3.0, n_d=3, backend=backend, cache=cache)
+    assert cache.stats["misses"] == 1
+
+    dataset_memory = FTREEDataset(
+        n_t=5, lambda_b=3.0, n_d=3, backend=backend, cache=cache
+    )
+    assert cache.stats["memory_hits"] == 1
+
+    cache_disk = GenerationCache(folder)
+    dataset_disk = FTREEDataset(
+        n_t=5, lambda_b=3.0, n_d=3, backend=backend, cache=cache_disk
+    )
+    assert cache_disk.stats["disk_hits"] == 1
+
+    for cached in [dataset_memory, dataset_disk]:
+        assert cached.get_hash() == dataset.get_hash()
+        for key in ["heads", "rels", "tails"]:
+            assert np.array_equal(
+                getattr(cached.store, key), getattr(dataset.store, key)
+            )
+        assert set(cached.graph.edges(data="relation")) == set(
+            dataset.graph.edges(data="relation")
+        )
+        for split, idx in dataset.get_splits().items():
+            assert np.array_equal(cached.get_splits()[split], idx)
+
+    # Hits are independent copies with their own runtime arguments
+    dataset_other = FTREEDataset(
+        n_t=5, lambda_b=3.0, n_d=3, backend=backend, cache=cache, num_workers=2
+    )
+    assert dataset_other.num_workers == 2
+    assert dataset_memory.num_workers == 1
+    assert dataset_other.store is not dataset_memory.store
+    assert dataset_other.get_splits() is not dataset_memory.get_splits()
+    dataset_other.store.add_relation("new_relation")
+    dataset_other.store.add_entities(["new-0"], "new")
+    # Shared arrays are read-only
+    with pytest.raises(ValueError):
+        dataset_other.get_splits()["train"][:] = 0
+    for cached in [dataset_memory, dataset_disk]:
+        assert cached.store.num_relations == dataset.store.num_relations
+        assert cached.store.num_entities == dataset.store.num_entities
+        assert np.array_equal(
+            cached.get_splits()["train"], dataset.get_splits()["train"]
+        )
+    dataset_again = FTREEDataset(
+        n_t=5, lambda_b=3.0, n_d=3, backend=backend, cache=cache
+    )
+    assert dataset_again.store.num_relations == dataset.store.num_relations
+
+    FTREEDataset(n_t=5, lambda_b=3.0, n_d=3, seed=0, backend=backend, cache=cache)
+    FRUNIDataset(n_u=10, lambda_f=2.0, alpha_u=0.1, backend=backend, cache=cache)
+    assert cache.stats["misses"] == 3
+    assert len(cache.entries()) == 3
+
+
+def test_cache_eviction():
+    cache = GenerationCache(os.path.join("tests", "data", "cache", "eviction"))
+    cache.clear()
+
+    first = FTREEDataset(n_t=5, lambda_b=3.0, n_d=3, cache=cache)
+    size = cache.size()
+    cache.max_bytes = int(1.5 * size)
+
+    FTREEDataset(n_t=5, lambda_b=3.0, n_d=3, seed=0, cache=cache)
+    assert cache.stats["evictions"] == 1
+    assert [path for path, _, _ in cache.entries()] != [cache.path(first)]
+    assert cache.size() <= cache.max_bytes
+
+    FTREEDataset(n_t=5, lambda_b=3.0, n_d=3, cache=cache)
+    assert cache.stats["misses"] == 3
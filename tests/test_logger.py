@@ -1,8 +1,15 @@
+import json
 import os
+import time
 
+import numpy as np
 import pytest
 
-from synthetic_knowledge_graphs.impl.logger import DummyLogger, FSLogger
+from synthetic_knowledge_graphs.impl.logger import (
+    BufferedFSLogger,
+    DummyLogger,
+    FSLogger,
+)
 
 
 def create_value(mode):
@@ -43,3 +50,45 @@ def test_dummy_logger(device, mode):
     value = create_value(mode)
 
     logger.log(f"logging_{mode}.txt", value)
+
+
+def read_jsonl(path):
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize("mode", ["int", "float", "str", "bool", "list", "dict"])
+def test_buffered_fs_logger(mode):
+    folder = os.path.join("tests", "logs", "buffered")
+    value = create_value(mode)
+    with BufferedFSLogger(folder=folder, clean=True, flush_interval=60) as logger:
+        for _ in range(3):
+            logger.log(f"logging_{mode}.jsonl", value)
+        assert not os.path.exists(os.path.join(folder, f"logging_{mode}.jsonl"))
+
+    assert read_jsonl(os.path.join(folder, f"logging_{mode}.jsonl")) == [value] * 3
+
+
+def test_buffered_fs_logger_flush():
+    folder = os.path.join("tests", "logs", "buffered")
+    path = os.path.join(folder, "metrics.jsonl")
+
+    logger = BufferedFSLogger(folder=folder, clean=True, flush_interval=0.01)
+    logger.log("metrics.jsonl", {"seconds": np.float64(1.5), "edges": np.arange(2)})
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        if os.path.exists(path) and len(read_jsonl(path)) == 1:
+            break
+        time.sleep(0.01)
+    assert read_jsonl(path) == [{"seconds": 1.5, "edges": [0, 1]}]
+
+    # A full buffer is flushed without waiting for the interval
+    logger.flush_interval = 60
+    logger.max_buffer = 10
+    for i in range(10):
+        logger.log("metrics.jsonl", i)
+    deadline = time.time() + 5
+    while len(read_jsonl(path)) < 11 and time.time() < deadline:
+        time.sleep(0.01)
+    assert read_jsonl(path)[1:] == list(range(10))
+    logger.close()
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+import pytest
+
+from synthetic_knowledge_graphs import FRUNIDataset, UserItemAttrDataset
+from synthetic_knowledge_graphs.core.entities.negative_sampler import NegativeSampler
+from synthetic_knowledge_graphs.core.entities.triple_store import TripleStore
+from synthetic_knowledge_graphs.core.values.constants import Backend
+
+
+def create_dataset(backend: str = Backend.NUMPY):
+    return UserItemAttrDataset(
+        num_attrs=4,
+        num_items=30,
+        num_users=40,
+        lambda_a=1.0,
+        lambda_i=4.0,
+        percentages=[0.8, 0.1, 0.1],
+        backend=backend,
+    )
+
+
+@pytest.mark.parametrize("mode", ["head", "tail", "both"])
+@pytest.mark.parametrize("typed", [True, False])
+def test_sample(mode: str, typed: bool):
+    dataset = create_dataset()
+    store = dataset.store
+    sampler = NegativeSampler(store, seed=0)
+    idx = np.arange(len(store))
+    heads, rels, tails = sampler.sample(idx, 5, mode=mode, typed=typed)
+    assert heads.shape == rels.shape == tails.shape == (len(idx), 5)
+
+    found = heads >= 0
+    assert np.mean(found) > 0.9
+    known = set(zip(store.heads.tolist(), store.rels.tolist(), store.tails.tolist()))
+    for h, r, t in zip(heads[found], rels[found], tails[found]):
+        assert (h, r, t) not in known
+    assert np.all(rels == store.rels[idx, None])
+
+    same_head = heads == store.heads[idx, None]
+    same_tail = tails == store.tails[idx, None]
+    assert np.all((same_head | same_tail)[found])
+    if mode == "head":
+        assert np.all(same_tail[found])
+    elif mode == "tail":
+        assert np.all(same_head[found])
+    if typed:
+        categories = store.categories
+        assert np.all((categories[heads] == categories[store.heads[idx, None]])[found])
+        assert np.all((categories[tails] == categories[store.tails[idx, None]])[found])
+
+
+def test_reproducible():
+    store = create_dataset().store
+    idx = np.arange(len(store))
+    negatives = NegativeSampler(store, seed=1).sample(idx, 3)
+    for a, b in zip(negatives, NegativeSampler(store, seed=1).sample(idx, 3)):
+        assert np.array_equal(a, b)
+
+
+def test_record_keys(monkeypatch):
+    store = create_dataset().store
+    sampler = NegativeSampler(store, seed=0)
+    heads, rels, tails = sampler.sample(np.arange(len(store)), 2, typed=False)
+    heads = np.concatenate([store.heads, heads.ravel()])
+    rels = np.concatenate([store.rels, rels.ravel()])
+    tails = np.concatenate([store.tails, tails.ravel()])
+    expected = sampler.contains(heads, rels, tails)
+
+    # Keys that would overflow an int64 are compared as records
+    monkeypatch.setattr(TripleStore, "num_entities", 2**40)
+    sampler = NegativeSampler(store, seed=0)
+    assert sampler.keys.dtype == NegativeSampler.record_dtype
+    assert np.array_equal(sampler.contains(heads, rels, tails), expected)
+
+
+@pytest.mark.parametrize("backend", [Backend.NUMPY, Backend.STREAM])
+def test_save_negatives(backend: str):
+    dataset = FRUNIDataset(
+        n_u=20,
+        lambda_f=2.0,
+        alpha_u=0.1,
+        n_f=10,
+        percentages=[0.8, 0.1, 0.1],
+        backend=backend,
+    )
+    folder = os.path.join("tests", "data", "negatives", backend)
+    dataset.save_triples(folder, use_hash=False, num_negatives=4)
+
+    sampler, splits = NegativeSampler.from_folder(folder)
+    known = set(sampler.store.iter_triples())
+    for name in ["train", "valid", "test"]:
+        with open(os.path.join(folder, f"{name}.txt"), "r") as f:
+            num_triples = len(f.readlines())
+        assert len(splits[name]) == num_triples
+        negatives = dataset.load_explanation(
+            os.path.join(folder, f"{name}_negatives.txt")
+        )
+        assert len(negatives) == num_triples
+        for triple, triple_negatives in zip(
+            sampler.store.iter_triples(splits[name]), negatives
+        ):
+            assert 0 < len(triple_negatives) <= 4
+            for negative in triple_negatives:
+                assert negative not in known
+                assert negative[1] == triple[1]
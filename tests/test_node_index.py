@@ -0,0 +1,83 @@
+import networkx as nx
+import pytest
+
+from synthetic_knowledge_graphs import FRUNIDataset
+from synthetic_knowledge_graphs.core.entities.node_index import (
+    IndexedDiGraph,
+    NodeIndex,
+)
+from synthetic_knowledge_graphs.core.values.constants import Backend, EntityType
+from synthetic_knowledge_graphs.impl.graph_utils import GraphUtilsNX
+
+
+@pytest.mark.parametrize("backend", [Backend.NETWORKX, Backend.NUMPY])
+def test_node_index(backend: str):
+    dataset = FRUNIDataset(
+        n_u=12, lambda_f=2.0, alpha_u=0.1, n_f=6, backend=backend, seed=0
+    )
+    graph = dataset.graph
+    index = NodeIndex.from_graph(graph)
+    assert len(index) == graph.number_of_nodes()
+
+    for category in [EntityType.UNIVERSITY, EntityType.STUDENT, EntityType.FRIEND]:
+        nodes = GraphUtilsNX.nodes_of_category(graph, category)
+        assert nodes == GraphUtilsNX.filter_nodes_contain(graph, f"{category}-")
+        assert index.nodes(category) == nodes
+        assert sorted(nodes) == index.with_prefix(category)
+        ids = dataset.store.category_ids(category)
+        assert [dataset.store.entity_name(i) for i in ids] == nodes
+
+    assert GraphUtilsNX.node(graph, EntityType.STUDENT, 11, 1) == "st-11-1"
+    assert GraphUtilsNX.node(graph, EntityType.STUDENT, 12, 0) is None
+
+    # Friends of university 1 but not of university 10, 11...
+    friends = GraphUtilsNX.nodes_with_prefix(graph, EntityType.FRIEND, 1)
+    expected = [v for v in graph.nodes if v.startswith(f"{EntityType.FRIEND}-1-")]
+    assert friends == sorted(expected)
+    friends = GraphUtilsNX.nodes_with_prefix(graph, EntityType.FRIEND, 1, 0)
+    expected = [v for v in expected if v.startswith(f"{EntityType.FRIEND}-1-0-")]
+    assert friends == sorted(expected)
+
+
+@pytest.mark.parametrize("graph_cls", [IndexedDiGraph, nx.DiGraph])
+def test_index_updated(graph_cls):
+    graph = graph_cls()
+    graph.add_node("uni-0", category=EntityType.UNIVERSITY)
+    assert GraphUtilsNX.nodes_of_category(graph, EntityType.UNIVERSITY) == ["uni-0"]
+
+    graph.add_nodes_from(["uni-1", "uni-2"], category=EntityType.UNIVERSITY)
+    assert GraphUtilsNX.nodes_of_category(graph, EntityType.UNIVERSITY) == [
+        "uni-0",
+        "uni-1",
+        "uni-2",
+    ]
+    assert GraphUtilsNX.nodes_of_category(graph, EntityType.STUDENT) == []
+
+    # Same number of nodes, different nodes
+    graph.remove_node("uni-1")
+    graph.add_node("st-0-0", category=EntityType.STUDENT)
+    assert GraphUtilsNX.nodes_of_category(graph, EntityType.UNIVERSITY) == [
+        "uni-0",
+        "uni-2",
+    ]
+    assert GraphUtilsNX.node(graph, EntityType.UNIVERSITY, 1) is None
+    assert GraphUtilsNX.nodes_of_category(graph, EntityType.STUDENT) == ["st-0-0"]
+
+    # Nodes added by edges have no category
+    graph.add_edge("st-0-0", "fr-0-0-0")
+    assert GraphUtilsNX.nodes_of_category(graph, None) == ["fr-0-0-0"]
+    if graph_cls is nx.DiGraph:
+        # Other graphs are only reindexed when their nodes change
+        return
+    graph.add_node("fr-0-0-0", category=EntityType.FRIEND)
+    assert GraphUtilsNX.nodes_of_category(graph, None) == []
+    assert GraphUtilsNX.nodes_with_prefix(graph, EntityType.FRIEND, 0) == ["fr-0-0-0"]
+
+
+def test_graphml(tmp_path):
+    dataset = FRUNIDataset(n_u=3, lambda_f=1.0, backend=Backend.NUMPY, seed=0)
+    graph = dataset.graph
+    assert isinstance(graph, IndexedDiGraph)
+    assert GraphUtilsNX.nodes_of_category(graph, EntityType.UNIVERSITY)
+    nx.write_graphml(graph, tmp_path / "graph.graphml")
+    assert nx.read_graphml(tmp_path / "graph.graphml").number_of_nodes() == len(graph)
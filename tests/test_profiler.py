@@ -0,0 +1,92 @@
+import os
+from typing import Any
+
+import pytest
+
+from synthetic_knowledge_graphs import FTREEDataset
+from synthetic_knowledge_graphs.core.contracts.logger import Logger
+from synthetic_knowledge_graphs.core.entities.profiler import Profiler
+from synthetic_knowledge_graphs.core.values.constants import Backend
+
+
+class ListLogger(Logger):
+    def __init__(self, enable: bool = True):
+        super().__init__(enable)
+        self.records = []
+
+    def log(self, key: str, value: Any) -> None:
+        if self.is_enabled:
+            self.records.append((key, value))
+
+
+class Timed:
+    def __init__(self, logger: Logger | None):
+        self.profiler = Profiler(logger)
+
+    @Profiler.timed()
+    def step(self, value: int) -> int:
+        return value + 1
+
+
+def test_phase():
+    logger = ListLogger()
+    profiler = Profiler(logger)
+    with profiler.phase("step", num_edges=10) as counts:
+        counts["num_nodes"] = 5
+
+    [(key, record)] = logger.records
+    assert key == "step"
+    assert record["num_edges"] == 10 and record["num_nodes"] == 5
+    assert record["seconds"] >= 0.0
+    assert "edges_per_sec" in record
+    assert record["peak_rss"] is None or record["peak_rss"] > 0
+
+
+def test_disabled():
+    logger = ListLogger(enable=False)
+    for profiler in [Profiler(), Profiler(logger)]:
+        assert not profiler.enabled
+        with profiler.phase("step") as counts:
+            counts["num_edges"] = 1
+    assert Timed(logger).step(1) == 2
+    assert logger.records == []
+
+
+def test_timed():
+    logger = ListLogger()
+    assert Timed(logger).step(1) == 2
+    assert [key for key, _ in logger.records] == ["step"]
+
+
+@pytest.mark.parametrize("backend", [Backend.NETWORKX, Backend.NUMPY, Backend.STREAM])
+def test_dataset_phases(backend: str):
+    logger = ListLogger()
+    dataset = FTREEDataset(
+        n_t=10,
+        lambda_b=4.0,
+        n_d=3,
+        percentages=[0.8, 0.2],
+        backend=backend,
+        logger=logger,
+    )
+    dataset.save_triples(os.path.join("tests", "data", "profiler", backend))
+    phases = [key for key, _ in logger.records]
+
+    if backend == Backend.STREAM:
+        assert phases == ["save_triples_stream"]
+        return
+
+    records = dict(logger.records)
+    assert records["create_graph"]["num_edges"] == len(dataset.store)
+    assert sum(records["create_graph"]["edges_per_relation"].values()) == len(
+        dataset.store
+    )
+    assert phases.count("write_triples") == 2
+    assert phases.count("explanations") == 2
+    assert "splits" in phases
+    if backend == Backend.NUMPY:
+        assert phases[:2] == ["sample_blocks", "create_store"]
+
+    # The profiler is not saved nor sent to worker processes
+    dataset.save(os.path.join("tests", "data", "profiler", backend))
+    assert "_profiler" not in dataset.__getstate__()
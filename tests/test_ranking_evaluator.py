@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from synthetic_knowledge_graphs import FTREEDataset
+from synthetic_knowledge_graphs.core.entities.ranking_evaluator import (
+    RankingEvaluator,
+)
+from synthetic_knowledge_graphs.core.entities.triple_store import TripleStore
+from synthetic_knowledge_graphs.core.values.constants import Backend
+
+
+def create_store():
+    # Triples 0: (0, r, 1), 1: (0, r, 2), 2: (3, r, 1), 3: (0, s, 3)
+    store = TripleStore(
+        entities=[f"e{i}" for i in range(5)],
+        relations=["r", "s"],
+        categories=np.zeros(5),
+        category_list=["x"],
+    )
+    store.add_triples(np.array([0, 0, 3, 0]), np.array([0, 0, 0, 1]), [1, 2, 1, 3])
+    return store
+
+
+def brute_force_ranks(store, idx, scores):
+    known = set(zip(store.heads.tolist(), store.rels.tolist(), store.tails.tolist()))
+    ranks = {"head": [], "tail": []}
+    for row, i in enumerate(idx):
+        h, r, t = int(store.heads[i]), int(store.rels[i]), int(store.tails[i])
+        for side in ["head", "tail"]:
+            target = h if side == "head" else t
+            target_score = scores[side][row, target]
+            greater = ties = 0
+            for e in range(store.num_entities):
+                triple = (e, r, t) if side == "head" else (h, r, e)
+                if e == target or triple in known:
+                    continue
+                greater += scores[side][row, e] > target_score
+                ties += scores[side][row, e] == target_score
+            ranks[side].append(1 + greater + ties / 2)
+    return ranks
+
+
+def test_filtered_ranks():
+    store = create_store()
+    evaluator = RankingEvaluator(store)
+    idx = np.arange(len(store))
+    # Tail scores favour entity 2 then 1: (0, r, 1) is not penalized by the known
+    # (0, r, 2), while (3, r, 1) is
+    tail_scores = np.tile([0.0, 1.0, 2.0, 0.5, 0.0], (len(idx), 1))
+    head_scores = np.tile([3.0, 0.0, 0.0, 3.0, 0.0], (len(idx), 1))
+    scores = {"head": head_scores, "tail": tail_scores}
+    ranks = evaluator.ranks(idx, scores=scores)
+
+    assert ranks["tail"].tolist() == [1.0, 1.0, 2.0, 3.0]
+    expected = brute_force_ranks(store, idx, scores)
+    for side in ["head", "tail"]:
+        assert ranks[side].tolist() == expected[side]
+
+
+@pytest.mark.parametrize("max_memory", [1, 10**9])
+def test_evaluate(max_memory: int):
+    dataset = FTREEDataset(
+        n_t=20, lambda_b=3.0, n_d=3, percentages=[0.8, 0.2], backend=Backend.NUMPY
+    )
+    store = dataset.store
+    test = dataset.get_splits()["test"]
+    rng = np.random.default_rng(0)
+    scores = {
+        side: rng.random((len(test), store.num_entities)) for side in ["head", "tail"]
+    }
+
+    results = dataset.evaluate_ranking(scores=scores, max_memory=max_memory)
+    expected = brute_force_ranks(store, test, scores)
+    ranks = np.concatenate([expected["head"], expected["tail"]])
+    assert np.isclose(results["mrr"], np.mean(1 / ranks))
+    assert np.isclose(results["hits@3"], np.mean(ranks <= 3))
+    assert results["num_ranks"] == 2 * len(test)
+    relations = {store.relation_name(r) for r in store.rels[test].tolist()}
+    assert set(results["per_relation"]) == relations
+    assert sum(m["num_ranks"] for m in results["per_relation"].values()) == len(ranks)
+
+    # A perfect scorer ranks every true triple first
+    def oracle(entities, rels, side):
+        scores = np.zeros((len(entities), store.num_entities))
+        rows, known = evaluator.known(side, entities, rels)
+        scores[rows, known] = 1.0
+        return scores
+
+    evaluator = RankingEvaluator(store, max_memory=max_memory)
+    results = evaluator.evaluate(test, score_fn=oracle)
+    assert results["mrr"] == 1.0 and results["hits@1"] == 1.0
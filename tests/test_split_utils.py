@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from synthetic_knowledge_graphs.core.entities.split_utils import SplitUtils
+
+
+def random_triples(num_triples: int, num_entities: int, num_relations: int, seed=0):
+    rng = np.random.default_rng(seed)
+    heads = rng.integers(0, num_entities, num_triples).astype(np.int32)
+    # Skewed relations, so that some of them are rare
+    rels = np.minimum(rng.geometric(0.3, num_triples) - 1, num_relations - 1)
+    tails = rng.integers(0, num_entities, num_triples).astype(np.int32)
+    return heads, rels.astype(np.int32), tails
+
+
+def test_sizes():
+    sizes = SplitUtils.sizes(np.array([10, 7, 0, 1]), [0.5, 0.3, 0.2])
+    assert sizes.tolist() == [[5, 3, 2], [4, 2, 1], [0, 0, 0], [1, 0, 0]]
+    assert SplitUtils.sizes(np.array([3]), [1.0]).tolist() == [[3]]
+
+
+def test_first_occurrences():
+    heads = np.array([0, 1, 0, 2])
+    rels = np.array([0, 0, 1, 1])
+    tails = np.array([1, 0, 2, 0])
+    mask = SplitUtils.first_occurrences(heads, rels, tails)
+    assert mask.tolist() == [True, False, True, False]
+    assert len(SplitUtils.first_occurrences(*(np.empty(0, dtype=int),) * 3)) == 0
+
+
+@pytest.mark.parametrize("transductive", [False, True])
+@pytest.mark.parametrize("stratify", [False, True])
+def test_split_partition(transductive: bool, stratify: bool):
+    heads, rels, tails = random_triples(1001, 300, 8)
+    splits = SplitUtils.split(
+        heads,
+        rels,
+        tails,
+        [0.7, 0.2, 0.1],
+        np.random.default_rng(0),
+        transductive=transductive,
+        stratify=stratify,
+    )
+    # No triple is dropped or repeated
+    assert np.array_equal(np.sort(np.concatenate(splits)), np.arange(len(heads)))
+    if not transductive and not stratify:
+        assert [len(idx) for idx in splits] == [701, 200, 100]
+
+
+@pytest.mark.parametrize("stratify", [False, True])
+def test_split_transductive(stratify: bool):
+    heads, rels, tails = random_triples(500, 400, 12)
+    train, valid, test = SplitUtils.split(
+        heads,
+        rels,
+        tails,
+        [0.5, 0.25, 0.25],
+        np.random.default_rng(1),
+        transductive=True,
+        stratify=stratify,
+    )
+    entities = set(heads[train].tolist()) | set(tails[train].tolist())
+    for idx in [valid, test]:
+        assert len(idx) > 0
+        assert set(heads[idx].tolist()) <= entities
+        assert set(tails[idx].tolist()) <= entities
+        assert set(rels[idx].tolist()) <= set(rels[train].tolist())
+
+
+def test_split_stratify():
+    heads, rels, tails = random_triples(2000, 100, 5)
+    train, valid, test = SplitUtils.split(
+        heads, rels, tails, [0.6, 0.2, 0.2], np.random.default_rng(2), stratify=True
+    )
+    for r in range(5):
+        count = np.sum(rels == r)
+        assert np.sum(rels[valid] == r) == int(0.2 * count + 1e-9)
+        assert np.sum(rels[test] == r) == int(0.2 * count + 1e-9)
+
+
+def test_split_reproducible():
+    heads, rels, tails = random_triples(300, 50, 4)
+    splits = SplitUtils.split(
+        heads, rels, tails, [0.8, 0.2], np.random.default_rng(3), transductive=True
+    )
+    splits_other = SplitUtils.split(
+        heads, rels, tails, [0.8, 0.2], np.random.default_rng(3), transductive=True
+    )
+    for idx, idx_other in zip(splits, splits_other):
+        assert np.array_equal(idx, idx_other)
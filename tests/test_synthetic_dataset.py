@@ -0,0 +1,366 @@
+import filecmp
+import os
+
+import numpy as np
+import pytest
+
+from synthetic_knowledge_graphs import FRUNIDataset, FTREEDataset, UserItemAttrDataset
+from synthetic_knowledge_graphs.core.contracts.synthetic_dataset import SyntheticDataset
+from synthetic_knowledge_graphs.core.entities.io_utils import IOUtils
+from synthetic_knowledge_graphs.core.values.constants import Backend, RNGStream
+
+
+def create_dataset(name: str, backend: str = Backend.NETWORKX, **kwargs):
+    if name == "fruni":
+        return FRUNIDataset(
+            n_u=20,
+            lambda_f=2.0,
+            alpha_u=0.05,
+            percentages=[0.5, 0.3, 0.2],
+            backend=backend,
+            **kwargs,
+        )
+    elif name == "ftree":
+        return FTREEDataset(
+            n_t=10,
+            lambda_b=4.0,
+            n_d=3,
+            percentages=[0.5, 0.3, 0.2],
+            backend=backend,
+            **kwargs,
+        )
+    elif name == "user_item_attr":
+        return UserItemAttrDataset(
+            num_attrs=5,
+            num_items=30,
+            num_users=20,
+            lambda_a=1.0,
+            lambda_i=3.0,
+            percentages=[0.5, 0.3, 0.2],
+            backend=backend,
+            **kwargs,
+        )
+    else:
+        raise ValueError(f"Unknown dataset: {name}")
+
+
+def read_lines(path: str) -> list[str]:
+    with open(path, "r") as f:
+        return f.read().splitlines()
+
+
+@pytest.mark.parametrize("name", ["fruni", "ftree", "user_item_attr"])
+@pytest.mark.parametrize("backend", [Backend.NETWORKX, Backend.NUMPY])
+def test_save_triples_chunked(name: str, backend: str):
+    dataset = create_dataset(name, backend)
+    root = os.path.join("tests", "data", "save_triples", name)
+    folder_full = os.path.join(root, "full")
+    folder_chunked = os.path.join(root, "chunked")
+
+    dataset.save_triples(folder_full, use_hash=False, save_random_test_triples=2)
+    dataset.save_triples(
+        folder_chunked, use_hash=False, save_random_test_triples=2, chunk_size=7
+    )
+
+    num_triples = 0
+    for split in ["train", "valid", "test", "test_random_2"]:
+        path = os.path.join(folder_full, f"{split}.txt")
+        path_chunked = os.path.join(folder_chunked, f"{split}.txt")
+        assert filecmp.cmp(path, path_chunked, shallow=False)
+
+        if split == "test_random_2":
+            continue
+        num_triples += len(read_lines(path))
+        path_exp = os.path.join(folder_full, f"{split}_explanations.txt")
+        path_exp_chunked = os.path.join(folder_chunked, f"{split}_explanations.txt")
+        assert filecmp.cmp(path_exp, path_exp_chunked, shallow=False)
+        for triple, explanation in zip(read_lines(path), read_lines(path_exp)):
+            assert explanation.split(",")[:3] == triple.split("\t")
+
+    assert num_triples == len(dataset.store)
+
+
+@pytest.mark.parametrize("name", ["fruni", "ftree", "user_item_attr"])
+@pytest.mark.parametrize("backend", [Backend.NETWORKX, Backend.NUMPY])
+def test_compute_explanations_parallel(name: str, backend: str):
+    dataset = create_dataset(name, backend)
+    root = os.path.join("tests", "data", "explanations", name)
+    os.makedirs(root, exist_ok=True)
+    idx = np.random.permutation(len(dataset.store))
+
+    explanations = dataset.compute_explanations(idx, chunk_size=5)
+    assert explanations == dataset.compute_explanations(
+        idx, num_workers=2, chunk_size=5
+    )
+
+    path_serial = os.path.join(root, "serial.txt")
+    path_parallel = os.path.join(root, "parallel.txt")
+    dataset.compute_explanations(idx, path_serial, chunk_size=5)
+    dataset.compute_explanations(idx, path_parallel, num_workers=3, chunk_size=5)
+    assert filecmp.cmp(path_serial, path_parallel, shallow=False)
+    assert sorted(os.listdir(root)) == ["parallel.txt", "serial.txt"]
+
+    # A pool can be shared by several calls, and its workers get no graph
+    assert dataset.graph is not None
+    assert dataset._worker_copy(["_graph"])._graph is None
+    with dataset.explanation_pool(2) as executor:
+        assert explanations == dataset.compute_explanations(
+            idx, chunk_size=5, executor=executor
+        )
+        dataset.compute_explanations(idx, path_parallel, executor=executor)
+    assert filecmp.cmp(path_serial, path_parallel, shallow=False)
+    assert len(read_lines(path_serial)) == len(explanations)
+
+
+@pytest.mark.parametrize("name", ["fruni", "ftree", "user_item_attr"])
+@pytest.mark.parametrize("backend", [Backend.NETWORKX, Backend.NUMPY])
+def test_get_explanations(name: str, backend: str, monkeypatch):
+    monkeypatch.setattr(SyntheticDataset, "block_size", 3)
+    dataset = create_dataset(name, backend)
+    store = dataset.store
+    idx = np.random.permutation(len(store))
+
+    # Every backend is vectorized, without calling get_explanation per triple
+    with monkeypatch.context() as m:
+        m.setattr(type(dataset), "get_explanation", None)
+        explanations = dataset.get_explanations(
+            store.heads[idx], store.rels[idx], store.tails[idx]
+        )
+    assert len(explanations) == len(idx)
+    assert explanations.values.shape[1] == 3
+
+    names = dataset.explanation_names(explanations)
+    for triple, explanation in zip(store.iter_triples(idx), names):
+        assert explanation == dataset.get_explanation(*triple)
+
+
+@pytest.mark.parametrize("name", ["fruni", "ftree", "user_item_attr"])
+@pytest.mark.parametrize("backend", [Backend.NETWORKX, Backend.NUMPY])
+def test_explanation_index(name: str, backend: str):
+    dataset = create_dataset(name, backend)
+    dataset_index = create_dataset(name, backend, explanation_index=True)
+    assert dataset.explanation_index is None
+    store = dataset_index.store
+    idx = np.random.permutation(len(store))
+
+    index = dataset_index.explanation_index
+    generic = SyntheticDataset.create_explanation_index(dataset_index)
+    assert np.array_equal(index.values, generic.values)
+    assert np.array_equal(index.offsets, generic.offsets)
+
+    expected = dataset.explanation_ids(idx)
+    explanations = dataset_index.explanation_ids(idx)
+    assert np.array_equal(explanations.values, expected.values)
+    assert np.array_equal(explanations.offsets, expected.offsets)
+    assert dataset_index.compute_explanations(idx) == dataset.compute_explanations(idx)
+
+    root = os.path.join("tests", "data", "explanation_index", name)
+    dataset_index.save(root)
+    dataset_loaded = type(dataset).load(os.path.join(root, dataset.get_hash()))
+    assert np.array_equal(dataset_loaded.explanation_index.values, index.values)
+    assert dataset_loaded.compute_explanations(idx) == dataset.compute_explanations(idx)
+
+
+@pytest.mark.parametrize("name", ["fruni", "ftree", "user_item_attr"])
+@pytest.mark.parametrize("backend", [Backend.NETWORKX, Backend.NUMPY])
+def test_save_load(name: str, backend: str):
+    dataset = create_dataset(name, backend, num_workers=2)
+    # Attributes that are not stored in columns are pickled
+    dataset.feature_names = {"degree": (0, 1)}
+    root = os.path.join("tests", "data", "save_load", name)
+    dataset.save(root)
+
+    dataset_loaded = type(dataset).load(os.path.join(root, dataset.get_hash()))
+    assert dataset_loaded.get_hash() == dataset.get_hash()
+    # Entity names are not built by a process pool unless asked to
+    assert dataset_loaded.num_workers == 1
+    assert dataset_loaded.feature_names == {"degree": (0, 1)}
+    assert isinstance(dataset_loaded.store.heads, np.memmap)
+    for key in ["heads", "rels", "tails", "categories"]:
+        assert np.array_equal(
+            getattr(dataset_loaded.store, key), getattr(dataset.store, key)
+        )
+    assert dataset_loaded.store.entities == dataset.store.entities
+    for split, idx in dataset.get_splits().items():
+        assert np.array_equal(dataset_loaded.get_splits()[split], idx)
+
+    triples = set(dataset.graph.edges(data="relation"))
+    assert set(dataset_loaded.graph.edges(data="relation")) == triples
+
+
+@pytest.mark.parametrize("name", ["fruni", "ftree", "user_item_attr"])
+def test_reproducible(name: str):
+    dataset = create_dataset(name)
+    np.random.seed(1)
+    dataset_np = create_dataset(name, Backend.NUMPY)
+
+    triples = set(dataset.store.iter_triples())
+    assert set(dataset_np.store.iter_triples()) == triples
+    assert set(create_dataset(name).store.iter_triples()) == triples
+    for split, idx in dataset.get_splits().items():
+        assert np.array_equal(dataset_np.get_splits()[split], idx)
+
+
+def test_blocks_independent(monkeypatch):
+    monkeypatch.setattr(FTREEDataset, "block_size", 4)
+    dataset = FTREEDataset(n_t=10, lambda_b=4.0, n_d=3, seed=3, backend=Backend.NUMPY)
+    dataset_other = FTREEDataset(
+        n_t=10, lambda_b=4.0, n_d=3, seed=4, backend=Backend.NUMPY
+    )
+    assert not np.array_equal(dataset.num_branches, dataset_other.num_branches)
+
+    # The last block can be sampled on its own
+    num_branches, branch_lengths = dataset.sample_trees(
+        dataset.rng(RNGStream.COMPONENTS, 2), 8, 10
+    )
+    assert np.array_equal(num_branches, dataset.num_branches[8:])
+    assert np.array_equal(
+        branch_lengths, dataset.branch_lengths[-len(branch_lengths) :]
+    )
+
+
+def test_block_edges(monkeypatch):
+    monkeypatch.setattr(SyntheticDataset, "block_size", 3)
+    # Edges built block by block match the edges of all the components at once
+    dataset = create_dataset("ftree", Backend.NUMPY)
+    heads, rels, tails = dataset.branch_edges(
+        dataset.num_branches, dataset.branch_lengths
+    )
+    assert np.array_equal(dataset.store.heads, heads)
+    assert np.array_equal(dataset.store.rels, rels)
+    assert np.array_equal(dataset.store.tails, tails)
+
+    dataset = create_dataset("fruni", Backend.NUMPY)
+    fr_head, fr_tail = dataset.friend_clique(dataset.num_friends)
+    num_st = dataset.n_u * dataset.num_students
+    fr_start = dataset.n_u + num_st
+    # Edges are laid out as [enrolls | student-friend | friend cliques | unis]
+    ff = np.arange(len(fr_head)) + num_st + len(dataset.friend_student)
+    assert np.array_equal(dataset.store.heads[ff] - fr_start, fr_head)
+    assert np.array_equal(dataset.store.tails[ff] - fr_start, fr_tail)
+
+
+@pytest.mark.parametrize("name", ["fruni", "ftree", "user_item_attr"])
+@pytest.mark.parametrize("backend", [Backend.NETWORKX, Backend.NUMPY])
+def test_parallel_generation(name: str, backend: str, monkeypatch):
+    monkeypatch.setattr(SyntheticDataset, "block_size", 3)
+    dataset = create_dataset(name, backend)
+    dataset_parallel = create_dataset(name, backend, num_workers=3)
+
+    for key in ["heads", "rels", "tails", "categories"]:
+        assert np.array_equal(
+            getattr(dataset_parallel.store, key), getattr(dataset.store, key)
+        )
+    assert dataset_parallel.store.entities == dataset.store.entities
+
+
+@pytest.mark.parametrize("name", ["fruni", "ftree", "user_item_attr"])
+def test_stream(name: str, monkeypatch):
+    monkeypatch.setattr(SyntheticDataset, "block_size", 3)
+    dataset = create_dataset(name, Backend.NUMPY)
+    dataset_stream = create_dataset(name, Backend.STREAM)
+    assert dataset_stream.store is None
+
+    chunks = list(dataset_stream.iter_triples(chunk_size=7))
+    assert all(len(chunk) <= 7 for chunk in chunks)
+    triples = [triple for chunk in chunks for triple in chunk]
+    assert len(triples) == len(dataset.store)
+    assert set(triples) == set(dataset.store.iter_triples())
+    assert dict(dataset_stream.graph.nodes(data="category")) == dict(
+        dataset.graph.nodes(data="category")
+    )
+
+    folder = os.path.join("tests", "data", "stream", name)
+    # Blocks explain their triples without get_explanation
+    with monkeypatch.context() as m:
+        m.setattr(type(dataset_stream), "get_explanation", None)
+        dataset_stream.save_triples(
+            folder, use_hash=False, save_random_test_triples=3, chunk_size=7
+        )
+    written = []
+    for split in ["train", "valid", "test"]:
+        lines = read_lines(os.path.join(folder, f"{split}.txt"))
+        path_exp = os.path.join(folder, f"{split}_explanations.txt")
+        for triple, explanation in zip(lines, read_lines(path_exp)):
+            head, relation, tail = triple.split("\t")
+            assert explanation.split(",") == list(
+                dataset_stream.get_explanation(head, relation, tail)
+            )
+        written.extend(lines)
+    assert sorted(written) == sorted("\t".join(triple) for triple in triples)
+    assert len(read_lines(os.path.join(folder, "test_random_3.txt"))) == 3
+
+    categories = IOUtils.yaml_to_dict(os.path.join(folder, "node_category.yaml"))
+    store = dataset.store
+    assert categories == {
+        n: store.category_list[c]
+        for n, c in zip(store.entities, store.categories.tolist())
+    }
+
+
+@pytest.mark.parametrize("name", ["fruni", "ftree", "user_item_attr"])
+def test_transductive_splits(name: str):
+    dataset = create_dataset(name, Backend.NUMPY, transductive=True, stratify=True)
+    assert dataset.get_hash() != create_dataset(name, Backend.NUMPY).get_hash()
+    store = dataset.store
+    splits = dataset.get_splits()
+    train = splits["train"]
+    seen = set(store.heads[train].tolist()) | set(store.tails[train].tolist())
+    for idx in splits.values():
+        assert set(store.heads[idx].tolist()) <= seen
+        assert set(store.tails[idx].tolist()) <= seen
+        assert set(store.rels[idx].tolist()) <= set(store.rels[train].tolist())
+    permutation = np.concatenate(list(splits.values()))
+    assert np.array_equal(np.sort(permutation), np.arange(len(store)))
+
+
+def legacy_pickle(dataset: SyntheticDataset, folder: str) -> None:
+    """
+    Save `dataset` as former versions did: a pickle of the attributes of the
+    baseline constructor, with the networkx graph in `graph`.
+    """
+    legacy = type(dataset).__new__(type(dataset))
+    legacy.__dict__.update(dataset._id_str())
+    legacy.__dict__.update(
+        percentages=dataset.percentages, seed=dataset.seed, graph=dataset.graph
+    )
+    if isinstance(dataset, UserItemAttrDataset):
+        legacy.__dict__.update(
+            num_attr=dataset.num_attr, num_it=dataset.num_it, num_u=dataset.num_u
+        )
+        legacy.__dict__["rel_emb"] = dataset.rel_emb
+    elif isinstance(dataset, FRUNIDataset):
+        legacy.num_students = dataset.num_students
+    elif isinstance(dataset, FTREEDataset):
+        legacy.edge_keys = dataset.edge_keys
+    IOUtils.makedirs(folder)
+    IOUtils.object_to_pickle(legacy, os.path.join(folder, "dataset.pkl"))
+
+
+@pytest.mark.parametrize("name", ["fruni", "ftree", "user_item_attr"])
+def test_load_legacy(name: str):
+    dataset = create_dataset(name)
+    root = os.path.join("tests", "data", "legacy", name)
+    folder = os.path.join(root, dataset.get_hash())
+    legacy_pickle(dataset, folder)
+
+    # Any subclass can be loaded through the base class
+    loaded = SyntheticDataset.load(folder)
+    assert type(loaded) is type(dataset)
+    assert loaded.get_hash() == dataset.get_hash()
+    assert set(loaded.graph.edges(data="relation")) == set(
+        dataset.graph.edges(data="relation")
+    )
+    idx = np.arange(len(dataset.store))
+    explanations = dataset.explanation_names(dataset.explanation_ids(idx))
+    assert loaded.explanation_names(loaded.explanation_ids(idx)) == explanations
+    loaded.save_triples(os.path.join(root, "triples"), use_hash=False)
+
+    # Saving again replaces the pickle
+    loaded.save(root)
+    assert not os.path.exists(os.path.join(folder, "dataset.pkl"))
+    reloaded = SyntheticDataset.load(folder)
+    assert type(reloaded) is type(dataset)
+    assert np.array_equal(reloaded.store.heads, dataset.store.heads)
+    with pytest.raises(TypeError):
+        SyntheticDataset.subclass("Unknown")
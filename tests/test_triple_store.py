@@ -0,0 +1,91 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from synthetic_knowledge_graphs import FRUNIDataset, FTREEDataset
+from synthetic_knowledge_graphs.core.entities.triple_store import TripleStore
+from synthetic_knowledge_graphs.core.values.constants import Backend
+
+
+def graph_triples(graph: nx.DiGraph) -> set[tuple[str, str, str]]:
+    return {(u, r, v) for u, v, r in graph.edges(data="relation")}
+
+
+def create_graph():
+    graph = nx.DiGraph()
+    graph.add_node("a", category="x")
+    graph.add_node("b", category="y")
+    graph.add_node("c", category="y")
+    graph.add_edge("a", "b", relation="r1")
+    graph.add_edge("b", "c", relation="r2")
+    graph.add_edge("a", "c", relation="r1")
+    return graph
+
+
+def test_from_networkx():
+    graph = create_graph()
+    store = TripleStore.from_networkx(graph)
+
+    assert store.num_entities == 3
+    assert len(store) == 3
+    assert store.heads.dtype == np.int32
+    assert store.relations == ["r1", "r2"]
+    assert store.entity_name(store.entity_id("c")) == "c"
+    assert store.category(store.entity_id("a")) == "x"
+    assert set(store.iter_triples()) == graph_triples(graph)
+
+    graph_rec = store.to_networkx()
+    assert graph_triples(graph_rec) == graph_triples(graph)
+    assert dict(graph_rec.nodes(data=True)) == dict(graph.nodes(data=True))
+
+
+def test_populate():
+    calls = []
+
+    def names():
+        calls.append(1)
+        return ["e0", "e1", "e2"]
+
+    store = TripleStore(
+        entities=names, relations=["r"], categories=[0, 0, 1], category_list=["u", "v"]
+    )
+    store.add_triples([0, 1], [0, 0], [1, 2])
+    store.add_triples([2], [store.add_relation("s")], [0])
+    assert len(calls) == 0
+    assert store.rels.tolist() == [0, 0, 1]
+
+    assert store.triple(2) == ("e2", "s", "e0")
+    assert len(calls) == 1
+
+    ids = store.add_entities(["e3", "e4"], "w")
+    assert ids.tolist() == [3, 4]
+    assert store.entity_id("e4") == 4
+    assert store.category(4) == "w"
+
+
+@pytest.mark.parametrize("backend", [Backend.NETWORKX, Backend.NUMPY])
+def test_dataset_store(backend: str):
+    for dataset in [
+        FRUNIDataset(n_u=10, lambda_f=2.0, alpha_u=0.1, backend=backend),
+        FTREEDataset(n_t=5, lambda_b=3.0, n_d=3, backend=backend),
+    ]:
+        store = dataset.store
+        assert len(store) == dataset.graph.number_of_edges()
+        assert set(store.iter_triples()) == graph_triples(dataset.graph)
+
+
+def test_category_ids():
+    store = TripleStore(
+        entities=["e0", "e1", "e2", "e3"],
+        relations=["r"],
+        categories=[1, 0, 1, 0],
+        category_list=["u", "v"],
+    )
+    assert store.category_ids("u").tolist() == [1, 3]
+    assert store.category_ids("v").tolist() == [0, 2]
+    assert len(store.category_ids("w")) == 0
+
+    store.add_entities(["e4", "e5"], "w")
+    store.add_entities(["e6"], "u")
+    assert store.category_ids("u").tolist() == [1, 3, 6]
+    assert store.category_ids("w").tolist() == [4, 5]
@@ -1,9 +1,14 @@
 import os
 
+import numpy as np
 import pytest
 
 from synthetic_knowledge_graphs import UserItemAttrDataset
-from synthetic_knowledge_graphs.core.values.constants import EntityType
+from synthetic_knowledge_graphs.core.values.constants import (
+    Backend,
+    EntityType,
+    Relation,
+)
 from synthetic_knowledge_graphs.impl.graph_utils import GraphUtilsNX
 
 
@@ -82,6 +87,52 @@ def test_items_with_single_attr(
         assert len(list(dataset.graph.predecessors(item_node))) == 1
 
 
+@pytest.mark.parametrize("num_attrs", [2, 10])
+@pytest.mark.parametrize("lambda_a", [0.0, 1.0, 20.0])
+@pytest.mark.parametrize("lambda_i", [1.0, 5.0])
+@pytest.mark.parametrize("seed", list(range(2)))
+def test_numpy_backend(num_attrs: int, lambda_a: float, lambda_i: float, seed: int):
+    dataset = UserItemAttrDataset(
+        num_attrs=num_attrs,
+        num_items=50,
+        num_users=40,
+        lambda_a=lambda_a,
+        lambda_i=lambda_i,
+        seed=seed,
+        backend=Backend.NUMPY,
+    )
+
+    held_by = dataset.store.rels == 0
+    held = set(
+        zip(
+            dataset.store.heads[held_by].tolist(), dataset.store.tails[held_by].tolist()
+        )
+    )
+    assert len(held) == held_by.sum(), "Repeated attributes for an item"
+    n_attr = np.bincount(dataset.store.tails[held_by] - num_attrs, minlength=50)
+    assert n_attr.min() >= 1 and n_attr.max() <= num_attrs
+    if lambda_a == 0.0:
+        assert np.all(n_attr == 1)
+
+    # Users only buy items that hold their attribute
+    for it, user in zip(dataset.store.heads[~held_by], dataset.store.tails[~held_by]):
+        attr = dataset.user_attr[user - num_attrs - 50]
+        assert (attr, it) in held
+
+    head, relation, tail = "it-0", Relation.BOUGHT_BY, "user-0"
+    explanation = dataset.get_explanation(head, relation, tail)
+    assert explanation[3] == f"{EntityType.ATTRIBUTE}-{dataset.user_attr[0]}"
+    assert dataset._graph is None
+
+    graph = dataset.graph
+    assert graph.number_of_edges() == len(dataset.store.heads)
+    assert len(GraphUtilsNX.filter_nodes_contain(graph, EntityType.USER)) == 40
+    x = dataset.node_features(np.arange(num_attrs + 50 + 40))
+    assert np.all(x[:num_attrs] == np.eye(num_attrs))
+    assert np.all(x[num_attrs : num_attrs + 50] == 0.0)
+    assert np.all(x[num_attrs + 50 :] == -1.0)
+
+
 def test_save():
     dataset = create_default_dataset()
     root = os.path.join("tests", "data", "user_item_attr")